@@ -0,0 +1,33 @@
+# !/usr/bin/env Python3
+# -*- coding:utf-8 -*-
+
+"""
+    foreach 分块模式基准: 对 100 万个元素逐个调用与按 chunk 传入 NumPy 视图后向量化计算的对比
+
+    python benchmarks/bench_foreach_chunk.py
+"""
+
+import time
+
+import numpy
+
+from chinodeco.decodsl.control import foreach
+
+DATA = numpy.random.default_rng(0).random(1_000_000)
+
+def run(label, body, repeat = 3):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        body()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{label:<16} {elapsed * 1000:8.1f} ms/call")
+    return elapsed
+
+def main():
+    per_item = run("per element", foreach(DATA, item = True)(lambda x: x * x + 1.0))
+    for size in (1_000, 10_000, 100_000):
+        chunked = run(f"chunk={size}", foreach(DATA, chunk = size)(lambda view: view * view + 1.0))
+        print(f"{'':<16} speedup x{per_item / chunked:.1f}")
+
+if __name__ == "__main__":
+    main()
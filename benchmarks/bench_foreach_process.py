@@ -0,0 +1,44 @@
+# !/usr/bin/env Python3
+# -*- coding:utf-8 -*-
+
+"""
+    foreach 多进程模式的扩展基准: 同一 CPU 密集的循环体分别在串行以及 1 / 2 / 4 / 8 个工作进程中运行
+
+    python benchmarks/bench_foreach_process.py
+"""
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from chinodeco.decodsl.control import foreach
+
+SEEDS = list(range(64))
+
+def collatz(seed: int) -> int:
+    # pure python loop, holds the GIL
+    steps = 0
+    for start in range(seed * 2000 + 1, seed * 2000 + 2000):
+        n = start
+        while n != 1:
+            n = n // 2 if n % 2 == 0 else 3 * n + 1
+            steps += 1
+    return steps
+
+def run(label, body, repeat = 3):
+    body()  # warm up the pool
+    start = time.perf_counter()
+    for _ in range(repeat):
+        body()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{label:<12} {elapsed * 1000:8.1f} ms/call")
+    return elapsed
+
+def main():
+    base = run("serial", foreach(SEEDS, item = True)(collatz))
+    for workers in (1, 2, 4, 8):
+        with ProcessPoolExecutor(max_workers = workers) as pool:
+            elapsed = run(f"{workers} workers", foreach(SEEDS, item = True, mode = "process", executor = pool)(collatz))
+        print(f"{'':<12} speedup x{base / elapsed:.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# !/usr/bin/env Python3
+# -*- coding:utf-8 -*-
+
+"""
+    mapargs + offload 的多核扩展基准: 4 个 CPU 密集的参数变换, 分别在 1 / 2 / 4 个工作进程中运行
+
+    python benchmarks/bench_mapargs_offload.py
+"""
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from chinodeco.pretreat import mapargs, offload
+
+def checksum(blob: bytes) -> int:
+    # pure python loop, holds the GIL
+    total = 0
+    for byte in blob:
+        total = (total * 31 + byte) & 0xFFFFFFFF
+    return total
+
+BLOBS = [bytes(range(256)) * 2048 for _ in range(4)]
+
+def run(label, decorator, repeat = 3):
+    @decorator
+    def handle(a, b, c, d):
+        return a ^ b ^ c ^ d
+
+    handle(*BLOBS)  # warm up the pool
+    start = time.perf_counter()
+    for _ in range(repeat):
+        handle(*BLOBS)
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{label:<12} {elapsed * 1000:8.1f} ms/call")
+    return elapsed
+
+def main():
+    base = run("inline", mapargs(*((checksum, i) for i in range(4))))
+    for workers in (1, 2, 4):
+        with ProcessPoolExecutor(max_workers = workers) as pool:
+            task = offload(checksum, executor = pool)
+            elapsed = run(f"{workers} worker(s)", mapargs(*((task, i) for i in range(4))))
+            print(f"{'':<12} speedup x{base / elapsed:.2f}")
+
+if __name__ == "__main__":
+    main()
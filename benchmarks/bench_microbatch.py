@@ -0,0 +1,54 @@
+# !/usr/bin/env Python3
+# -*- coding:utf-8 -*-
+
+"""
+    microbatch 基准: 模拟每次请求固定往返延迟 (1 ms)、最多同时处理 10 个请求的存储,
+    对比 2000 个并发单键查询逐个请求与合并为批量请求的耗时; 两种方式受同一并发上限约束,
+    分别在键大量重复 (50 个不同的键) 与键全部不同时测量, 并输出批大小分布
+
+    python benchmarks/bench_microbatch.py
+"""
+
+import asyncio
+import time
+
+from chinodeco.decodsl import microbatch
+
+CALLS = 2_000
+ROUND_TRIP = 0.001
+# the store accepts at most 10 concurrent requests, single or batched
+LIMIT = 10
+
+def make_store():
+    semaphore = asyncio.Semaphore(LIMIT)
+
+    async def fetch_one(key):
+        async with semaphore:
+            await asyncio.sleep(ROUND_TRIP)
+            return key
+
+    async def fetch_many(keys):
+        async with semaphore:
+            await asyncio.sleep(ROUND_TRIP)
+            return keys
+    return fetch_one, fetch_many
+
+async def run(label, fetch, distinct):
+    start = time.perf_counter()
+    await asyncio.gather(*(fetch(i % distinct) for i in range(CALLS)))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<24} {elapsed * 1000:8.1f} ms")
+    return elapsed
+
+async def main():
+    for distinct in (50, CALLS):
+        print(f"{CALLS} calls, {distinct} distinct keys, at most {LIMIT} concurrent requests")
+        fetch_one, fetch_many = make_store()
+        single = await run("one request per call", fetch_one, distinct)
+        batched_fetch = microbatch(fetch_many, max_size = 100, max_delay = 0.0005)
+        batched = await run("microbatch", batched_fetch, distinct)
+        info = batched_fetch.batch_info()
+        print(f"{'':<24} speedup x{single / batched:.1f}, {info.batches} batches, {info.deduplicated} deduplicated calls, batch sizes {info.sizes}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,67 @@
+# !/usr/bin/env Python3
+# -*- coding:utf-8 -*-
+
+"""
+    标签存储内存基准: 大量函数共享少数几种标签组合时, 每函数独立 dict 与 settags（驻留 frozentags + 反向索引）的对比
+
+    python benchmarks/bench_tagging_memory.py [count]
+"""
+
+import gc
+import sys
+import tracemalloc
+
+from chinodeco.pretreat import tagging
+from chinodeco.pretreat.tagging import settags
+
+TAG_SETS = [
+    ("admin", ("role", "admin"), ("tier", 3)),
+    (("role", "user"), ("tier", 1)),
+    (("role", "user"), ("tier", 2), "beta"),
+    (("role", "guest"),),
+    ("internal", ("owner", "core")),
+]
+
+def make_functions(count):
+    def make():
+        def handler():
+            pass
+        return handler
+    return [make() for _ in range(count)]
+
+def per_function_dict(funcs):
+    # what settags stored before tag sets were interned
+    for i, func in enumerate(funcs):
+        tags = {}
+        for tag in TAG_SETS[i % len(TAG_SETS)]:
+            key, value = (tag, True) if isinstance(tag, str) else tag
+            tags[key] = value
+        setattr(func, "__chino_tags", tags)
+
+def interned(funcs):
+    for i, func in enumerate(funcs):
+        settags(func, *TAG_SETS[i % len(TAG_SETS)])
+
+def measure(label, apply, count):
+    funcs = make_functions(count)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    apply(funcs)
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"{label:<20} {(after - before) / 1024 / 1024:8.2f} MiB  {(after - before) / count:6.1f} B/function")
+    return funcs
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    print(f"{count} functions, {len(TAG_SETS)} distinct tag sets")
+    measure("per-function dict", per_function_dict, count)
+    # settags as shipped: interned tag sets plus the reverse index
+    funcs = measure("settags", interned, count)
+    print(f"{'':<20} {len(tagging._INTERNED_TAGS)} interned tag sets")
+    del funcs
+
+if __name__ == "__main__":
+    main()
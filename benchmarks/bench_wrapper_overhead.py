@@ -0,0 +1,53 @@
+# !/usr/bin/env Python3
+# -*- coding:utf-8 -*-
+
+"""
+    包装器开销基准: 旧式 "同步包装器 + async def 中 await wrapper()" 的双层包装与按函数类型生成的原生包装器对比
+
+    python benchmarks/bench_wrapper_overhead.py
+"""
+
+import asyncio
+import time
+from functools import wraps
+
+from chinodeco.debug import trycatch
+
+N = 200_000
+
+def legacy_trycatch(exception, handler):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            except exception as e:
+                return handler(e)
+
+        # 旧实现: 外层协程只 await 同步包装器返回的协程, 等待过程中抛出的异常不会被捕获
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            return await wrapper(*args, **kwargs)
+        return async_wrapper
+    return decorator
+
+async def target(text):
+    return text
+
+def bench(label, func):
+    async def loop():
+        for _ in range(N):
+            await func("x")
+
+    start = time.perf_counter()
+    asyncio.run(loop())
+    elapsed = time.perf_counter() - start
+    print(f"{label:<24} {elapsed / N * 1e9:8.1f} ns/call")
+
+def main():
+    bench("bare coroutine", target)
+    bench("trycatch (legacy)", legacy_trycatch(ValueError, lambda e: None)(target))
+    bench("trycatch (native)", trycatch(ValueError, lambda e: None)(target))
+
+if __name__ == "__main__":
+    main()
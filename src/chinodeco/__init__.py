@@ -2,18 +2,22 @@
 # -*- coding:utf-8 -*-
 
 __version__ = "0.0.11"
-__all__ = ["decochain", "setargs", "addprefix", "addsuffix", "mapargs", "filterargs", "tag", "tagpop", "settags", "haskey", "haskeys", "gettag", "gettags", "deltags", "alltags", "hastag", "hastags"]
+__all__ = ["decochain", "setargs", "addprefix", "addsuffix", "mapargs", "filterargs", "offload", "tag", "tagpop", "settags", "haskey", "haskeys", "gettag", "gettags", "deltags", "alltags", "hastag", "hastags", "tagged", "tagquery", "matchtags", "findtagged", "tagversion", "ontagchange", "offtagchange", "memoize"]
 
 from .base import decochain
 from .pretreat import (
     setargs, addprefix,
     addsuffix, mapargs,
-    filterargs,
+    filterargs, offload,
 
     tag, tagpop, 
     settags, haskey, 
     haskeys, gettag, 
     gettags, deltags,
     alltags,hastags,
-    hastag
+    hastag, tagged,
+    tagquery, matchtags,
+    findtagged, tagversion,
+    ontagchange, offtagchange,
+    memoize
 )
\ No newline at end of file
@@ -0,0 +1,360 @@
+# !/usr/bin/env Python3
+# -*- coding:utf-8 -*-
+
+MODULE = "chinodeco._kinds"
+
+import inspect
+from functools import update_wrapper
+from typing import (
+    Awaitable,
+    Callable,
+    Any
+)
+
+SYNC = "sync"
+COROUTINE = "coroutine"
+GENERATOR = "generator"
+ASYNCGEN = "asyncgen"
+
+# factories called as `factory(layer, name)` when a wrapper is built, returning an (enter, leave)
+# pair, an (enter, leave, resume, suspend) tuple or None, registered by optional instrumentation
+# such as tracing; `suspend(token)` / `resume(token)` are called around every `yield` of generators
+_INSTRUMENTS: list[Callable[[str, str], tuple[Callable, ...] | None]] = []
+
+def _exposed(wrapper: Callable) -> Callable:
+    # `update_wrapper` copies the tags of a tagged function into its wrapper's __dict__,
+    # such a wrapper replaces the function in the reverse tag index
+    if "__chino_tags" in getattr(wrapper, "__dict__", ()):
+        from .pretreat.tagging import _adopt
+        _adopt(wrapper)
+    return wrapper
+
+def wraps(wrapped: Callable) -> Callable[[Callable], Callable]:
+    """
+    `functools.wraps` for the wrappers built by chinodeco decorators, which `tagged` returns
+    instead of the tagged function they wrap.
+    """
+    return lambda wrapper: _exposed(update_wrapper(wrapper, wrapped))
+
+def kind_of(func: Callable) -> str:
+    """
+    Classify a callable as SYNC, COROUTINE, GENERATOR or ASYNCGEN.
+    """
+    if inspect.iscoroutinefunction(func):
+        return COROUTINE
+    if inspect.isasyncgenfunction(func):
+        return ASYNCGEN
+    if inspect.isgeneratorfunction(func):
+        return GENERATOR
+    return SYNC
+
+def native(
+    func: Callable,
+    *,
+    prepare: Callable[[tuple, dict], tuple[tuple, dict]] | None = None,
+    aprepare: Callable[[tuple, dict], Awaitable[tuple[tuple, dict]]] | None = None,
+    catch: type[BaseException] | tuple[type[BaseException], ...] = (),
+    handler: Callable[[BaseException], Any] | None = None,
+    enter: Callable[[], Any] | None = None,
+    leave: Callable[[Any, BaseException | None], Any] | None = None,
+    layer: str | None = None,
+    name: str | None = None,
+) -> Callable:
+    """
+    Build a wrapper of the same kind as `func` (sync, coroutine, generator or async generator function).
+
+    Args:
+        func: The function to wrap.
+        prepare: Transforms `(args, kwargs)` before the call.
+        aprepare: Coroutine variant of `prepare`, used instead of it for coroutine and async generator functions.
+        catch: Exception types caught around the whole execution, including iteration for generators.
+            `GeneratorExit` is never caught.
+        handler: Called with the caught exception, its return value is returned by sync and coroutine
+            wrappers and becomes the return value of generators, it is discarded for async generators.
+        enter: Called without arguments when the execution starts, before `prepare`.
+        leave: Called with the value returned by `enter` and the exception raised (caught or not) or None
+            when the execution ends, must be given along with `enter`.
+        layer: Kind of decorator building the wrapper (e.g. "debug"), reported to the instrumentation
+            registered at build time. Without instrumentation, the wrapper is built without any check.
+        name: Name reported to the instrumentation, the qualified name of `func` by default.
+
+    Returns:
+        Callable: A wrapper of the same kind as `func`, with `func`'s metadata.
+
+    Notes:
+        - For generators, `prepare` and the exception handling run inside the generator,
+          i.e. on first iteration, like the body of a native generator function.
+        - `send`, `throw` and `close` (and their async counterparts) are forwarded to the wrapped generator.
+    """
+    resume = suspend = None
+    if layer is not None and _INSTRUMENTS:
+        enter, leave, resume, suspend = _instrument(layer, name or getattr(func, '__qualname__', repr(func)), enter, leave)
+
+    kind = kind_of(func)
+    if kind == COROUTINE or kind == ASYNCGEN:
+        if aprepare is None and prepare is not None:
+            sync_prepare = prepare
+            async def aprepare(args, kwargs):
+                return sync_prepare(args, kwargs)
+
+    if enter is not None:
+        return _instrumented(func, kind, prepare, aprepare, catch, handler, enter, leave, resume, suspend)
+
+    if kind == SYNC:
+        if prepare is None:
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                try:
+                    return func(*args, **kwargs)
+                except catch as e:
+                    return handler(e)
+        else:
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                try:
+                    args, kwargs = prepare(args, kwargs)
+                    return func(*args, **kwargs)
+                except catch as e:
+                    return handler(e)
+
+    elif kind == COROUTINE:
+        if aprepare is None:
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                try:
+                    return await func(*args, **kwargs)
+                except catch as e:
+                    return handler(e)
+        else:
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                try:
+                    args, kwargs = await aprepare(args, kwargs)
+                    return await func(*args, **kwargs)
+                except catch as e:
+                    return handler(e)
+
+    elif kind == GENERATOR:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                if prepare is not None:
+                    args, kwargs = prepare(args, kwargs)
+                return (yield from func(*args, **kwargs))
+            except GeneratorExit:
+                raise
+            except catch as e:
+                return handler(e)
+
+    else:
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            try:
+                if aprepare is not None:
+                    args, kwargs = await aprepare(args, kwargs)
+                agen = func(*args, **kwargs)
+                # async generators have no `yield from`, forward the protocol by hand
+                try:
+                    value = await agen.__anext__()
+                except StopAsyncIteration:
+                    return
+                while True:
+                    try:
+                        sent = yield value
+                    except GeneratorExit:
+                        await agen.aclose()
+                        raise
+                    except BaseException as exc:
+                        try:
+                            value = await agen.athrow(exc)
+                        except StopAsyncIteration:
+                            return
+                    else:
+                        try:
+                            value = await (agen.__anext__() if sent is None else agen.asend(sent))
+                        except StopAsyncIteration:
+                            return
+            except GeneratorExit:
+                raise
+            except catch as e:
+                handler(e)
+
+    return wrapper
+
+def instrumented(func: Callable, layer: str, name: str | None = None) -> Callable:
+    """
+    Wrap `func` into an instrumented wrapper of the same kind if instrumentation is registered,
+    return it unchanged otherwise. For decorators that do not build their wrapper with `native`.
+    """
+    if not _INSTRUMENTS or not callable(func) or inspect.isclass(func):
+        return _exposed(func)
+    return native(func, layer = layer, name = name)
+
+def _instrument(layer, name, enter, leave):
+    pairs = [pair for pair in (factory(layer, name) for factory in list(_INSTRUMENTS)) if pair is not None]
+    if enter is not None:
+        pairs.insert(0, (enter, leave))
+    if not pairs:
+        return None, None, None, None
+    if len(pairs) == 1:
+        return pairs[0] if len(pairs[0]) == 4 else (*pairs[0], None, None)
+    enters = [pair[0] for pair in pairs]
+    leaves = [pair[1] for pair in reversed(pairs)]
+    steps = [(index, pair[2], pair[3]) for index, pair in enumerate(pairs) if len(pair) == 4]
+
+    def enter_all():
+        return [enter() for enter in enters]
+
+    def leave_all(tokens, error):
+        for leave, token in zip(leaves, reversed(tokens)):
+            leave(token, error)
+
+    if not steps:
+        return enter_all, leave_all, None, None
+
+    def resume_all(tokens):
+        for index, resume, _ in steps:
+            resume(tokens[index])
+
+    def suspend_all(tokens):
+        for index, _, suspend in reversed(steps):
+            suspend(tokens[index])
+    return enter_all, leave_all, resume_all, suspend_all
+
+def _stepped(gen, token, resume, suspend):
+    # forward the generator protocol to `gen`, suspending the instrumentation while suspended at `yield`
+    try:
+        value = next(gen)
+    except StopIteration as stop:
+        return stop.value
+    while True:
+        suspend(token)
+        try:
+            sent = yield value
+        except GeneratorExit:
+            resume(token)
+            gen.close()
+            raise
+        except BaseException as exc:
+            resume(token)
+            try:
+                value = gen.throw(exc)
+            except StopIteration as stop:
+                return stop.value
+        else:
+            resume(token)
+            try:
+                value = gen.send(sent)
+            except StopIteration as stop:
+                return stop.value
+
+def _pass(token):
+    pass
+
+def _instrumented(func, kind, prepare, aprepare, catch, handler, enter, leave, resume = None, suspend = None):
+    # same wrappers as `native`, reporting the start and the end of the execution
+    if kind == SYNC:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            token = enter()
+            try:
+                if prepare is not None:
+                    args, kwargs = prepare(args, kwargs)
+                result = func(*args, **kwargs)
+            except catch as e:
+                leave(token, e)
+                return handler(e)
+            except BaseException as e:
+                leave(token, e)
+                raise
+            leave(token, None)
+            return result
+
+    elif kind == COROUTINE:
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            token = enter()
+            try:
+                if aprepare is not None:
+                    args, kwargs = await aprepare(args, kwargs)
+                result = await func(*args, **kwargs)
+            except catch as e:
+                leave(token, e)
+                return handler(e)
+            except BaseException as e:
+                leave(token, e)
+                raise
+            leave(token, None)
+            return result
+
+    elif kind == GENERATOR:
+        inner = native(func, prepare = prepare)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            token = enter()
+            try:
+                if suspend is None:
+                    result = yield from inner(*args, **kwargs)
+                else:
+                    result = yield from _stepped(inner(*args, **kwargs), token, resume, suspend)
+            except GeneratorExit:
+                leave(token, None)
+                raise
+            except catch as e:
+                leave(token, e)
+                return handler(e)
+            except BaseException as e:
+                leave(token, e)
+                raise
+            leave(token, None)
+            return result
+
+    else:
+        inner = native(func, aprepare = aprepare)
+        if suspend is None:
+            resume = suspend = _pass
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            token = enter()
+            try:
+                agen = inner(*args, **kwargs)
+                try:
+                    value = await agen.__anext__()
+                except StopAsyncIteration:
+                    leave(token, None)
+                    return
+                while True:
+                    suspend(token)
+                    try:
+                        sent = yield value
+                    except GeneratorExit:
+                        resume(token)
+                        await agen.aclose()
+                        raise
+                    except BaseException as exc:
+                        resume(token)
+                        try:
+                            value = await agen.athrow(exc)
+                        except StopAsyncIteration:
+                            break
+                    else:
+                        resume(token)
+                        try:
+                            value = await (agen.__anext__() if sent is None else agen.asend(sent))
+                        except StopAsyncIteration:
+                            break
+            except GeneratorExit:
+                leave(token, None)
+                raise
+            except catch as e:
+                leave(token, e)
+                handler(e)
+                return
+            except BaseException as e:
+                leave(token, e)
+                raise
+            leave(token, None)
+
+    return wrapper
@@ -5,6 +5,7 @@ MODULE = "chinodeco.base"
 
 from typing import Callable
 
+from ._kinds import instrumented
 from .debug.debugger import _debug_when
 
 @_debug_when
@@ -25,5 +26,5 @@ def decochain(*wrappers: Callable | None):
         for wrapper in reversed(wrappers):
             if wrapper is not None:
                 wrapped = wrapper(wrapped)
-        return wrapped
+        return instrumented(wrapped, "decochain") if wrapped is not func else wrapped
     return composed
\ No newline at end of file
@@ -1,7 +1,7 @@
 # !/usr/bin/env Python3
 # -*- coding:utf-8 -*-
 
-__all__ = ["debug", "trycatch", "DEBUG", "UnknownCommandError", "UnknownParameterError", "ArgumentCountError", "AuthorizationError"]
+__all__ = ["debug", "trycatch", "DEBUG", "UnknownCommandError", "UnknownParameterError", "ArgumentCountError", "AuthorizationError", "CircuitOpenError", "retry", "circuitbreaker", "profile", "Profiler", "ProfileStats", "LogHistogram", "getprofiler", "Span", "span", "currentspan", "bindcontext", "enabletracing", "disabletracing", "JSONLExporter", "ChromeTraceExporter", "addhook", "removehook", "gethooks", "DebugRecord", "RingBufferSink", "AggregatingSink", "FailureStat", "getdebugsink", "setdebugsink", "format_record"]
 
 from .debugger import (
     DEBUG,
@@ -13,5 +13,46 @@ from .errors import (
     UnknownCommandError,
     UnknownParameterError,
     ArgumentCountError,
-    AuthorizationError
+    AuthorizationError,
+    CircuitOpenError
+)
+
+from .profiler import (
+    profile,
+    Profiler,
+    ProfileStats,
+    LogHistogram,
+    getprofiler
+)
+
+from .tracing import (
+    Span,
+    span,
+    currentspan,
+    bindcontext,
+    enabletracing,
+    disabletracing,
+    JSONLExporter,
+    ChromeTraceExporter
+)
+
+from .hooks import (
+    addhook,
+    removehook,
+    gethooks
+)
+
+from .resilience import (
+    retry,
+    circuitbreaker
+)
+
+from .sinks import (
+    DebugRecord,
+    RingBufferSink,
+    AggregatingSink,
+    FailureStat,
+    getdebugsink,
+    setdebugsink,
+    format_record
 )
\ No newline at end of file
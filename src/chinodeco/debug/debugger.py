@@ -4,111 +4,165 @@
 MODULE = "chinodeco.debug.debugger"
 
 import inspect
+import time
 from typing import (
     Callable,
+    Mapping,
     Any
 )
-from functools import wraps
+from traceback import format_exception
 from .errors import ArgumentCountError
+from .._kinds import native
+from . import sinks as _sinks
+from .sinks import DebugRecord
 
 DEBUG = False
 _DEBUG_VERBOSE = False
 
-def debug(func = None, *, verbose = _DEBUG_VERBOSE):
+def debug(func = None, *, verbose = _DEBUG_VERBOSE, sink: Callable[[DebugRecord], Any] | None = None, traceback: bool = False):
     """
-    A decorator that suppresses exceptions raised by the decorated function and optionally prints debug information.
+    A decorator that suppresses exceptions raised by the decorated function and reports them as structured records.
 
-    If `verbose` is True, it prints the module and qualified name of the function along with the error message.
-    Otherwise, only the exception message is printed.
+    Each swallowed exception is emitted as a `DebugRecord` (qualname, module, exception type, message,
+    timestamp, code location and optional traceback) into `sink`, or into the sink set by `setdebugsink`.
+    Wrap the sink in an `AggregatingSink` to rate limit repeated exceptions.
+    The default sink is a bounded `RingBufferSink` written to stdout by a background thread:
+    if `verbose` is True, the module and qualified name of the function are written along with
+    the error message, otherwise only the exception message is written.
+
+    Sync, coroutine, generator and async generator functions get a wrapper of their own kind,
+    so exceptions raised while awaiting or iterating are suppressed too.
 
     Can be used with or without parentheses:
         @debug
         def my_func(): ...
 
-        @debug(verbose=True)
+        @debug(verbose=True, traceback=True)
         def my_func(): ...
 
     Args:
         func: The target function to wrap. Automatically handled when used as a decorator.
         verbose: Whether to include full function context in the error output.
+        sink: Callable receiving the records, the global sink if None.
+        traceback: Whether to format the traceback into the record.
 
     Returns:
-        Callable: The wrapped function with error suppression and optional debug output.
+        Callable: The wrapped function with error suppression and structured error reporting.
     """
     if func is None:
-        return lambda f: debug(f, verbose=verbose)
+        return lambda f: debug(f, verbose=verbose, sink=sink, traceback=traceback)
     if inspect.isclass(func):
         for name, member in vars(func).items():
-            if inspect.isfunction(member) or isinstance(member, (staticmethod, classmethod)):
-                setattr(func, name, debug(member, verbose=verbose))
+            if inspect.isfunction(member):
+                setattr(func, name, debug(member, verbose=verbose, sink=sink, traceback=traceback))
+            elif isinstance(member, (staticmethod, classmethod)):
+                setattr(func, name, type(member)(debug(member.__func__, verbose=verbose, sink=sink, traceback=traceback)))
         return func
     elif callable(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            try:
-                return func(*args, **kwargs)
-            except Exception as e:
-                if verbose:
-                    print(f"[{MODULE}.{getattr(func, '__qualname__', repr(func))}] {e}")
-                else:
-                    print(f"{e}")
-        if inspect.iscoroutinefunction(func):
-            @wraps(func)
-            async def async_wrapper(*args, **kwargs):
-                return await wrapper(*args, **kwargs)
-            return async_wrapper
-        return wrapper
+        qualname = getattr(func, '__qualname__', repr(func))
+        module = getattr(func, '__module__', None) or MODULE
+
+        def report(e: Exception) -> None:
+            tb = e.__traceback__
+            while tb.tb_next is not None:
+                tb = tb.tb_next
+            location = f"{tb.tb_frame.f_code.co_filename}:{tb.tb_lineno}"
+            record = DebugRecord(qualname, module, type(e).__name__, str(e), time.time(), "".join(format_exception(e)) if traceback else None, verbose, location)
+            (sink if sink is not None else _sinks._DEBUG_SINK)(record)
+
+        return native(func, catch = Exception, handler = report, layer = "debug")
     else:
         return func
 
 _debug_when = debug if DEBUG else lambda f: f
 
+def _check_handler(handler: Callable[[BaseException], Any]) -> None:
+    if not callable(handler):
+        raise TypeError(f"[{MODULE}.trycatch] handler must be callable.")
+
+    # check argument count
+    sig = inspect.signature(handler)
+    params = list(sig.parameters.values())
+    valid_params = [p for p in params if p.kind in (inspect.Parameter.POSITIONAL_ONLY, inspect.Parameter.POSITIONAL_OR_KEYWORD)]
+    if len(valid_params) != 1:
+        raise ArgumentCountError(f"[{MODULE}.trycatch] handler must accept exactly one argument, but got {len(valid_params)}.")
+
 @_debug_when
-def trycatch(exception: BaseException | tuple[BaseException], handler: Callable[[BaseException], Any]):
+def trycatch(
+    exception: type[BaseException] | tuple[type[BaseException], ...] | Mapping[type[BaseException] | tuple[type[BaseException], ...], Callable[[BaseException], Any]],
+    handler: Callable[[BaseException], Any] | None = None
+):
     """
     Decorator that wraps a function in a try-except block, invoking a handler if the specified exception occurs.
 
     Parameters:
         exception:
             The exception type(s) to catch. Can be a single exception class or a tuple of multiple exception classes.
+            Can also be a mapping of exception class(es) to handlers, in which case `handler` must be omitted:
+            the handler of the closest class in the MRO of the raised exception is called, and the resolution
+            is cached per exception class.
         handler:
             A callable that takes exactly one argument (the exception instance) and handles the error.
-            The return value of this handler will be used as the result of the decorated function upon exception.
+            The return value of this handler will be used as the result of the decorated function upon exception
+            (the return value of the generator for generator functions).
+            Exceptions raised while awaiting a coroutine or iterating a (async) generator are caught too.
 
     Raises:
-        TypeError: If `func` or `handler` is not callable, or if `handler` does not accept exactly one parameter.
+        TypeError: If `func` or `handler` is not callable, or if `handler` does not accept exactly one parameter,
+            or if `handler` is given along with a mapping.
 
     Example:
         @trycatch(ValueError, lambda e: print(f"Handled error: {e}"))
         def parse_int(text):
             return int(text)
+
+        @trycatch({KeyError: lambda e: None, LookupError: lambda e: [], Exception: lambda e: "error"})
+        def lookup(table, key):
+            return table[key]
     """
-    if not callable(handler):
-        raise TypeError(f"[{MODULE}.trycatch] handler must be callable.")
+    if isinstance(exception, Mapping):
+        if handler is not None:
+            raise TypeError(f"[{MODULE}.trycatch] handler cannot be given along with a mapping of handlers.")
+        handlers: dict[type[BaseException], Callable[[BaseException], Any]] = {}
+        checked = set()
+        for types, type_handler in exception.items():
+            if id(type_handler) not in checked:
+                _check_handler(type_handler)
+                checked.add(id(type_handler))
+            for exc_type in (types if isinstance(types, tuple) else (types,)):
+                handlers[exc_type] = type_handler
+        catch = tuple(handlers)
+        resolved: dict[type[BaseException], Callable[[BaseException], Any]] = {}
+
+        def resolve(exc_type: type[BaseException]) -> Callable[[BaseException], Any]:
+            # the first class of the MRO with a handler is the most specific one
+            for base in exc_type.__mro__:
+                if base in handlers:
+                    break
+            else:
+                # virtual subclasses (ABC registration) are not in the MRO
+                base = next(base for base in handlers if issubclass(exc_type, base))
+            resolved[exc_type] = handlers[base]
+            return handlers[base]
+
+        def dispatch(e: BaseException):
+            exc_type = type(e)
+            return resolved.get(exc_type) or resolve(exc_type)
+    else:
+        _check_handler(handler)
+        catch = exception
 
-    # check argument count
-    sig = inspect.signature(handler)
-    params = list(sig.parameters.values())
-    valid_params = [p for p in params if p.kind in (inspect.Parameter.POSITIONAL_ONLY, inspect.Parameter.POSITIONAL_OR_KEYWORD)]
-    if len(valid_params) != 1:
-        raise ArgumentCountError(f"[{MODULE}.trycatch] handler must accept exactly one argument, but got {len(valid_params)}.")
+        def dispatch(e: BaseException):
+            return handler
+
+    def handle(e: BaseException):
+        try:
+            return dispatch(e)(e)
+        except TypeError as error:
+            raise TypeError(f"[{MODULE}.trycatch] {error}.")
 
     def decorator(func: Callable):
         if not callable(func):
             raise TypeError(f"[{MODULE}.trycatch] Invalid func type: {type(func)}. Must be Callable or Coroutinefunction.")
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            try:
-                return func(*args, **kwargs)
-            except exception as e:
-                try:
-                    return handler(e)
-                except TypeError as error:
-                    raise TypeError(f"[{MODULE}.trycatch] {error}.")
-        if inspect.iscoroutinefunction(func):
-            @wraps(func)
-            async def async_wrapper(*args, **kwargs):
-                return await wrapper(*args, **kwargs)
-            return async_wrapper
-        return wrapper
-    return decorator
\ No newline at end of file
+        return native(func, catch = catch, handler = handle, layer = "trycatch")
+    return decorator
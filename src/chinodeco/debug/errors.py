@@ -13,4 +13,7 @@ class ArgumentCountError(TypeError):
     pass
 
 class AuthorizationError(PermissionError):
-    pass
\ No newline at end of file
+    pass
+
+class CircuitOpenError(RuntimeError):
+    pass
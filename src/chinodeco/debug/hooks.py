@@ -0,0 +1,101 @@
+# !/usr/bin/env Python3
+# -*- coding:utf-8 -*-
+
+MODULE = "chinodeco.debug.hooks"
+
+import threading
+from typing import (
+    Callable,
+    Any
+)
+
+from .. import _kinds
+
+CALL_ENTER = "enter"
+CALL_EXIT = "exit"
+EXCEPTION = "exception"
+
+# event -> hooks, replaced (never mutated) on change so that wrappers can iterate without a lock
+_HOOKS: dict[str, tuple[Callable, ...]] = {CALL_ENTER: (), CALL_EXIT: (), EXCEPTION: ()}
+_HOOKS_LOCK = threading.Lock()
+
+def _instrument(layer: str, name: str):
+    hooks = _HOOKS
+
+    def enter():
+        for hook in hooks[CALL_ENTER]:
+            hook(layer, name)
+
+    def leave(token, error):
+        if error is not None:
+            for hook in hooks[EXCEPTION]:
+                hook(layer, name, error)
+        for hook in hooks[CALL_EXIT]:
+            hook(layer, name)
+    return enter, leave
+
+def addhook(event: str, hook: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Register a process-wide hook called by every chinodeco wrapper.
+
+    Events and hook signatures:
+        - "enter": `hook(layer, name)` when a call starts.
+        - "exit": `hook(layer, name)` when a call ends, normally or not.
+        - "exception": `hook(layer, name, exception)` when a call raises, before "exit";
+          exceptions swallowed by `debug` or handled by `trycatch` are reported too.
+    `layer` is the kind of decorator that built the wrapper ("debug", "mapargs", "decochain",
+    "dispatcher", ...) and `name` is the qualified name of the decorated callable.
+    Coroutines and (async) generators report when they start running and when they finish.
+
+    Like `sys.monitoring`, the instrumentation is decided when a wrapper is built: wrappers
+    created while no hook is registered contain no hook check at all, and registering a hook
+    applies to the wrappers created afterwards, which call the hooks registered at call time.
+    Hooks must be cheap and must not raise.
+
+    Args:
+        event: One of "enter", "exit" and "exception".
+        hook: The callable to register.
+
+    Returns:
+        The registered hook.
+
+    Raises:
+        ValueError: If `event` is unknown.
+        TypeError: If `hook` is not callable.
+    """
+    if event not in _HOOKS:
+        raise ValueError(f"[{MODULE}.addhook] unknown event {event!r}, expected one of {', '.join(map(repr, _HOOKS))}.")
+    if not callable(hook):
+        raise TypeError(f"[{MODULE}.addhook] hook must be callable, but got {type(hook).__name__}")
+    with _HOOKS_LOCK:
+        _HOOKS[event] = _HOOKS[event] + (hook,)
+        if _instrument not in _kinds._INSTRUMENTS:
+            _kinds._INSTRUMENTS.append(_instrument)
+    return hook
+
+def removehook(event: str, hook: Callable[..., Any]) -> bool:
+    """
+    Unregister a hook, wrappers built once no hook is left are built without hook checks again.
+
+    Returns:
+        True if the hook was registered for `event`.
+    """
+    if event not in _HOOKS:
+        raise ValueError(f"[{MODULE}.removehook] unknown event {event!r}, expected one of {', '.join(map(repr, _HOOKS))}.")
+    with _HOOKS_LOCK:
+        hooks = list(_HOOKS[event])
+        if hook not in hooks:
+            return False
+        hooks.remove(hook)
+        _HOOKS[event] = tuple(hooks)
+        if not any(_HOOKS.values()) and _instrument in _kinds._INSTRUMENTS:
+            _kinds._INSTRUMENTS.remove(_instrument)
+        return True
+
+def gethooks(event: str) -> tuple[Callable[..., Any], ...]:
+    """
+    Return the hooks registered for `event`, in call order.
+    """
+    if event not in _HOOKS:
+        raise ValueError(f"[{MODULE}.gethooks] unknown event {event!r}, expected one of {', '.join(map(repr, _HOOKS))}.")
+    return _HOOKS[event]
@@ -0,0 +1,240 @@
+# !/usr/bin/env Python3
+# -*- coding:utf-8 -*-
+
+MODULE = "chinodeco.debug.profiler"
+
+import inspect
+import json
+import math
+import threading
+import time
+from collections import namedtuple
+from typing import (
+    Callable,
+    Iterator
+)
+
+from .._kinds import native
+
+class LogHistogram:
+    def __init__(self, precision: int = 8):
+        """
+        A histogram of positive durations with logarithmic buckets.
+
+        Each power of two is split into `precision` buckets, so the relative error of a
+        quantile is below `2 ** (1 / precision) - 1` (about 9% for the default), whatever
+        the range of the values, with a memory use growing with the number of octaves only.
+
+        Args:
+            precision: Number of buckets per power of two.
+        """
+        if not isinstance(precision, int) or precision < 1:
+            raise ValueError(f"[{MODULE}.LogHistogram] precision must be a positive integer.")
+        self.precision = precision
+        self.__scale = precision / math.log(2)
+        self.__buckets: dict[int, int] = {}
+        self.__lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, value: float) -> None:
+        """
+        Add a duration in seconds, non-positive durations fall into the lowest bucket.
+        """
+        index = math.floor(math.log(value) * self.__scale) if value > 0 else -1 << 30
+        with self.__lock:
+            self.__buckets[index] = self.__buckets.get(index, 0) + 1
+            self.count += 1
+            self.total += value
+            if value < self.min:
+                self.min = value
+            if value > self.max:
+                self.max = value
+
+    def quantile(self, q: float) -> float:
+        """
+        Return an estimate of the `q` quantile (0 <= q <= 1), 0.0 for an empty histogram.
+        """
+        if not 0 <= q <= 1:
+            raise ValueError(f"[{MODULE}.LogHistogram] q must be between 0 and 1.")
+        with self.__lock:
+            if not self.count:
+                return 0.0
+            rank = q * self.count
+            seen = 0
+            for index in sorted(self.__buckets):
+                seen += self.__buckets[index]
+                if seen >= rank:
+                    break
+            low, high = self.min, self.max
+        # geometric middle of the bucket, clamped to the observed range
+        estimate = math.exp((index + 0.5) / self.__scale)
+        return min(max(estimate, low), high)
+
+    def buckets(self) -> Iterator[tuple[float, int]]:
+        """
+        Yield (upper bound in seconds, count) for every non-empty bucket, in increasing order.
+        """
+        with self.__lock:
+            items = sorted(self.__buckets.items())
+        for index, count in items:
+            yield math.exp((index + 1) / self.__scale), count
+
+ProfileStats = namedtuple("ProfileStats", ["name", "calls", "samples", "wall_p50", "wall_p95", "wall_p99", "wall_total", "cpu_p50", "cpu_p95", "cpu_p99", "cpu_total"])
+ProfileStats.__doc__ = """
+Summary of a profiled function, durations in seconds.
+
+Fields:
+    name: "module.qualname" of the function.
+    calls: Number of calls.
+    samples: Number of timed calls.
+    wall_p50, wall_p95, wall_p99: Quantiles of the wall time of the timed calls.
+    wall_total: Wall time of the timed calls.
+    cpu_p50, cpu_p95, cpu_p99: Quantiles of the CPU time of the calling thread during the timed calls.
+    cpu_total: CPU time of the timed calls.
+"""
+
+class _FunctionProfile:
+    __slots__ = ("calls", "wall", "cpu")
+
+    def __init__(self, precision: int):
+        self.calls = 0
+        self.wall = LogHistogram(precision)
+        self.cpu = LogHistogram(precision)
+
+class Profiler:
+    def __init__(self, precision: int = 8):
+        """
+        A collection of per-function histograms filled by `profile`.
+
+        Args:
+            precision: Number of histogram buckets per power of two.
+        """
+        self.precision = precision
+        self.__profiles: dict[str, _FunctionProfile] = {}
+        self.__lock = threading.Lock()
+
+    def _profile_of(self, name: str) -> _FunctionProfile:
+        with self.__lock:
+            profile = self.__profiles.get(name)
+            if profile is None:
+                profile = self.__profiles[name] = _FunctionProfile(self.precision)
+            return profile
+
+    def report(self) -> dict[str, ProfileStats]:
+        """
+        Return the `ProfileStats` of every profiled function, keyed by "module.qualname".
+        """
+        with self.__lock:
+            profiles = list(self.__profiles.items())
+        return {
+            name: ProfileStats(
+                name, profile.calls, profile.wall.count,
+                profile.wall.quantile(0.5), profile.wall.quantile(0.95), profile.wall.quantile(0.99), profile.wall.total,
+                profile.cpu.quantile(0.5), profile.cpu.quantile(0.95), profile.cpu.quantile(0.99), profile.cpu.total,
+            )
+            for name, profile in profiles
+        }
+
+    def to_json(self, **kwargs) -> str:
+        """
+        Export the report as a JSON object keyed by function, `kwargs` are passed to `json.dumps`.
+        """
+        return json.dumps({name: stats._asdict() for name, stats in self.report().items()}, **kwargs)
+
+    def to_prometheus(self, prefix: str = "chinodeco") -> str:
+        """
+        Export the report in the Prometheus text exposition format, as summaries labelled by function.
+        """
+        lines = [f"# TYPE {prefix}_calls_total counter"]
+        report = self.report()
+        for name, stats in report.items():
+            lines.append(f'{prefix}_calls_total{{function="{name}"}} {stats.calls}')
+        for metric in ("wall", "cpu"):
+            lines.append(f"# TYPE {prefix}_{metric}_seconds summary")
+            for name, stats in report.items():
+                for q in ("50", "95", "99"):
+                    lines.append(f'{prefix}_{metric}_seconds{{function="{name}",quantile="0.{q}"}} {getattr(stats, f"{metric}_p{q}"):.9g}')
+                lines.append(f'{prefix}_{metric}_seconds_sum{{function="{name}"}} {getattr(stats, f"{metric}_total"):.9g}')
+                lines.append(f'{prefix}_{metric}_seconds_count{{function="{name}"}} {stats.samples}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """
+        Forget all the recorded calls.
+        """
+        with self.__lock:
+            self.__profiles.clear()
+
+_PROFILER = Profiler()
+
+def getprofiler() -> Profiler:
+    """
+    Return the `Profiler` used by `profile` when none is given to the decorator.
+    """
+    return _PROFILER
+
+def profile(func = None, *, sample: int = 1, profiler: Profiler | None = None):
+    """
+    A decorator that records the wall time and CPU time of calls into log-bucketed histograms.
+
+    Only one call out of `sample` is timed, the others are counted, which bounds the overhead
+    on hot functions. Coroutines are timed until they return and (async) generators until
+    they are exhausted or closed; the CPU time is the time of the calling thread, which
+    includes other tasks run by the event loop while a coroutine is suspended.
+
+    When applied to a class, every function, static method and class method defined in it is profiled.
+
+    Can be used with or without parentheses:
+        @profile
+        def handle(request): ...
+
+        @profile(sample=100)
+        class Repository: ...
+
+        getprofiler().report()["app.handle"].wall_p99
+
+    Args:
+        func: The target function or class. Automatically handled when used as a decorator.
+        sample: Time one call out of `sample`.
+        profiler: The `Profiler` to record into, the global one if None.
+
+    Returns:
+        Callable: The profiled function, or the class.
+
+    Raises:
+        ValueError: If `sample` is not a positive integer.
+    """
+    if not isinstance(sample, int) or sample < 1:
+        raise ValueError(f"[{MODULE}.profile] sample must be a positive integer.")
+    if func is None:
+        return lambda f: profile(f, sample=sample, profiler=profiler)
+    if inspect.isclass(func):
+        for name, member in vars(func).items():
+            if inspect.isfunction(member):
+                setattr(func, name, profile(member, sample=sample, profiler=profiler))
+            elif isinstance(member, (staticmethod, classmethod)):
+                setattr(func, name, type(member)(profile(member.__func__, sample=sample, profiler=profiler)))
+        return func
+    elif callable(func):
+        name = f"{getattr(func, '__module__', None) or MODULE}.{getattr(func, '__qualname__', repr(func))}"
+        stats = (profiler if profiler is not None else _PROFILER)._profile_of(name)
+        wall, cpu = stats.wall, stats.cpu
+        perf_counter, thread_time = time.perf_counter, time.thread_time
+
+        def enter():
+            stats.calls += 1  # not locked, may undercount under heavy contention
+            if stats.calls % sample:
+                return None
+            return perf_counter(), thread_time()
+
+        def leave(token, error):
+            if token is not None:
+                wall.record(perf_counter() - token[0])
+                cpu.record(thread_time() - token[1])
+
+        return native(func, enter = enter, leave = leave, layer = "profile")
+    else:
+        return func
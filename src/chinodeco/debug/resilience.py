@@ -0,0 +1,281 @@
+# !/usr/bin/env Python3
+# -*- coding:utf-8 -*-
+
+MODULE = "chinodeco.debug.resilience"
+
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from functools import wraps
+from typing import (
+    Callable
+)
+
+from .._kinds import kind_of, instrumented, SYNC, COROUTINE
+from .errors import CircuitOpenError
+from .debugger import _debug_when
+
+def _check_kind(func: Callable, tag: str) -> str:
+    if not callable(func):
+        raise TypeError(f"[{MODULE}.{tag}] Invalid func type: {type(func)}. Must be Callable or Coroutinefunction.")
+    kind = kind_of(func)
+    if kind not in (SYNC, COROUTINE):
+        raise TypeError(f"[{MODULE}.{tag}] generator functions are not supported, but got {getattr(func, '__qualname__', repr(func))}.")
+    return kind
+
+@_debug_when
+def retry(
+    exception: type[BaseException] | tuple[type[BaseException], ...] = Exception,
+    *,
+    attempts: int = 3,
+    delay: float = 0.1,
+    factor: float = 2.0,
+    max_delay: float | None = None,
+    jitter: bool = True,
+    deadline: float | None = None
+) -> Callable:
+    """
+    Decorator that calls the function again when it raises `exception`, with exponential backoff.
+
+    The n-th retry waits `delay * factor ** (n - 1)` seconds, capped by `max_delay`. With `jitter`,
+    the wait is drawn uniformly between 0 and that value ("full jitter"), so that callers failing
+    together do not retry together. Coroutine functions wait with `asyncio.sleep`.
+    The last exception is re-raised when the attempts are exhausted, or when the next wait would
+    end after `deadline` seconds from the first attempt.
+
+    Example:
+        @retry(ConnectionError, attempts=5, delay=0.2, deadline=3.0)
+        async def fetch(url): ...
+
+    Args:
+        exception: The exception type(s) that trigger a retry.
+        attempts: Maximum number of calls, the first one included.
+        delay: Wait before the first retry, in seconds.
+        factor: Multiplier of the wait after each retry.
+        max_delay: Upper bound of a single wait, None for no bound.
+        jitter: Whether to randomize the waits.
+        deadline: Overall time budget in seconds, None for no budget.
+
+    Returns:
+        A decorator for sync or coroutine functions.
+
+    Raises:
+        ValueError: If `attempts` is not a positive integer, or `delay`, `factor`, `max_delay` or `deadline` is out of range.
+        TypeError: If the decorated object is not a sync or coroutine function.
+    """
+    if not isinstance(attempts, int) or isinstance(attempts, bool) or attempts < 1:
+        raise ValueError(f"[{MODULE}.retry] attempts must be a positive integer.")
+    if delay < 0 or factor < 1:
+        raise ValueError(f"[{MODULE}.retry] delay must be non-negative and factor at least 1.")
+    if (max_delay is not None and max_delay < 0) or (deadline is not None and not deadline > 0):
+        raise ValueError(f"[{MODULE}.retry] max_delay must be non-negative and deadline positive.")
+
+    def waits():
+        wait = delay
+        for _ in range(attempts - 1):
+            bounded = wait if max_delay is None else min(wait, max_delay)
+            yield random.uniform(0, bounded) if jitter else bounded
+            wait *= factor
+
+    def decorator(func: Callable):
+        kind = _check_kind(func, "retry")
+
+        if kind == COROUTINE:
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                end = None if deadline is None else time.monotonic() + deadline
+                for wait in waits():
+                    try:
+                        return await func(*args, **kwargs)
+                    except exception:
+                        if end is not None and time.monotonic() + wait > end:
+                            raise
+                    await asyncio.sleep(wait)
+                return await func(*args, **kwargs)
+        else:
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                end = None if deadline is None else time.monotonic() + deadline
+                for wait in waits():
+                    try:
+                        return func(*args, **kwargs)
+                    except exception:
+                        if end is not None and time.monotonic() + wait > end:
+                            raise
+                    time.sleep(wait)
+                return func(*args, **kwargs)
+        return instrumented(wrapper, "retry")
+    return decorator
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class circuitbreaker:
+    def __init__(
+        self,
+        exception: type[BaseException] | tuple[type[BaseException], ...] = Exception,
+        *,
+        failure_rate: float = 0.5,
+        window: int = 20,
+        min_calls: int = 5,
+        reset_timeout: float = 30.0,
+        half_open_calls: int = 1
+    ):
+        """
+        Decorator that stops calling a failing function for a while, failing fast instead.
+
+        The breaker keeps the outcome of the last `window` calls. While closed, when at least
+        `min_calls` outcomes are known and the share of failures (calls raising `exception`)
+        reaches `failure_rate`, the breaker opens: calls raise `CircuitOpenError` without running
+        the function. After `reset_timeout` seconds it becomes half-open and lets `half_open_calls`
+        trial calls through; a failed trial opens it again, a successful one closes it.
+        Exceptions that do not match `exception` are re-raised but count as successes. Calls interrupted
+        by a `BaseException` that is not an `Exception` (e.g. `asyncio.CancelledError`, `KeyboardInterrupt`)
+        are not recorded, and an interrupted trial call opens the breaker again.
+
+        The state is shared by every call of the decorated function (and of every function decorated
+        by the same instance) and is guarded by a lock, so the breaker can be used across threads.
+
+        Example:
+            @circuitbreaker(ConnectionError, failure_rate=0.5, window=10, reset_timeout=5.0)
+            def query(sql): ...
+
+            query.breaker.state  # "closed", "open" or "half_open"
+
+        Args:
+            exception: The exception type(s) counted as failures.
+            failure_rate: Share of failures in the window that opens the breaker, in (0, 1].
+            window: Number of recent calls considered.
+            min_calls: Minimum number of calls in the window before the breaker can open.
+            reset_timeout: Seconds the breaker stays open before allowing trial calls.
+            half_open_calls: Number of concurrent trial calls allowed while half-open.
+
+        Raises:
+            ValueError: If a parameter is out of range.
+        """
+        if not 0 < failure_rate <= 1:
+            raise ValueError(f"[{MODULE}.circuitbreaker] failure_rate must be in (0, 1].")
+        if not isinstance(window, int) or window < 1 or not isinstance(min_calls, int) or not 1 <= min_calls <= window:
+            raise ValueError(f"[{MODULE}.circuitbreaker] window must be a positive integer and min_calls between 1 and window.")
+        if not reset_timeout > 0 or not isinstance(half_open_calls, int) or half_open_calls < 1:
+            raise ValueError(f"[{MODULE}.circuitbreaker] reset_timeout and half_open_calls must be positive.")
+        self.exception = exception
+        self.failure_rate = failure_rate
+        self.window = window
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+        self.half_open_calls = half_open_calls
+        self.__lock = threading.Lock()
+        self.__outcomes: deque[bool] = deque()
+        self.__failures = 0
+        self.__state = CLOSED
+        self.__opened_at = 0.0
+        self.__trials = 0
+
+    @property
+    def state(self) -> str:
+        """
+        The current state, "closed", "open" or "half_open", an open breaker past its timeout reads as half-open.
+        """
+        with self.__lock:
+            if self.__state == OPEN and time.monotonic() >= self.__opened_at + self.reset_timeout:
+                return HALF_OPEN
+            return self.__state
+
+    def reset(self) -> None:
+        """
+        Close the breaker and forget the recorded outcomes.
+        """
+        with self.__lock:
+            self.__close()
+
+    def __close(self):
+        self.__state = CLOSED
+        self.__outcomes.clear()
+        self.__failures = 0
+        self.__trials = 0
+
+    def __open(self):
+        self.__state = OPEN
+        self.__opened_at = time.monotonic()
+        self.__trials = 0
+
+    def _before(self, qualname: str) -> None:
+        with self.__lock:
+            if self.__state == OPEN:
+                if time.monotonic() < self.__opened_at + self.reset_timeout:
+                    raise CircuitOpenError(f"[{MODULE}.circuitbreaker] circuit of {qualname} is open.")
+                self.__state = HALF_OPEN
+            if self.__state == HALF_OPEN:
+                if self.__trials >= self.half_open_calls:
+                    raise CircuitOpenError(f"[{MODULE}.circuitbreaker] circuit of {qualname} is half-open, trial call in progress.")
+                self.__trials += 1
+
+    def _record(self, failed: bool) -> None:
+        with self.__lock:
+            if self.__state == HALF_OPEN:
+                self.__open() if failed else self.__close()
+                return
+            if self.__state == OPEN:
+                # a call started before the breaker opened
+                return
+            self.__outcomes.append(failed)
+            self.__failures += failed
+            if len(self.__outcomes) > self.window:
+                self.__failures -= self.__outcomes.popleft()
+            if len(self.__outcomes) >= self.min_calls and self.__failures >= self.failure_rate * len(self.__outcomes):
+                self.__open()
+
+    def _abandon(self) -> None:
+        # a call interrupted by a BaseException (cancellation, KeyboardInterrupt) tells nothing about
+        # the function: it is not recorded, and an interrupted trial reopens the breaker
+        with self.__lock:
+            if self.__state == HALF_OPEN:
+                self.__open()
+
+    def __call__(self, func: Callable) -> Callable:
+        kind = _check_kind(func, "circuitbreaker")
+        qualname = getattr(func, '__qualname__', repr(func))
+        before, record, abandon, exception = self._before, self._record, self._abandon, self.exception
+
+        if kind == COROUTINE:
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                before(qualname)
+                try:
+                    result = await func(*args, **kwargs)
+                except exception:
+                    record(True)
+                    raise
+                except Exception:
+                    record(False)
+                    raise
+                except BaseException:
+                    abandon()
+                    raise
+                record(False)
+                return result
+        else:
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                before(qualname)
+                try:
+                    result = func(*args, **kwargs)
+                except exception:
+                    record(True)
+                    raise
+                except Exception:
+                    record(False)
+                    raise
+                except BaseException:
+                    abandon()
+                    raise
+                record(False)
+                return result
+
+        wrapper = instrumented(wrapper, "circuitbreaker")
+        wrapper.breaker = self
+        return wrapper
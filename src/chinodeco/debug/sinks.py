@@ -0,0 +1,307 @@
+# !/usr/bin/env Python3
+# -*- coding:utf-8 -*-
+
+MODULE = "chinodeco.debug.sinks"
+
+import asyncio
+import atexit
+import logging
+import sys
+import threading
+import time
+import weakref
+from collections import deque, namedtuple
+from typing import (
+    Callable,
+    TextIO,
+    Any
+)
+
+DebugRecord = namedtuple("DebugRecord", ["qualname", "module", "exc_type", "message", "timestamp", "traceback", "verbose", "location", "count"], defaults = (None, 1))
+DebugRecord.__doc__ = """
+A swallowed exception reported by `debug`.
+
+Fields:
+    qualname: Qualified name of the decorated callable.
+    module: Module of the decorated callable.
+    exc_type: Name of the exception type.
+    message: `str()` of the exception.
+    timestamp: `time.time()` when the exception was caught.
+    traceback: The formatted traceback, or None if not requested.
+    verbose: Whether the record should be written with its origin.
+    location: "filename:lineno" of the innermost frame of the traceback.
+    count: Number of occurrences the record stands for, more than 1 for `AggregatingSink` summaries.
+"""
+
+FailureStat = namedtuple("FailureStat", ["qualname", "exc_type", "location", "count", "last_message", "last_seen"])
+
+def format_record(record: DebugRecord) -> str:
+    """
+    Format a record the way `debug` used to print it, followed by its traceback if any.
+    """
+    text = f"[{record.module}.{record.qualname}] {record.message}" if record.verbose else f"{record.message}"
+    if record.count > 1:
+        text = f"{text} (repeated {record.count} times)"
+    return f"{text}\n{record.traceback.rstrip()}" if record.traceback else text
+
+class RingBufferSink:
+    def __init__(self, capacity: int = 1024, *, file: TextIO | None = None, logger: logging.Logger | str | None = None, interval: float = 0.05, thread: bool = True):
+        """
+        A bounded buffer of `DebugRecord`s, drained in the background to a file or a logger.
+
+        Emitting never blocks nor takes a lock: records are appended to a deque, and records
+        arriving while the buffer is full are dropped and counted in the `dropped` attribute.
+        The buffer is drained every `interval` seconds by a daemon thread started on first use,
+        or by `run_async()` scheduled as an asyncio task when `thread` is False.
+        Call `flush()` to drain synchronously, it also runs at interpreter exit for the default sink.
+
+        Args:
+            capacity: Maximum number of pending records.
+            file: Text stream to write to, `sys.stdout` at write time by default.
+            logger: Logger (or logger name) to write to with `logger.error`, instead of `file`.
+            interval: Seconds between two drains.
+            thread: Whether to drain from a background thread.
+
+        Raises:
+            ValueError: If `capacity` is not a positive integer or `interval` is not positive.
+        """
+        if not isinstance(capacity, int) or capacity < 1:
+            raise ValueError(f"[{MODULE}.RingBufferSink] capacity must be a positive integer.")
+        if not interval > 0:
+            raise ValueError(f"[{MODULE}.RingBufferSink] interval must be positive.")
+        self.capacity = capacity
+        self.file = file
+        self.logger = logging.getLogger(logger) if isinstance(logger, str) else logger
+        self.interval = interval
+        self.__buffer = deque()
+        self.dropped = 0
+        self.__use_thread = thread
+        self.__thread: threading.Thread | None = None
+        self.__flush_lock = threading.Lock()
+
+    def __call__(self, record: DebugRecord) -> None:
+        if len(self.__buffer) >= self.capacity:
+            self.dropped += 1  # not locked, may undercount under heavy contention
+            return
+        self.__buffer.append(record)
+        if self.__use_thread and self.__thread is None:
+            self.__start_thread()
+
+    def __len__(self):
+        return len(self.__buffer)
+
+    def __start_thread(self):
+        with self.__flush_lock:
+            if self.__thread is None:
+                self.__thread = threading.Thread(target = self.__run, name = f"{MODULE}.RingBufferSink", daemon = True)
+                self.__thread.start()
+
+    def __run(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+    async def run_async(self) -> None:
+        """
+        Drain the buffer every `interval` seconds until cancelled, to be scheduled with `asyncio.create_task`.
+        """
+        try:
+            while True:
+                await asyncio.sleep(self.interval)
+                self.flush()
+        finally:
+            self.flush()
+
+    def drain(self) -> list[DebugRecord]:
+        """
+        Remove and return the pending records without writing them.
+        """
+        records = []
+        popleft = self.__buffer.popleft
+        try:
+            while True:
+                records.append(popleft())
+        except IndexError:
+            return records
+
+    def flush(self) -> None:
+        """
+        Write all pending records.
+        """
+        with self.__flush_lock:
+            records = self.drain()
+            if not records:
+                return
+            if self.logger is not None:
+                for record in records:
+                    self.logger.error(format_record(record), extra = {"chino_record": record})
+            else:
+                file = self.file or sys.stdout
+                file.write("".join(f"{format_record(record)}\n" for record in records))
+                file.flush()
+
+class AggregatingSink:
+    def __init__(self, target: Callable[[DebugRecord], Any] | None = None, *, window: float = 1.0):
+        """
+        A sink rate limiting repeated exceptions before forwarding them to `target`.
+
+        Records are fingerprinted by (qualname, exception type, code location). The first record of
+        a fingerprint in a `window` is forwarded at once, the following ones are only counted and
+        forwarded as one summary record (with `count` set) when the window is over, by a daemon timer
+        armed while a window holds suppressed records, or earlier on the next record or on `flush()`.
+        `flush()` runs at interpreter exit, so the summaries of the last windows are not lost.
+        Every occurrence is counted in an in-memory table queried with `top()`.
+
+        Example:
+            setdebugsink(AggregatingSink(getdebugsink(), window=5.0))
+
+        Args:
+            target: Sink receiving the forwarded records, the global sink at the time of creation if None.
+            window: Length of an aggregation window in seconds.
+
+        Raises:
+            ValueError: If `window` is not positive.
+        """
+        if not window > 0:
+            raise ValueError(f"[{MODULE}.AggregatingSink] window must be positive.")
+        self.target = target if target is not None else _DEBUG_SINK
+        self.window = window
+        # fingerprint -> [total, window end, suppressed in window, last record]
+        self.__table: dict[tuple, list] = {}
+        self.__pending: deque[tuple[float, tuple]] = deque()
+        self.__lock = threading.Lock()
+        # timer forwarding the summaries of the windows holding suppressed records, and its deadline
+        self.__timer: threading.Timer | None = None
+        self.__timer_at = 0.0
+        _AGGREGATING_SINKS.add(self)
+
+    def __call__(self, record: DebugRecord) -> None:
+        now = time.monotonic()
+        fingerprint = (record.qualname, record.exc_type, record.location)
+        forward = self.__close_windows(now)
+        with self.__lock:
+            entry = self.__table.get(fingerprint)
+            if entry is None:
+                entry = self.__table[fingerprint] = [0, 0.0, 0, record]
+            entry[0] += record.count
+            entry[3] = record
+            if now < entry[1]:
+                entry[2] += record.count
+                if self.__timer is None or entry[1] < self.__timer_at:
+                    self.__arm(entry[1], now)
+            else:
+                entry[1] = now + self.window
+                self.__pending.append((entry[1], fingerprint))
+                forward.append(record)
+        for item in forward:
+            self.target(item)
+
+    def __close_windows(self, now: float, force: bool = False) -> list[DebugRecord]:
+        # summaries of the windows that are over, in the order they were opened
+        summaries = []
+        with self.__lock:
+            while self.__pending and (force or self.__pending[0][0] <= now):
+                end, fingerprint = self.__pending.popleft()
+                entry = self.__table[fingerprint]
+                if entry[1] != end:
+                    continue
+                if force:
+                    entry[1] = 0.0
+                if entry[2]:
+                    summaries.append(entry[3]._replace(count = entry[2]))
+                    entry[2] = 0
+        return summaries
+
+    def __arm(self, at: float, now: float) -> None:
+        # called with the lock held
+        if self.__timer is not None:
+            self.__timer.cancel()
+        self.__timer = threading.Timer(max(0.0, at - now), self.__expire)
+        self.__timer.daemon = True
+        self.__timer_at = at
+        self.__timer.start()
+
+    def __expire(self) -> None:
+        now = time.monotonic()
+        with self.__lock:
+            self.__timer = None
+        for summary in self.__close_windows(now):
+            self.target(summary)
+        with self.__lock:
+            if self.__timer is not None:
+                return
+            for end, fingerprint in self.__pending:
+                entry = self.__table[fingerprint]
+                if entry[1] == end and entry[2]:
+                    self.__arm(end, now)
+                    return
+
+    def flush(self) -> None:
+        """
+        Forward the summaries of all open windows, then flush `target` if it can be flushed.
+        """
+        for summary in self.__close_windows(time.monotonic(), force = True):
+            self.target(summary)
+        if callable(getattr(self.target, "flush", None)):
+            self.target.flush()
+
+    def top(self, n: int | None = 10) -> list[FailureStat]:
+        """
+        Return the `n` most frequent failing call sites (all of them if `n` is None), most frequent first.
+        """
+        with self.__lock:
+            stats = [
+                FailureStat(qualname, exc_type, location, total, record.message, record.timestamp)
+                for (qualname, exc_type, location), (total, _, _, record) in self.__table.items()
+            ]
+        stats.sort(key = lambda stat: stat.count, reverse = True)
+        return stats if n is None else stats[:n]
+
+    def reset(self) -> None:
+        """
+        Clear the failure table and the open windows, without forwarding their summaries.
+        """
+        with self.__lock:
+            self.__table.clear()
+            self.__pending.clear()
+            if self.__timer is not None:
+                self.__timer.cancel()
+                self.__timer = None
+
+_DEFAULT_SINK = RingBufferSink()
+_DEBUG_SINK: Callable[[DebugRecord], Any] = _DEFAULT_SINK
+atexit.register(_DEFAULT_SINK.flush)
+
+# live aggregating sinks, flushed at exit before the default sink (atexit runs the last registered first)
+_AGGREGATING_SINKS: weakref.WeakSet[AggregatingSink] = weakref.WeakSet()
+
+def _flush_aggregating_sinks() -> None:
+    for sink in list(_AGGREGATING_SINKS):
+        sink.flush()
+
+atexit.register(_flush_aggregating_sinks)
+
+def getdebugsink() -> Callable[[DebugRecord], Any]:
+    """
+    Return the sink used by `debug` when none is given to the decorator.
+    """
+    return _DEBUG_SINK
+
+def setdebugsink(sink: Callable[[DebugRecord], Any] | None) -> Callable[[DebugRecord], Any]:
+    """
+    Replace the sink used by `debug` when none is given to the decorator.
+
+    A sink is any callable taking a `DebugRecord`, it must be cheap and must not raise.
+    The sink is looked up on each report, so wrappers created before the change use the new sink.
+
+    Args:
+        sink: The new sink, None to restore the default `RingBufferSink` writing to stdout.
+
+    Returns:
+        The previous sink.
+    """
+    global _DEBUG_SINK
+    if sink is not None and not callable(sink):
+        raise TypeError(f"[{MODULE}.setdebugsink] sink must be callable, but got {type(sink).__name__}")
+    previous, _DEBUG_SINK = _DEBUG_SINK, (sink if sink is not None else _DEFAULT_SINK)
+    return previous
@@ -0,0 +1,217 @@
+# !/usr/bin/env Python3
+# -*- coding:utf-8 -*-
+
+MODULE = "chinodeco.debug.tracing"
+
+import atexit
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import (
+    Callable,
+    Iterator,
+    TextIO,
+    Any
+)
+
+from .. import _kinds
+
+class Span:
+    __slots__ = ("name", "layer", "span_id", "parent_id", "start", "end", "thread_id", "error")
+
+    def __init__(self, name: str, layer: str, span_id: int, parent_id: int | None):
+        """
+        A timed execution of one chinodeco wrapper.
+
+        Attributes:
+            name: Qualified name of the wrapped callable (or of the dispatched command).
+            layer: Kind of decorator that built the wrapper, e.g. "debug", "mapargs" or "decochain".
+            span_id: Identifier unique in the process.
+            parent_id: `span_id` of the enclosing span in the current context, None for a root span.
+            start, end: `time.perf_counter_ns()` at the start and the end of the execution.
+            thread_id: Identifier of the thread the span started on.
+            error: Name of the exception type the execution ended with, None on success.
+        """
+        self.name = name
+        self.layer = layer
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.start = time.perf_counter_ns()
+        self.end: int | None = None
+        self.thread_id = threading.get_ident()
+        self.error: str | None = None
+
+    def as_dict(self) -> dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f"Span({self.name!r}, layer={self.layer!r}, span_id={self.span_id}, parent_id={self.parent_id})"
+
+_CURRENT_SPAN: contextvars.ContextVar[Span | None] = contextvars.ContextVar(f"{MODULE}.current", default = None)
+_SPAN_IDS = itertools.count(1)
+_EXPORTER: Callable[[Span], Any] | None = None
+
+def currentspan() -> Span | None:
+    """
+    Return the innermost open span of the current context, None outside of any traced call.
+    """
+    return _CURRENT_SPAN.get()
+
+def _open(name: str, layer: str) -> list:
+    parent = _CURRENT_SPAN.get()
+    span = Span(name, layer, next(_SPAN_IDS), parent.span_id if parent is not None else None)
+    return [span, _CURRENT_SPAN.set(span)]
+
+def _suspend(opened: list) -> None:
+    # a generator suspended at `yield` leaves the span of its caller current
+    try:
+        _CURRENT_SPAN.reset(opened[1])
+    except ValueError:
+        # generators may be driven from another context than the one they started in
+        pass
+
+def _resume(opened: list) -> None:
+    opened[1] = _CURRENT_SPAN.set(opened[0])
+
+def _close(opened: list, error: BaseException | None) -> None:
+    span = opened[0]
+    span.end = time.perf_counter_ns()
+    if error is not None:
+        span.error = type(error).__name__
+    _suspend(opened)
+    exporter = _EXPORTER
+    if exporter is not None:
+        exporter(span)
+
+def _instrument(layer: str, name: str):
+    return (lambda: _open(name, layer)), _close, _resume, _suspend
+
+@contextmanager
+def span(name: str, layer: str = "user") -> Iterator[Span | None]:
+    """
+    Open a span around a block, nested in the current span. Does nothing while tracing is disabled.
+    """
+    if _EXPORTER is None:
+        yield None
+        return
+    opened = _open(name, layer)
+    try:
+        yield opened[0]
+    except BaseException as e:
+        _close(opened, e)
+        raise
+    _close(opened, None)
+
+def bindcontext(func: Callable) -> Callable:
+    """
+    Bind `func` to a copy of the current context, so that spans opened in an executor thread
+    nest under the span of the submitting call:
+
+        loop.run_in_executor(None, bindcontext(work))
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return context.run(func, *args, **kwargs)
+    return run
+
+def enabletracing(exporter: Callable[[Span], Any]) -> None:
+    """
+    Start tracing: wrappers built by chinodeco from now on open a span per execution,
+    which is passed to `exporter` when it ends.
+
+    Tracing is decided when a wrapper is built, so wrappers created while tracing is disabled
+    never pay for it; enable it before importing the decorated modules, or by setting the
+    `CHINODECO_TRACE` environment variable to a file path (".json" for the Chrome trace format,
+    JSON lines otherwise). Spans are kept in a `contextvars` context, so they nest across
+    awaits and tasks; use `bindcontext` for functions submitted to thread pools.
+
+    Args:
+        exporter: Callable receiving every finished `Span`, e.g. `JSONLExporter` or `ChromeTraceExporter`.
+    """
+    global _EXPORTER
+    if not callable(exporter):
+        raise TypeError(f"[{MODULE}.enabletracing] exporter must be callable, but got {type(exporter).__name__}")
+    _EXPORTER = exporter
+    if _instrument not in _kinds._INSTRUMENTS:
+        _kinds._INSTRUMENTS.append(_instrument)
+
+def disabletracing() -> Callable[[Span], Any] | None:
+    """
+    Stop tracing for wrappers built from now on, and stop exporting the spans of existing ones.
+
+    Returns:
+        The exporter that was in use, None if tracing was not enabled.
+    """
+    global _EXPORTER
+    previous, _EXPORTER = _EXPORTER, None
+    if _instrument in _kinds._INSTRUMENTS:
+        _kinds._INSTRUMENTS.remove(_instrument)
+    return previous
+
+class JSONLExporter:
+    def __init__(self, file: str | os.PathLike | TextIO):
+        """
+        Write every span as one JSON object per line.
+
+        Args:
+            file: Path of the file to write, or an open text stream.
+        """
+        self.__owned = isinstance(file, (str, os.PathLike))
+        self.file = open(file, "w", encoding = "utf-8") if self.__owned else file
+        self.__lock = threading.Lock()
+
+    def __call__(self, span: Span) -> None:
+        line = json.dumps(span.as_dict())
+        with self.__lock:
+            self.file.write(line + "\n")
+
+    def close(self) -> None:
+        with self.__lock:
+            self.file.flush()
+            if self.__owned:
+                self.file.close()
+
+class ChromeTraceExporter:
+    def __init__(self, file: str | os.PathLike | TextIO):
+        """
+        Collect spans and write them in the Chrome trace event format on `close()`,
+        to be opened with chrome://tracing or Perfetto.
+
+        Args:
+            file: Path of the file to write, or an open text stream.
+        """
+        self.file = file
+        self.events: list[dict[str, Any]] = []
+        self.__lock = threading.Lock()
+        self.__pid = os.getpid()
+
+    def __call__(self, span: Span) -> None:
+        event = {
+            "name": span.name, "cat": span.layer, "ph": "X",
+            "ts": span.start / 1000, "dur": (span.end - span.start) / 1000,
+            "pid": self.__pid, "tid": span.thread_id,
+            "args": {"span_id": span.span_id, "parent_id": span.parent_id, "error": span.error},
+        }
+        with self.__lock:
+            self.events.append(event)
+
+    def close(self) -> None:
+        with self.__lock:
+            document = json.dumps({"traceEvents": self.events, "displayTimeUnit": "ms"})
+        if isinstance(self.file, (str, os.PathLike)):
+            with open(self.file, "w", encoding = "utf-8") as file:
+                file.write(document)
+        else:
+            self.file.write(document)
+            self.file.flush()
+
+if os.environ.get("CHINODECO_TRACE"):
+    _path = os.environ["CHINODECO_TRACE"]
+    _exporter = ChromeTraceExporter(_path) if _path.endswith(".json") else JSONLExporter(_path)
+    enabletracing(_exporter)
+    atexit.register(_exporter.close)
@@ -1,14 +1,20 @@
 # !/usr/bin/env Python3
 # -*- coding:utf-8 -*-
 
-__all__ = ["when", "whileloop", "foreach", "CommandDispatcher"]
+__all__ = ["when", "whileloop", "asyncwhileloop", "foreach", "microbatch", "BatchInfo", "CommandDispatcher"]
 
 from .control import (
     when,
     whileloop,
+    asyncwhileloop,
     foreach
 )
 
+from .batching import (
+    microbatch,
+    BatchInfo
+)
+
 from .registry import (
     CommandDispatcher
 )
\ No newline at end of file
@@ -0,0 +1,131 @@
+# !/usr/bin/env Python3
+# -*- coding:utf-8 -*-
+
+MODULE = "chinodeco.decodsl._process"
+
+import importlib
+import math
+import pickle
+from collections import namedtuple
+from concurrent.futures import Executor, FIRST_EXCEPTION, as_completed, wait
+from typing import (
+    Callable,
+    Iterable,
+    Any
+)
+
+# a function that cannot be pickled by value is sent as the path of the foreach wrapper
+# replacing it in its module, and found back in the worker through `__chino_foreach_body`
+_BodyRef = namedtuple("_BodyRef", ["module", "qualname"])
+
+# a numpy array copied once into shared memory, workers attach to it by name
+_SharedSpec = namedtuple("_SharedSpec", ["name", "shape", "dtype"])
+
+def _body_of(func: Callable) -> Callable | _BodyRef:
+    try:
+        pickle.dumps(func)
+        return func
+    except (pickle.PicklingError, AttributeError, TypeError):
+        return _BodyRef(func.__module__, func.__qualname__)
+
+def _resolve(body: Callable | _BodyRef) -> Callable:
+    if not isinstance(body, _BodyRef):
+        return body
+    target = importlib.import_module(body.module)
+    for part in body.qualname.split("."):
+        target = getattr(target, part)
+    while not hasattr(target, "__chino_foreach_body"):
+        target = target.__wrapped__
+    return getattr(target, "__chino_foreach_body")
+
+def _call_item(target: Callable, item: bool | str, value: Any, args: tuple, kwargs: dict) -> Any:
+    if item is True:
+        return target(value, *args, **kwargs)
+    elif item:
+        return target(*args, **{**kwargs, item: value})
+    return target(*args, **kwargs)
+
+def _run_chunk(body, loop_wrapper, item, values, args, kwargs) -> list:
+    func = _resolve(body)
+    target = loop_wrapper(func) if callable(loop_wrapper) else func
+    return [_call_item(target, item, value, args, kwargs) for value in values]
+
+def _run_shared_chunk(body, loop_wrapper, item, spec: _SharedSpec, start: int, stop: int, args, kwargs) -> list:
+    import numpy
+    from multiprocessing import shared_memory
+
+    shm = shared_memory.SharedMemory(name = spec.name)
+    try:
+        array = numpy.ndarray(spec.shape, dtype = numpy.dtype(spec.dtype), buffer = shm.buf)
+        results = _run_chunk(body, loop_wrapper, item, array[start:stop], args, kwargs)
+        # results referencing the shared buffer must be copied before it is closed
+        results = [numpy.array(result) if isinstance(result, numpy.ndarray) and result.base is not None else result for result in results]
+        del array
+        return results
+    finally:
+        try:
+            shm.close()
+        except BufferError:
+            # the body kept a view of the buffer alive, the mapping is released with it
+            pass
+
+def _is_ndarray(value: Any) -> bool:
+    return type(value).__module__ == "numpy" and type(value).__name__ == "ndarray"
+
+def chunk_size(count: int, workers: int) -> int:
+    """
+    Chunk size splitting `count` elements into about four chunks per worker, like `multiprocessing.Pool.map`.
+    """
+    return max(1, math.ceil(count / (workers * 4)))
+
+def run_in_processes(
+    func: Callable,
+    loop_wrapper: Callable | None,
+    item: bool | str,
+    values: Iterable,
+    args: tuple,
+    kwargs: dict,
+    *,
+    executor: Executor,
+    workers: int,
+    chunksize: int | None,
+    ordered: bool
+) -> list:
+    body = _body_of(func)
+    shm = None
+    futures = []
+    if _is_ndarray(values) and values.ndim > 0 and values.dtype.hasobject is False:
+        from multiprocessing import shared_memory
+        import numpy
+
+        count = len(values)
+        shm = shared_memory.SharedMemory(create = True, size = max(values.nbytes, 1))
+        numpy.ndarray(values.shape, dtype = values.dtype, buffer = shm.buf)[...] = values
+        spec = _SharedSpec(shm.name, values.shape, values.dtype.str)
+        make_task = lambda start, stop: executor.submit(_run_shared_chunk, body, loop_wrapper, item, spec, start, stop, args, kwargs)
+    else:
+        values = values if isinstance(values, (list, tuple)) else list(values)
+        count = len(values)
+        make_task = lambda start, stop: executor.submit(_run_chunk, body, loop_wrapper, item, values[start:stop], args, kwargs)
+
+    try:
+        size = chunksize or chunk_size(count, workers)
+        futures = [make_task(start, min(start + size, count)) for start in range(0, count, size)]
+        try:
+            if ordered:
+                done, _ = wait(futures, return_when = FIRST_EXCEPTION)
+                for future in futures:
+                    if future in done and future.exception() is not None:
+                        raise future.exception()
+                return [result for future in futures for result in future.result()]
+            return [result for future in as_completed(futures) for result in future.result()]
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+    finally:
+        if shm is not None:
+            # wait for the running chunks before releasing the shared memory
+            wait(futures)
+            shm.close()
+            shm.unlink()
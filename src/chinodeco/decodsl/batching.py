@@ -0,0 +1,332 @@
+# !/usr/bin/env Python3
+# -*- coding:utf-8 -*-
+
+MODULE = "chinodeco.decodsl.batching"
+
+import asyncio
+import threading
+import weakref
+from collections import Counter, namedtuple
+from collections.abc import Mapping
+from concurrent.futures import Future, wait
+from functools import wraps
+from typing import (
+    Callable,
+    Iterable,
+    Any
+)
+
+from .._kinds import kind_of, instrumented, SYNC, COROUTINE
+from ..debug.debugger import _debug_when
+from ..pretreat.caching import _make_key, _UNHASHABLE
+
+BatchInfo = namedtuple("BatchInfo", ["calls", "batches", "keys", "deduplicated", "full", "maxsize", "sizes"])
+
+class _Batch:
+    __slots__ = ("keys", "futures", "slots", "handle", "__weakref__")
+
+    def __init__(self):
+        self.keys: list = []
+        # one future per unique key, in the order of `keys`
+        self.futures: list = []
+        # deduplication key -> future
+        self.slots: dict = {}
+        # timer flushing the batch of an event loop
+        self.handle: asyncio.TimerHandle | None = None
+
+class _Batcher:
+    def __init__(self, batch_fn: Callable, max_size: int, max_delay: float, dedupe: bool):
+        self.batch_fn = batch_fn
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self.dedupe = dedupe
+        self.qualname = getattr(batch_fn, "__qualname__", repr(batch_fn))
+        self.__lock = threading.Lock()
+        # pending batch of sync callers, and of async callers per event loop
+        self.__pending: _Batch | None = None
+        # both weakly referenced: the pending batch of a loop is kept alive by its timer, scheduled on the
+        # loop, so that a batch that never flushes does not keep its closed loop alive
+        self.__loops: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, weakref.ref[_Batch]] = weakref.WeakKeyDictionary()
+        self.__tasks: set[asyncio.Task] = set()
+        self.__calls = self.__batches = self.__keys = self.__deduplicated = self.__full = 0
+        self.__sizes: Counter[int] = Counter()
+
+    def batch_info(self) -> BatchInfo:
+        with self.__lock:
+            return BatchInfo(
+                self.__calls, self.__batches, self.__keys, self.__deduplicated, self.__full,
+                self.max_size, dict(sorted(self.__sizes.items()))
+            )
+
+    def batch_info_clear(self) -> None:
+        with self.__lock:
+            self.__calls = self.__batches = self.__keys = self.__deduplicated = self.__full = 0
+            self.__sizes.clear()
+
+    # the methods below expecting the lock are only called while holding it
+
+    def __add(self, batch: _Batch, key: Any, make_future: Callable[[], Any]):
+        self.__calls += 1
+        slot = _make_key(key) if self.dedupe else _UNHASHABLE
+        if slot is not _UNHASHABLE:
+            future = batch.slots.get(slot)
+            if future is not None:
+                self.__deduplicated += 1
+                return future
+            future = batch.slots[slot] = make_future()
+        else:
+            future = make_future()
+        batch.keys.append(key)
+        batch.futures.append(future)
+        return future
+
+    def __count(self, batch: _Batch, full: bool) -> None:
+        self.__batches += 1
+        self.__keys += len(batch.keys)
+        self.__full += full
+        self.__sizes[len(batch.keys)] += 1
+
+    def __deliver(self, batch: _Batch, results: Any) -> None:
+        keys, futures = batch.keys, batch.futures
+        if isinstance(results, Mapping):
+            values = []
+            for key in keys:
+                try:
+                    values.append(results[key])
+                except KeyError:
+                    values.append(KeyError(f"[{MODULE}.microbatch] {self.qualname} returned no result for key {key!r}."))
+                except TypeError as e:
+                    values.append(e)
+        else:
+            values = list(results)
+            if len(values) != len(keys):
+                error = ValueError(f"[{MODULE}.microbatch] {self.qualname} returned {len(values)} results for {len(keys)} keys.")
+                values = [error] * len(keys)
+        for future, value in zip(futures, values):
+            if future.done():
+                continue
+            if isinstance(value, BaseException):
+                future.set_exception(value)
+            else:
+                future.set_result(value)
+
+    def __fail(self, batch: _Batch, error: BaseException) -> None:
+        for future in batch.futures:
+            if not future.done():
+                future.set_exception(error)
+
+    # sync callers: the caller opening a batch waits `max_delay` for others to join, then flushes it,
+    # unless the caller filling it flushed it first
+
+    def __run(self, batch: _Batch) -> None:
+        try:
+            results = self.batch_fn(batch.keys)
+        except BaseException as e:
+            self.__fail(batch, e)
+            return
+        self.__deliver(batch, results)
+
+    def call(self, key: Any) -> Any:
+        with self.__lock:
+            batch = self.__pending
+            leader = batch is None
+            if leader:
+                batch = self.__pending = _Batch()
+            future = self.__add(batch, key, Future)
+            full = len(batch.keys) >= self.max_size
+            if full:
+                self.__pending = None
+                self.__count(batch, True)
+        if full:
+            self.__run(batch)
+        elif leader:
+            if self.max_delay > 0:
+                wait((future,), timeout = self.max_delay)
+            with self.__lock:
+                mine = self.__pending is batch
+                if mine:
+                    self.__pending = None
+                    self.__count(batch, False)
+            if mine:
+                self.__run(batch)
+        return future.result()
+
+    def callmany(self, keys: Iterable) -> list:
+        ready = []
+        futures = []
+        with self.__lock:
+            for key in keys:
+                if self.__pending is None:
+                    self.__pending = _Batch()
+                batch = self.__pending
+                futures.append(self.__add(batch, key, Future))
+                if len(batch.keys) >= self.max_size:
+                    self.__pending = None
+                    self.__count(batch, True)
+                    ready.append(batch)
+            # the caller already brings a batch, the rest is flushed without waiting
+            if self.__pending is not None:
+                self.__count(self.__pending, False)
+                ready.append(self.__pending)
+                self.__pending = None
+        for batch in ready:
+            self.__run(batch)
+        return [future.result() for future in futures]
+
+    # async callers: a batch per event loop, flushed by a timer or by the caller filling it,
+    # in a task so that a cancelled caller does not cancel the batch of the others
+
+    async def __arun(self, batch: _Batch) -> None:
+        try:
+            results = await self.batch_fn(batch.keys)
+        except BaseException as e:
+            self.__fail(batch, e)
+            if not isinstance(e, Exception):
+                raise
+            return
+        self.__deliver(batch, results)
+
+    def __spawn(self, loop: asyncio.AbstractEventLoop, batch: _Batch) -> None:
+        task = loop.create_task(self.__arun(batch))
+        self.__tasks.add(task)
+        task.add_done_callback(self.__tasks.discard)
+
+    def __expire(self, loop: asyncio.AbstractEventLoop, batch: _Batch) -> None:
+        with self.__lock:
+            ref = self.__loops.get(loop)
+            if ref is None or ref() is not batch:
+                return
+            del self.__loops[loop]
+            self.__count(batch, False)
+        self.__spawn(loop, batch)
+
+    def __aadd(self, loop: asyncio.AbstractEventLoop, key: Any) -> tuple[asyncio.Future, _Batch | None]:
+        ref = self.__loops.get(loop)
+        batch = ref() if ref is not None else None
+        if batch is None:
+            batch = _Batch()
+            batch.handle = loop.call_later(self.max_delay, self.__expire, loop, batch)
+            self.__loops[loop] = weakref.ref(batch)
+        future = self.__add(batch, key, loop.create_future)
+        if len(batch.keys) < self.max_size:
+            return future, None
+        del self.__loops[loop]
+        batch.handle.cancel()
+        self.__count(batch, True)
+        return future, batch
+
+    async def acall(self, key: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        with self.__lock:
+            future, ready = self.__aadd(loop, key)
+        if ready is not None:
+            self.__spawn(loop, ready)
+        return await asyncio.shield(future)
+
+    async def acallmany(self, keys: Iterable) -> list:
+        loop = asyncio.get_running_loop()
+        ready = []
+        futures = []
+        with self.__lock:
+            for key in keys:
+                future, full = self.__aadd(loop, key)
+                futures.append(future)
+                if full is not None:
+                    ready.append(full)
+            ref = self.__loops.pop(loop, None)
+            batch = ref() if ref is not None else None
+            if batch is not None:
+                batch.handle.cancel()
+                self.__count(batch, False)
+                ready.append(batch)
+        for batch in ready:
+            self.__spawn(loop, batch)
+        return [await asyncio.shield(future) for future in futures]
+
+@_debug_when
+def microbatch(
+    batch_fn: Callable | None = None,
+    *,
+    max_size: int = 100,
+    max_delay: float = 0.005,
+    dedupe: bool = True
+):
+    """
+    Turn a batch function `batch_fn(keys)` into a single-key function whose calls are coalesced into batches.
+
+    Calls are queued and `batch_fn` is called once with the list of queued keys when `max_size`
+    keys are queued or `max_delay` seconds after the first one, whichever comes first (like DataLoader).
+    `batch_fn` returns either a sequence of results in the order of the keys, or a mapping of key to
+    result; each caller receives the result of its own key. A result that is an exception instance
+    is raised to the caller of that key only, an exception raised by `batch_fn` is raised to every
+    caller of the batch. With `dedupe`, identical keys queued in the same batch are sent once and
+    share their result; keys are compared like `memoize` arguments, so lists and dicts are accepted.
+
+    For coroutine functions, the calls made on an event loop are batched together and awaited:
+    with `max_delay=0`, every call made before the loop runs the next callbacks joins the batch.
+    For sync functions, the calls of concurrent threads are batched together: the thread opening a
+    batch waits up to `max_delay` for others to join (the thread filling it flushes it at once),
+    so a sync caller alone on its thread pays `max_delay` per call; use `callmany` there.
+
+    Example:
+        @microbatch(max_size=200, max_delay=0.002)
+        async def get_user(ids):
+            rows = await db.fetch("SELECT * FROM users WHERE id = ANY($1)", ids)
+            return {row["id"]: row for row in rows}
+
+        user = await get_user(42)
+
+    The decorated function exposes:
+        - `callmany(keys)`: queue several keys and flush without waiting, returns their results in order
+          (awaitable for coroutine functions).
+        - `batch_info()`: a `BatchInfo` named tuple with the number of calls, of batches, of keys sent,
+          of deduplicated calls, of batches flushed because they were full, `max_size`, and `sizes`,
+          the number of batches per batch size.
+        - `batch_info_clear()`: reset the counters.
+
+    Args:
+        batch_fn: The batch function, sync or coroutine, taking a list of keys. Automatically handled when used as a decorator.
+        max_size: Maximum number of keys of a batch.
+        max_delay: Seconds a batch waits for more keys after its first one.
+        dedupe: Whether identical keys of a batch are sent once.
+
+    Returns:
+        Callable: A function taking a single key, a coroutine function if `batch_fn` is one.
+
+    Raises:
+        TypeError: If `batch_fn` is not a sync or coroutine function.
+        ValueError: If `max_size` is not a positive integer or `max_delay` is negative.
+    """
+    if not isinstance(max_size, int) or isinstance(max_size, bool) or max_size < 1:
+        raise ValueError(f"[{MODULE}.microbatch] max_size must be a positive integer.")
+    if not max_delay >= 0:
+        raise ValueError(f"[{MODULE}.microbatch] max_delay must be non-negative.")
+    if batch_fn is None:
+        return lambda f: microbatch(f, max_size = max_size, max_delay = max_delay, dedupe = dedupe)
+    if not callable(batch_fn):
+        raise TypeError(f"[{MODULE}.microbatch] expected a callable, but got {type(batch_fn).__name__}")
+    kind = kind_of(batch_fn)
+    if kind not in (SYNC, COROUTINE):
+        raise TypeError(f"[{MODULE}.microbatch] generator functions are not supported, but got {getattr(batch_fn, '__qualname__', repr(batch_fn))}.")
+
+    batcher = _Batcher(batch_fn, max_size, max_delay, dedupe)
+    if kind == COROUTINE:
+        acall = batcher.acall
+
+        @wraps(batch_fn)
+        async def wrapper(key):
+            return await acall(key)
+        callmany = batcher.acallmany
+    else:
+        call = batcher.call
+
+        @wraps(batch_fn)
+        def wrapper(key):
+            return call(key)
+        callmany = batcher.callmany
+
+    wrapper = instrumented(wrapper, "microbatch")
+    wrapper.callmany = callmany
+    wrapper.batch_info = batcher.batch_info
+    wrapper.batch_info_clear = batcher.batch_info_clear
+    return wrapper
@@ -3,21 +3,35 @@
 
 MODULE = "chinodeco.decodsl.control"
 
+import asyncio
+import contextvars
 import inspect
+import os
+import threading
+import time
+from collections.abc import Sequence
+from concurrent.futures import Executor, ThreadPoolExecutor, wait, FIRST_EXCEPTION
 from functools import wraps
+from itertools import chain, islice
 from typing import (
     Callable,
     Iterable,
+    Iterator,
+    Any
 )
 
+from .._kinds import instrumented, kind_of, COROUTINE, GENERATOR, ASYNCGEN
+from ..pretreat.parameter import _process_pool, _PROCESS_POOL_WORKERS
+from ._process import run_in_processes, _is_ndarray
 from ..debug.debugger import _debug_when
 
 @_debug_when
 class _when_else_chain:
-    def __init__(self, condition, deco):
+    def __init__(self, condition, deco, dynamic = None):
         self.__condition = condition
         self.__elsedc = None
         self.__deco = deco
+        self.__dynamic = dynamic
     
     def elsedeco(self, elsedc: Callable | None = None):
         """
@@ -40,14 +54,96 @@ class _when_else_chain:
         return self
     
     def __call__(self, func):
+        if self.__dynamic is not None:
+            return instrumented(self.__switch(func), "when")
         if self.__condition:
-            return self.__deco(func)
+            return instrumented(self.__deco(func), "when")
         elif self.__elsedc is not None:
-            return self.__elsedc(func)
+            return instrumented(self.__elsedc(func), "when")
         else:
             return func
 
-def when(predicate: Callable[[], bool] | bool):
+    def __switch(self, func):
+        predicate, ttl, version = self.__dynamic
+        # both branches are built once, each call only picks one
+        on = self.__deco(func) if self.__deco is not None else func
+        off = self.__elsedc(func) if self.__elsedc is not None else func
+        # [version seen, cached condition, expiry]
+        state = [_MISSING, False, 0.0]
+
+        if ttl is None and version is None:
+            def choose():
+                return on if predicate() else off
+        else:
+            def choose():
+                stale = False
+                if version is not None:
+                    current = version()
+                    if current != state[0]:
+                        state[0] = current
+                        stale = True
+                if ttl is not None:
+                    now = time.monotonic()
+                    if now >= state[2]:
+                        state[2] = now + ttl
+                        stale = True
+                if stale:
+                    state[1] = bool(predicate())
+                return on if state[1] else off
+
+        def refresh() -> None:
+            state[0] = _MISSING
+            state[2] = 0.0
+
+        kind = kind_of(func)
+        if kind == COROUTINE:
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                return await choose()(*args, **kwargs)
+        elif kind == GENERATOR:
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                return (yield from choose()(*args, **kwargs))
+        elif kind == ASYNCGEN:
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                agen = choose()(*args, **kwargs)
+                # forward asend / athrow / aclose to the chosen branch, like `yield from` for generators
+                try:
+                    value = await agen.__anext__()
+                except StopAsyncIteration:
+                    return
+                while True:
+                    try:
+                        sent = yield value
+                    except GeneratorExit:
+                        await agen.aclose()
+                        raise
+                    except BaseException as exc:
+                        try:
+                            value = await agen.athrow(exc)
+                        except StopAsyncIteration:
+                            return
+                    else:
+                        try:
+                            value = await (agen.__anext__() if sent is None else agen.asend(sent))
+                        except StopAsyncIteration:
+                            return
+        else:
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                return choose()(*args, **kwargs)
+        wrapper.refresh = refresh
+        wrapper.branches = (on, off)
+        return wrapper
+
+def when(
+    predicate: Callable[[], bool] | bool,
+    *,
+    dynamic: bool = False,
+    ttl: float | None = None,
+    version: Callable[[], Any] | None = None
+):
     """
     Conditionally apply a decorator based on the evaluation of a predicate.
 
@@ -55,9 +151,22 @@ def when(predicate: Callable[[], bool] | bool):
         predicate: A zero-argument function returning a bool, or a bool value.
             If True, the given decorator will be applied.
             If False, the decorator is skipped unless an alternative is provided via `.elsedeco`.
+        dynamic: If True, the predicate is evaluated on each call instead of once at decoration:
+            the decorated and the `elsedeco` (or undecorated) variants of the function are both built
+            once, and every call runs the variant selected by the predicate, so flipping a flag at
+            runtime switches branches without re-wrapping. Implied by `ttl` and `version`.
+        ttl: In dynamic mode, seconds during which the value of the predicate is reused.
+        version: In dynamic mode, a cheap zero-argument function returning a version counter (e.g. `tagversion`);
+            the predicate is evaluated again only when the returned value changes.
 
     Returns:
         Callable: A decorator that applies another decorator conditionally.
+        In dynamic mode, the decorated function exposes `refresh()`, forcing the next call to evaluate
+        the predicate, and `branches`, the (decorated, alternative) pair.
+
+    Raises:
+        TypeError: If `predicate` is not callable in dynamic mode.
+        ValueError: If `ttl` is not positive.
 
     Notes:
         Use `.elsedeco(func: Callable | None = None)` to register an alternative decorator
@@ -74,9 +183,24 @@ def when(predicate: Callable[[], bool] | bool):
         @when(False).elsedeco(some_other_decorator)
         def deco(func):
             return func
+
+        # switch at call time, re-reading the flag at most once per second
+        @when(lambda: flags["trace"], ttl=1.0)
+        def traced(func):
+            ...
         ```
     """
+    dynamic = dynamic or ttl is not None or version is not None
+    if dynamic and not callable(predicate):
+        raise TypeError(f"[{MODULE}.when] dynamic mode requires a callable predicate, but got {type(predicate)}.")
+    if ttl is not None and not ttl > 0:
+        raise ValueError(f"[{MODULE}.when] ttl must be positive or None.")
+    if version is not None and not callable(version):
+        raise TypeError(f"[{MODULE}.when] version must be callable, but got {type(version)}.")
+
     def decorator(deco: Callable | None):
+        if dynamic:
+            return _when_else_chain(None, deco, (predicate, ttl, version))
         if callable(predicate):
             condition = predicate()
         else:
@@ -85,11 +209,65 @@ def when(predicate: Callable[[], bool] | bool):
         return _when_else_chain(condition, deco)
     return decorator
 
+_MISSING = object()
+
+def _check_collect(stream: bool, reduce: Callable | None, initial: Any, *, tag: str) -> tuple:
+    if stream and reduce is not None:
+        raise ValueError(f"[{tag}] stream and reduce cannot be used together.")
+    if reduce is not None and not callable(reduce):
+        raise TypeError(f"[{tag}] reduce must be callable, but got {type(reduce)}.")
+    return stream, reduce, initial
+
+def _collect(func: Callable, loop: Callable, stream: bool, reduce: Callable | None, initial: Any, finish: Callable[[list], Any] = list) -> Callable:
+    # turn a loop written as a (async) generator function into the wrapper returning its results
+    # as a list (passed to `finish`), as the generator itself (stream), or folded into one value (reduce)
+    if stream:
+        return wraps(func)(loop)
+    if inspect.isasyncgenfunction(loop):
+        if reduce is None:
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                return finish([result async for result in loop(*args, **kwargs)])
+        else:
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                results = loop(*args, **kwargs)
+                value = initial
+                if value is _MISSING:
+                    try:
+                        value = await anext(results)
+                    except StopAsyncIteration:
+                        raise TypeError(f"[{MODULE}.reduce] reduce of an empty loop with no initial value.") from None
+                async for result in results:
+                    value = reduce(value, result)
+                return value
+    else:
+        if reduce is None:
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                return finish(list(loop(*args, **kwargs)))
+        else:
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                results = loop(*args, **kwargs)
+                value = initial
+                if value is _MISSING:
+                    try:
+                        value = next(results)
+                    except StopIteration:
+                        raise TypeError(f"[{MODULE}.reduce] reduce of an empty loop with no initial value.") from None
+                for result in results:
+                    value = reduce(value, result)
+                return value
+    return wrapper
+
 @_debug_when
 class _whileloop_else_chain:
-    def __init__(self, predicate, max_loops, deco):
+    def __init__(self, predicate, max_loops, deco, stream = False, reduce = None, initial = _MISSING, poll = None):
+        self.__poll = poll
         self.__predicate = predicate
         self.__max_loops = max_loops
+        self.__collect = _check_collect(stream, reduce, initial, tag = f"{MODULE}.whileloop")
         if callable(self.__predicate) and (not isinstance(self.__max_loops, int) or self.__max_loops < 1):
             raise ValueError(f"[{self.__class__.__module__}.{self.__class__.__qualname__}] max_loops must be a positive integer.")
         self.__break = None
@@ -152,20 +330,22 @@ class _whileloop_else_chain:
     def __call__(self, func: Callable):
         if not callable(func):
             raise TypeError(f"[{self.__class__.__module__}.{self.elsedo.__qualname__}] expected callable, but got {type(func)}.")
-        if inspect.iscoroutinefunction(func):
-            @wraps(func)
-            async def async_wrapper(*args, **kwargs):
+        # the loop wrapper is built once, not on every iteration
+        target = self.__deco(func) if callable(self.__deco) else func
+        if self.__poll is not None:
+            loop = self.__polling_loop(target)
+        elif inspect.iscoroutinefunction(func):
+            async def loop(*args, **kwargs):
                 if callable(self.__predicate):
                     condition = self.__predicate()
                 else:
                     condition = self.__predicate
-                results = []
                 count = 0
                 if condition:
                     while condition:
                         if self.__break() if callable(self.__break) else self.__break:
                             break
-                        results.append(await (self.__deco(func)(*args, **kwargs) if callable(self.__deco) else func(*args, **kwargs)))
+                        yield await target(*args, **kwargs)
                         count += 1
                         if callable(self.__predicate):
                             condition = self.__predicate()
@@ -174,22 +354,18 @@ class _whileloop_else_chain:
                                 break
                 elif self.__elsefunc is not None:
                     self.__elsefunc(*self.__args, **self.__kwargs)
-                return results
-            return async_wrapper
         else:
-            @wraps(func)
-            def wrapper(*args, **kwargs):
+            def loop(*args, **kwargs):
                 if callable(self.__predicate):
                     condition = self.__predicate()
                 else:
                     condition = self.__predicate
-                results = []
                 count = 0
                 if condition:
                     while condition:
                         if self.__break() if callable(self.__break) else self.__break:
                             break
-                        results.append(self.__deco(func)(*args, **kwargs) if callable(self.__deco) else func(*args, **kwargs))
+                        yield target(*args, **kwargs)
                         count += 1
                         if callable(self.__predicate):
                             condition = self.__predicate()
@@ -198,10 +374,52 @@ class _whileloop_else_chain:
                                 break
                 elif self.__elsefunc is not None:
                     self.__elsefunc(*self.__args, **self.__kwargs)
-                return results
-            return wrapper
-
-def whileloop(predicate: Callable[[], bool] | bool, *, loop_wrapper: Callable | None = None, max_loops = 1):
+        return instrumented(_collect(func, loop, *self.__collect), "whileloop")
+
+    def __polling_loop(self, target: Callable) -> Callable:
+        interval, backoff, max_interval, deadline = self.__poll
+
+        async def check(value):
+            # predicates may be plain values, functions or coroutine functions
+            value = value() if callable(value) else value
+            return (await value) if inspect.isawaitable(value) else value
+
+        async def loop(*args, **kwargs):
+            end = None if deadline is None else time.monotonic() + deadline
+            wait = interval
+            condition = await check(self.__predicate)
+            count = 0
+            if condition:
+                while True:
+                    if await check(self.__break):
+                        break
+                    result = target(*args, **kwargs)
+                    yield (await result) if inspect.isawaitable(result) else result
+                    count += 1
+                    if not callable(self.__predicate) and count >= self.__max_loops:
+                        break
+                    # the condition is checked before waiting, so a finished loop neither sleeps nor times out
+                    if not await check(self.__predicate):
+                        break
+                    if end is not None and time.monotonic() + wait > end:
+                        raise TimeoutError(f"[{MODULE}.asyncwhileloop] deadline of {deadline}s exceeded after {count} iterations.")
+                    await asyncio.sleep(wait)
+                    wait = wait * backoff if max_interval is None else min(wait * backoff, max_interval)
+            elif self.__elsefunc is not None:
+                result = self.__elsefunc(*self.__args, **self.__kwargs)
+                if inspect.isawaitable(result):
+                    await result
+        return loop
+
+def whileloop(
+    predicate: Callable[[], bool] | bool,
+    *,
+    loop_wrapper: Callable | None = None,
+    max_loops = 1,
+    stream: bool = False,
+    reduce: Callable[[Any, Any], Any] | None = None,
+    initial: Any = _MISSING
+):
     """
     Decorator for executing a function repeatedly while a predicate is True.
 
@@ -209,8 +427,13 @@ def whileloop(predicate: Callable[[], bool] | bool, *, loop_wrapper: Callable |
         predicate: A condition to evaluate before each execution.
             - If a callable is provided, it will be evaluated before every iteration.
             - If a constant boolean is provided, loop will execute at most once or based on max_loops.
-        loop_wrapper: An optional decorator to apply to the function on **each call**.
+        loop_wrapper: An optional decorator applied to the function once, whose wrapper is called on **each iteration**.
         max_loops: Maximum number of iterations. Defaults to 1. Ignored when predicate is callable.
+        stream: If True, the decorated function returns a generator (an async generator for coroutine
+            functions) yielding each result as soon as it is produced, the loop runs as it is consumed.
+        reduce: A two-argument function folding the results as they are produced, `reduce(value, result)`,
+            the decorated function then returns the folded value instead of the list of results.
+        initial: The initial value of `reduce`, the first result by default (like `functools.reduce`).
 
     Returns:
         A decorator that wraps the target function in a controlled loop.
@@ -220,8 +443,8 @@ def whileloop(predicate: Callable[[], bool] | bool, *, loop_wrapper: Callable |
         Use `.ifbreak(predicate)` to provide a break condition during loop execution.
         If the predicate is not callable, it's assumed to be static and won't be re-evaluated during the loop.
         For dynamic or state-dependent conditions (e.g., involving mutable objects), wrap them in a lambda or function.
-        Use `loop_wrapper=...` to wrap the function on **each loop iteration**.
-        This differs from placing a decorator outside `@whileloop`, which wraps the whole decorated function only once.
+        Use `loop_wrapper=...` to wrap the function called on **each loop iteration**.
+        This differs from placing a decorator outside `@whileloop`, which wraps the whole loop.
 
     Example:
         ```python
@@ -231,40 +454,277 @@ def whileloop(predicate: Callable[[], bool] | bool, *, loop_wrapper: Callable |
             ...
         ```
     """
-    return _whileloop_else_chain(predicate, max_loops, loop_wrapper)
+    return _whileloop_else_chain(predicate, max_loops, loop_wrapper, stream, reduce, initial)
+
+def asyncwhileloop(
+    predicate: Callable[[], Any] | bool,
+    *,
+    interval: float = 0.0,
+    backoff: float = 1.0,
+    max_interval: float | None = None,
+    deadline: float | None = None,
+    loop_wrapper: Callable | None = None,
+    max_loops = 1,
+    stream: bool = False,
+    reduce: Callable[[Any, Any], Any] | None = None,
+    initial: Any = _MISSING
+):
+    """
+    Asynchronous polling variant of `whileloop`: the decorated function becomes a coroutine function
+    (an async generator function with `stream=True`) that sleeps between iterations instead of spinning.
+
+    The predicate, the `ifbreak` predicate and the `elsedo` function may be coroutine functions,
+    and the decorated function may be a sync or a coroutine function.
+
+    Args:
+        predicate: A condition to evaluate before each execution, see `whileloop`.
+        interval: Seconds to sleep after the first iteration.
+        backoff: Factor applied to the sleep after each iteration (exponential backoff), 1 for a fixed interval.
+        max_interval: Upper bound of a single sleep, None for no bound.
+        deadline: Seconds after which the loop stops by raising `TimeoutError`, None for no deadline. The predicate is
+            evaluated right after each iteration, and the deadline is only checked when another iteration is due,
+            before sleeping: a loop whose predicate became False ends without waiting.
+        loop_wrapper, max_loops, stream, reduce, initial: See `whileloop`.
+
+    Returns:
+        A decorator that wraps the target function in a polling loop.
+
+    Raises:
+        ValueError: If `interval` or `max_interval` is negative, `backoff` is below 1 or `deadline` is not positive.
+
+    Example:
+        ```python
+        @asyncwhileloop(lambda: not job.done(), interval=0.1, backoff=2, max_interval=5, deadline=60)
+        async def report():
+            return await job.progress()
+        ```
+    """
+    if interval < 0 or backoff < 1 or (max_interval is not None and max_interval < 0):
+        raise ValueError(f"[{MODULE}.asyncwhileloop] interval and max_interval must be non-negative and backoff at least 1.")
+    if deadline is not None and not deadline > 0:
+        raise ValueError(f"[{MODULE}.asyncwhileloop] deadline must be positive or None.")
+    return _whileloop_else_chain(predicate, max_loops, loop_wrapper, stream, reduce, initial, poll = (interval, backoff, max_interval, deadline))
+
+def _chunks(values: Iterable, size: int) -> Iterator[Any]:
+    # slices of sliceable sequences (views for numpy arrays, memoryviews and ranges), lists otherwise
+    if isinstance(values, (Sequence, memoryview)) or _is_ndarray(values):
+        for start in range(0, len(values), size):
+            yield values[start:start + size]
+        return
+    iterator = iter(values)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+def _concat(results: list) -> Any:
+    # numpy arrays are concatenated, lists and tuples are flattened, other results are kept per chunk
+    if results and all(_is_ndarray(result) for result in results):
+        import numpy
+        return numpy.concatenate(results)
+    if all(isinstance(result, (list, tuple)) for result in results):
+        return list(chain.from_iterable(results))
+    return results
+
+_FOREACH_MODES = ("serial", "thread", "async", "process")
 
 @_debug_when
-def foreach(iter: Iterable | None = None, *, max_loops: int = 10, loop_wrapper: Callable | None = None):
+def foreach(
+    iter: Iterable | None = None,
+    *,
+    max_loops: int = 10,
+    loop_wrapper: Callable | None = None,
+    item: bool | str = False,
+    mode: str = "serial",
+    concurrency: int | None = None,
+    chunksize: int | None = None,
+    ordered: bool = True,
+    executor: Executor | None = None,
+    stream: bool = False,
+    reduce: Callable[[Any, Any], Any] | None = None,
+    initial: Any = _MISSING,
+    chunk: int | None = None
+):
+    """
+    Decorator for executing a function once per element of an iterable, collecting the results.
+
+    Args:
+        iter: The iterable to loop over, evaluated at each call. If None, the function runs `max_loops` times.
+        max_loops: Number of iterations when `iter` is None, the elements are then 0 to `max_loops - 1`.
+        loop_wrapper: An optional decorator applied to the function once, whose wrapper is called on **each iteration**.
+        item: Whether to pass the current element to the function: True passes it as the first
+            positional argument, a string passes it as the keyword argument of that name.
+            By default the function is called with the arguments of the call only.
+        mode: How the iterations run:
+            - "serial": one after the other (default).
+            - "thread": in a thread pool, for sync functions with I/O-bound bodies.
+            - "async": as concurrent tasks, for coroutine functions.
+            - "process": in a process pool, for sync functions with CPU-bound bodies.
+        concurrency: Maximum number of iterations running at once in "thread" and "async" modes,
+            None for the default thread pool size, or no limit for tasks. In "thread" mode the limit
+            applies to the pool shared by all the calls of the decorated function.
+        chunksize: Number of elements sent to a worker at once in "process" mode,
+            None to split the elements into about four chunks per worker: per worker of the shared pool,
+            or per CPU (`os.cpu_count()`) for a given `executor`, whose size is not known; pass `chunksize`
+            for an executor of another size.
+        ordered: In "process" mode, whether the results follow the order of `iter` (default),
+            or the order in which the chunks complete.
+        executor: The thread pool used in "thread" mode, by default a pool of `concurrency` threads created
+            on the first call and shared by the calls of the decorated function; the process pool used in
+            "process" mode, the pool shared with `offload` by default. A given executor is never shut down.
+        stream: In "serial" mode, return a generator (an async generator for coroutine functions)
+            yielding each result as soon as it is produced instead of a list.
+        reduce: In "serial" mode, a two-argument function folding the results in constant memory,
+            `reduce(value, result)`, the decorated function then returns the folded value.
+        initial: The initial value of `reduce`, the first result by default (like `functools.reduce`).
+        chunk: Call the function once per slice of `chunk` elements instead of once per element,
+            the slice being passed like an element (as the first positional argument unless `item` names a parameter).
+            NumPy arrays, memoryviews and ranges are sliced into zero-copy views, other sequences into slices
+            of their own type and other iterables into lists. The results of the slices are concatenated:
+            NumPy arrays with `numpy.concatenate`, lists and tuples into one list, other results are returned per slice.
+            With `stream` or `reduce`, the results of the slices are yielded or folded as they are.
+
+    Returns:
+        A decorator returning the list of results, in the order of `iter`.
+
+    Raises:
+        TypeError: If `iter` is not iterable (at call time), or if the function kind does not fit `mode`.
+        ValueError: If `mode` is unknown or `concurrency` is not a positive integer, or given in "process" mode
+            or along with `executor` in "thread" mode, or if `stream` or `reduce` is used outside of "serial" mode,
+            or `chunk` in "process" mode.
+
+    Notes:
+        In "thread", "async" and "process" modes, the first exception raised by an iteration is propagated,
+        the iterations not started yet are cancelled and the running tasks are cancelled;
+        threads already running are waited for. Threads run in a copy of the calling context.
+
+        In "process" mode, the function, `loop_wrapper`, the elements, the arguments and the results
+        are pickled. A function replaced in its module by the decorator is sent by name and found back
+        in the workers. A NumPy array `iter` is copied once into shared memory and the workers iterate
+        over views of it instead of receiving copies of their chunks.
+
+    Example:
+        ```python
+        @foreach(urls, item="url", mode="async", concurrency=8)
+        async def fetch(url, session):
+            ...
+
+        pages = await fetch(session=session)
+        ```
+    """
+    if mode not in _FOREACH_MODES:
+        raise ValueError(f"[{MODULE}.foreach] mode must be one of {', '.join(map(repr, _FOREACH_MODES))}, but got {mode!r}.")
+    if concurrency is not None and (not isinstance(concurrency, int) or isinstance(concurrency, bool) or concurrency < 1):
+        raise ValueError(f"[{MODULE}.foreach] concurrency must be a positive integer or None.")
+    if mode == "process" and concurrency is not None:
+        raise ValueError(f"[{MODULE}.foreach] concurrency is not supported in mode 'process', pass an executor with the number of workers instead.")
+    if mode == "thread" and concurrency is not None and executor is not None:
+        raise ValueError(f"[{MODULE}.foreach] concurrency is not supported along with an executor in mode 'thread', size the executor instead.")
+    if chunksize is not None and (not isinstance(chunksize, int) or isinstance(chunksize, bool) or chunksize < 1):
+        raise ValueError(f"[{MODULE}.foreach] chunksize must be a positive integer or None.")
+    collect = _check_collect(stream, reduce, initial, tag = f"{MODULE}.foreach")
+    if mode != "serial" and (stream or reduce is not None):
+        raise ValueError(f"[{MODULE}.foreach] stream and reduce are only supported in mode 'serial'.")
+    if not isinstance(item, (bool, str)):
+        raise TypeError(f"[{MODULE}.foreach] item must be a bool or a parameter name, but got {type(item)}.")
+    if chunk is not None:
+        if not isinstance(chunk, int) or isinstance(chunk, bool) or chunk < 1:
+            raise ValueError(f"[{MODULE}.foreach] chunk must be a positive integer or None.")
+        if mode == "process":
+            raise ValueError(f"[{MODULE}.foreach] chunk is not supported in mode 'process', use chunksize instead.")
+        item = item or True
+    finish = _concat if chunk is not None else list
+
+    def elements():
+        if (iter is not None) and isinstance(iter, Iterable):
+            return iter if chunk is None else _chunks(iter, chunk)
+        elif iter is None:
+            return range(max_loops) if chunk is None else _chunks(range(max_loops), chunk)
+        raise TypeError(f"[{MODULE}.foreach] Invalid iter type: {type(iter)}. Must be Iterable.")
+
     def decorator(func: Callable):
-        
-        
-        if inspect.iscoroutinefunction(func):
+        is_coroutine = inspect.iscoroutinefunction(func)
+        if mode in ("thread", "process") and is_coroutine:
+            raise TypeError(f"[{MODULE}.foreach] mode '{mode}' requires a sync function, use mode 'async' for coroutine functions.")
+        if mode == "async" and not is_coroutine:
+            raise TypeError(f"[{MODULE}.foreach] mode 'async' requires a coroutine function, use mode 'thread' for sync functions.")
+
+        # the loop wrapper is built once, not on every iteration
+        target = loop_wrapper(func) if callable(loop_wrapper) else func
+
+        def call(value, args, kwargs):
+            if item is True:
+                return target(value, *args, **kwargs)
+            elif item:
+                return target(*args, **{**kwargs, item: value})
+            return target(*args, **kwargs)
+
+        if mode == "thread":
+            # the given executor, or a pool of `concurrency` threads created on first call and shared by the calls
+            pool = [executor]
+            pool_lock = threading.Lock()
+
+            def thread_pool() -> Executor:
+                if pool[0] is None:
+                    with pool_lock:
+                        if pool[0] is None:
+                            pool[0] = ThreadPoolExecutor(max_workers = concurrency, thread_name_prefix = f"{MODULE}.foreach")
+                return pool[0]
+
             @wraps(func)
-            async def async_wrapper(*args, **kwargs):
-                results = []
-                if (iter is not None) and isinstance(iter, Iterable):
-                    for _ in iter:
-                        results.append(await (loop_wrapper(func)(*args, **kwargs) if callable(loop_wrapper) else func(*args, **kwargs)))
-                elif iter is None:
-                    for _ in range(max_loops):
-                        results.append(await (loop_wrapper(func)(*args, **kwargs) if callable(loop_wrapper) else func(*args, **kwargs)))
-                else:
-                    raise TypeError(f"[{MODULE}.foreach] Invalid iter type: {type(iter)}. Must be Iterable.")
-                return results
-            return async_wrapper
-        else:
+            def thread_wrapper(*args, **kwargs):
+                threads = thread_pool()
+                futures = [threads.submit(contextvars.copy_context().run, call, value, args, kwargs) for value in elements()]
+                done, _ = wait(futures, return_when = FIRST_EXCEPTION)
+                failed = [future for future in futures if future in done and future.exception() is not None]
+                if failed:
+                    # the pool outlives the call, cancel the iterations not started and wait for the running ones
+                    for future in futures:
+                        future.cancel()
+                    wait(futures)
+                    raise failed[0].exception()
+                return finish([future.result() for future in futures])
+            return instrumented(thread_wrapper, "foreach")
+
+        elif mode == "process":
             @wraps(func)
-            def sync_wrapper(*args, **kwargs):
-                results = []
-                if (iter is not None) and isinstance(iter, Iterable):
-                    for _ in iter:
-                        results.append(loop_wrapper(func)(*args, **kwargs) if callable(loop_wrapper) else func(*args, **kwargs))
-                elif iter is None:
-                    for _ in range(max_loops):
-                        results.append(loop_wrapper(func)(*args, **kwargs) if callable(loop_wrapper) else func(*args, **kwargs))
-                else:
-                    raise TypeError(f"[{MODULE}.foreach] Invalid iter type: {type(iter)}. Must be Iterable.")
-                return results
-            return sync_wrapper
+            def process_wrapper(*args, **kwargs):
+                return run_in_processes(
+                    func, loop_wrapper, item, elements(), args, kwargs,
+                    executor = executor if executor is not None else _process_pool(),
+                    workers = (os.cpu_count() or 1) if executor is not None else _PROCESS_POOL_WORKERS,
+                    chunksize = chunksize, ordered = ordered
+                )
+            setattr(process_wrapper, "__chino_foreach_body", func)
+            return instrumented(process_wrapper, "foreach")
+
+        elif mode == "async":
+            @wraps(func)
+            async def tasks_wrapper(*args, **kwargs):
+                semaphore = asyncio.Semaphore(concurrency) if concurrency is not None else None
+
+                async def run(value):
+                    if semaphore is None:
+                        return await call(value, args, kwargs)
+                    async with semaphore:
+                        return await call(value, args, kwargs)
+
+                tasks = [asyncio.ensure_future(run(value)) for value in elements()]
+                try:
+                    return finish(list(await asyncio.gather(*tasks)))
+                except BaseException:
+                    for task in tasks:
+                        task.cancel()
+                    await asyncio.gather(*tasks, return_exceptions = True)
+                    raise
+            return instrumented(tasks_wrapper, "foreach")
+
+        elif is_coroutine:
+            async def loop(*args, **kwargs):
+                for value in elements():
+                    yield await call(value, args, kwargs)
+        else:
+            def loop(*args, **kwargs):
+                for value in elements():
+                    yield call(value, args, kwargs)
+        return instrumented(_collect(func, loop, *collect, finish), "foreach")
 
-    return decorator
\ No newline at end of file
+    return decorator
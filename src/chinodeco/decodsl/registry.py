@@ -11,7 +11,9 @@ from typing import (
     Any
 )
 
+from .._kinds import instrumented
 from ..debug.debugger import _debug_when
+from ..pretreat.tagging import TagQuery, alltags
 
 from ..debug.errors import (
     UnknownParameterError,
@@ -78,6 +80,7 @@ class CommandDispatcher:
             if wrappers is not None:
                 for wrapper in reversed(wrappers):
                     wrapped = wrapper(wrapped)
+            wrapped = instrumented(wrapped, "dispatcher", " ".join(tokens))
             if node.handler is not None:
                 warnings.warn(f"[{self.__class__.__module__}.{self.register.__qualname__}] command '{".".join(path.split())}' is already registered; existing command will be overwritten.", RuntimeWarning)
             node.handler = wrapped
@@ -160,7 +163,7 @@ class CommandDispatcher:
 
         return node, command_path, args, kwargs_dict
 
-    def run(self, command: str, *options: tuple[str, Any] | str, cmd_emptiable: bool = True):
+    def run(self, command: str, *options: tuple[str, Any] | str | TagQuery, cmd_emptiable: bool = True):
         """
         Execute a registered command with parsed arguments and keyword arguments.
 
@@ -171,6 +174,8 @@ class CommandDispatcher:
         Args:
             command: A raw command-line style string to be executed.
                 Example: `"greet hello --name Alice -v"`
+            *options: Permissions, the command runs if any of them matches the handler's tags:
+                a tag key (truthy), a (key, value) pair or a compiled `TagQuery`.
 
         Returns:
             Any: The return value of the executed command function.
@@ -204,7 +209,7 @@ class CommandDispatcher:
                 raise UnknownParameterError(f"[{self.__class__.__module__}.{self.run.__qualname__}] {msg}")
 
         if options:
-            tags = getattr(func, "__chino_tags", {})
+            tags = alltags(func)
             for option in options:
                 if isinstance(option, tuple) and len(option) == 2 and isinstance(option[0], str):
                     if tags.get(option[0], False) == option[1]:
@@ -212,13 +217,16 @@ class CommandDispatcher:
                 elif isinstance(option, str):
                     if tags.get(option, False):
                         return func(*args, **kwargs)
+                elif isinstance(option, TagQuery):
+                    if option(tags):
+                        return func(*args, **kwargs)
                 else:
-                    raise TypeError(f"[{self.__class__.__module__}.{self.run.__qualname__}] each option must be a str or tuple[str, Any], but got {type(option).__name__}: {option!r}")
+                    raise TypeError(f"[{self.__class__.__module__}.{self.run.__qualname__}] each option must be a str, tuple[str, Any] or TagQuery, but got {type(option).__name__}: {option!r}")
             raise AuthorizationError(f"[{self.__class__.__module__}.{self.run.__qualname__}]-'{func.__qualname__}' you are not allowed to use command '{" ".join(path)}' please check your authority.")
         return func(*args, **kwargs)
     
     
-    async def asyncrun(self, command: str, *options: tuple[str, Any] | str, cmd_emptiable: bool = True):
+    async def asyncrun(self, command: str, *options: tuple[str, Any] | str | TagQuery, cmd_emptiable: bool = True):
         """
         Execute a registered command with parsed arguments and keyword arguments.
 
@@ -229,6 +237,8 @@ class CommandDispatcher:
         Args:
             command: A raw command-line style string to be executed.
                 Example: `"greet hello --name Alice -v"`
+            *options: Permissions, the command runs if any of them matches the handler's tags:
+                a tag key (truthy), a (key, value) pair or a compiled `TagQuery`.
 
         Returns:
             Any: The return value of the executed command coroutine function.
@@ -262,16 +272,21 @@ class CommandDispatcher:
                 raise UnknownParameterError(f"[{self.__class__.__module__}.{self.run.__qualname__}] {msg}")
         
         if options:
-            tags = getattr(func, "__chino_tags", {})
+            tags = alltags(func)
             for option in options:
                 if isinstance(option, tuple) and len(option) == 2 and isinstance(option[0], str):
-                    if tags.get(option[0], False) == option[1]:
-                        return func(*args, **kwargs)
+                    allowed = tags.get(option[0], False) == option[1]
                 elif isinstance(option, str):
-                    if tags.get(option, False):
-                        return func(*args, **kwargs)
+                    allowed = tags.get(option, False)
+                elif isinstance(option, TagQuery):
+                    allowed = option(tags)
                 else:
-                    raise TypeError(f"[{self.__class__.__module__}.{self.run.__qualname__}] each option must be a str or tuple[str, Any], but got {type(option).__name__}: {option!r}")
-            raise AuthorizationError(f"[{self.__class__.__module__}.{self.run.__qualname__}]-'{func.__qualname__}' you are not allowed to use command '{" ".join(path)}' please check your authority.")
+                    raise TypeError(f"[{self.__class__.__module__}.{self.run.__qualname__}] each option must be a str, tuple[str, Any] or TagQuery, but got {type(option).__name__}: {option!r}")
+                if allowed:
+                    break
+            else:
+                raise AuthorizationError(f"[{self.__class__.__module__}.{self.run.__qualname__}]-'{func.__qualname__}' you are not allowed to use command '{" ".join(path)}' please check your authority.")
 
-        return (await func(*args, **kwargs)) if inspect.iscoroutinefunction(func) else func(*args, **kwargs)
\ No newline at end of file
+        # handlers wrapped by sync decorators may still return an awaitable
+        result = func(*args, **kwargs)
+        return (await result) if inspect.isawaitable(result) else result
\ No newline at end of file
@@ -1,14 +1,15 @@
 # !/usr/bin/env Python3
 # -*- coding:utf-8 -*-
 
-__all__ = ["setargs", "addprefix", "addsuffix", "mapargs", "filterargs", "tag", "tagpop", "settags", "haskey", "haskeys", "gettag", "gettags", "deltags", "alltags", "hastag", "hastags"]
+__all__ = ["setargs", "addprefix", "addsuffix", "mapargs", "filterargs", "offload", "tag", "tagpop", "settags", "haskey", "haskeys", "gettag", "gettags", "deltags", "alltags", "hastag", "hastags", "tagged", "tagquery", "TagQuery", "matchtags", "findtagged", "tagversion", "ontagchange", "offtagchange", "memoize", "LRUCache", "CacheInfo"]
 
 from .parameter import (
     setargs,
     addprefix,
     addsuffix,
     mapargs,
-    filterargs
+    filterargs,
+    offload
 )
 
 from .tagging import (
@@ -22,5 +23,19 @@ from .tagging import (
     deltags,
     alltags,
     hastags,
-    hastag
+    hastag,
+    tagged,
+    tagquery,
+    TagQuery,
+    matchtags,
+    findtagged,
+    tagversion,
+    ontagchange,
+    offtagchange
+)
+
+from .caching import (
+    memoize,
+    LRUCache,
+    CacheInfo
 )
\ No newline at end of file
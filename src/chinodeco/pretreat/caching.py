@@ -0,0 +1,324 @@
+# !/usr/bin/env Python3
+# -*- coding:utf-8 -*-
+
+MODULE = "chinodeco.pretreat.caching"
+
+import asyncio
+import inspect
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import Future
+from functools import wraps
+from typing import (
+    Callable,
+    Hashable,
+    Any
+)
+
+from .._kinds import instrumented
+from ..debug.debugger import _debug_when
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "evictions", "uncacheable", "maxsize", "currsize"])
+
+_MISSING = object()
+_UNHASHABLE = object()
+
+def _freeze(value: Any) -> Hashable:
+    # the type is kept in the key so that [1, 2] and (1, 2) do not share an entry
+    if isinstance(value, (list, tuple)):
+        return (type(value), tuple(_freeze(v) for v in value))
+    if isinstance(value, dict):
+        return (type(value), frozenset((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (set, frozenset)):
+        return (type(value), frozenset(value))
+    if isinstance(value, bytearray):
+        return (type(value), bytes(value))
+    key = (type(value), value)
+    hash(key)
+    return key
+
+def _make_key(value: Any) -> Hashable:
+    """
+    Build a cache key for `value`, freezing common unhashable containers.
+
+    Returns `_UNHASHABLE` if no key can be built.
+    """
+    key = (type(value), value)
+    try:
+        hash(key)
+        return key
+    except TypeError:
+        pass
+    try:
+        return _freeze(value)
+    except TypeError:
+        return _UNHASHABLE
+
+class LRUCache:
+    def __init__(self, maxsize: int | None = 128, ttl: float | None = None):
+        """
+        A thread-safe least-recently-used cache with hit/miss/eviction counters.
+
+        Args:
+            maxsize: Maximum number of entries, None for an unbounded cache.
+            ttl: Seconds an entry stays valid after being stored, None to keep entries until evicted.
+                Expired entries count as misses and evictions.
+
+        Raises:
+            ValueError: If `maxsize` is not a positive integer or None, or `ttl` is not positive.
+        """
+        if maxsize is not None and (not isinstance(maxsize, int) or isinstance(maxsize, bool) or maxsize < 1):
+            raise ValueError(f"[{MODULE}.LRUCache] maxsize must be a positive integer or None.")
+        if ttl is not None and not ttl > 0:
+            raise ValueError(f"[{MODULE}.LRUCache] ttl must be a positive number or None.")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.__data = OrderedDict()
+        self.__lock = threading.RLock()
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+        self.__uncacheable = 0
+
+    def __len__(self):
+        return len(self.__data)
+
+    def __contains__(self, key: Hashable):
+        if self.ttl is None:
+            return key in self.__data
+        entry = self.__data.get(key)
+        return entry is not None and entry[1] > time.monotonic()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Return the cached value of `key` and mark it as recently used, counting a hit or a miss.
+        """
+        with self.__lock:
+            try:
+                value = self.__data[key]
+            except KeyError:
+                self.__misses += 1
+                return default
+            if self.ttl is not None:
+                value, deadline = value
+                if deadline <= time.monotonic():
+                    del self.__data[key]
+                    self.__evictions += 1
+                    self.__misses += 1
+                    return default
+            self.__data.move_to_end(key)
+            self.__hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Store `value` under `key`, evicting the least recently used entries beyond `maxsize`.
+        """
+        with self.__lock:
+            self.__data[key] = value if self.ttl is None else (value, time.monotonic() + self.ttl)
+            self.__data.move_to_end(key)
+            if self.maxsize is not None:
+                while len(self.__data) > self.maxsize:
+                    self.__data.popitem(last = False)
+                    self.__evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Remove `key` from the cache and return its value.
+        """
+        with self.__lock:
+            if key not in self.__data:
+                return default
+            value = self.__data.pop(key)
+            return value if self.ttl is None else value[0]
+
+    def _count_uncacheable(self):
+        with self.__lock:
+            self.__uncacheable += 1
+
+    def cache_info(self) -> CacheInfo:
+        """
+        Return the counters of the cache as a `CacheInfo` named tuple.
+        """
+        with self.__lock:
+            return CacheInfo(self.__hits, self.__misses, self.__evictions, self.__uncacheable, self.maxsize, len(self.__data))
+
+    def cache_clear(self) -> None:
+        """
+        Remove all entries and reset the counters.
+        """
+        with self.__lock:
+            self.__data.clear()
+            self.__hits = self.__misses = self.__evictions = self.__uncacheable = 0
+
+def _memoize_unary(func: Callable[[Any], Any], cache: LRUCache) -> Callable[[Any], Any]:
+    # memoize a one-argument function per argument value, unhashable values bypass the cache
+    if inspect.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(value):
+            key = _make_key(value)
+            if key is _UNHASHABLE:
+                cache._count_uncacheable()
+                return await func(value)
+            result = cache.get(key, _MISSING)
+            if result is _MISSING:
+                result = await func(value)
+                cache.set(key, result)
+            return result
+        return async_wrapper
+
+    @wraps(func)
+    def wrapper(value):
+        key = _make_key(value)
+        if key is _UNHASHABLE:
+            cache._count_uncacheable()
+            return func(value)
+        result = cache.get(key, _MISSING)
+        if result is _MISSING:
+            result = func(value)
+            cache.set(key, result)
+        return result
+    return wrapper
+
+def _memoize_future(submit: Callable[[Any], Future], cache: LRUCache) -> Callable[[Any], Future]:
+    # memoize a function returning a concurrent Future, only successful results are stored
+    @wraps(submit)
+    def wrapper(value):
+        key = _make_key(value)
+        if key is _UNHASHABLE:
+            cache._count_uncacheable()
+            return submit(value)
+        result = cache.get(key, _MISSING)
+        if result is not _MISSING:
+            future = Future()
+            future.set_result(result)
+            return future
+        future = submit(value)
+        def store(done: Future):
+            if not done.cancelled() and done.exception() is None:
+                cache.set(key, done.result())
+        future.add_done_callback(store)
+        return future
+    return wrapper
+
+
+def _make_call_key(bound: inspect.BoundArguments) -> Hashable:
+    # normalized arguments: f(1), f(x=1) and f() with a default of 1 share the same key
+    key = tuple(_make_key(value) for value in bound.arguments.values())
+    return _UNHASHABLE if any(part is _UNHASHABLE for part in key) else key
+
+@_debug_when
+def memoize(func: Callable | None = None, *, maxsize: int | None = 128, ttl: float | None = None):
+    """
+    Memoize a function on its normalized arguments.
+
+    Unlike `functools.lru_cache`, the arguments are bound to the signature and completed
+    with their defaults before building the key, so `f(1)`, `f(x=1)` and `f()` (with `x=1`
+    as default) hit the same entry. Calls with arguments that cannot be keyed are not cached.
+
+    For coroutine functions, concurrent calls with the same key are coalesced: only the first
+    one runs, the others await its result (single-flight). If that call is cancelled, one of the
+    waiting calls runs the function instead. Exceptions are never cached.
+
+    Can be used with or without parentheses:
+        @memoize
+        def load(path, mode="r"): ...
+
+        @memoize(maxsize=1024, ttl=60)
+        async def fetch(user_id): ...
+
+    The decorated function exposes:
+        - `invalidate(*args, **kwargs)`: drop the entry of these arguments, returns True if it existed.
+        - `cache_info()` / `cache_clear()`: counters and reset of the underlying `LRUCache`.
+        - `cache`: the underlying `LRUCache`.
+
+    Args:
+        func: The target function. Automatically handled when used as a decorator.
+        maxsize: Maximum number of entries, None for an unbounded cache.
+        ttl: Seconds an entry stays valid, None for no expiry.
+
+    Returns:
+        Callable: The memoized function.
+
+    Raises:
+        TypeError: If `func` is not callable.
+        ValueError: If `maxsize` or `ttl` is invalid.
+    """
+    if func is None:
+        return lambda f: memoize(f, maxsize = maxsize, ttl = ttl)
+    if not callable(func):
+        raise TypeError(f"[{MODULE}.memoize] expected a callable, but got {type(func).__name__}")
+
+    sig = inspect.signature(func)
+    cache = LRUCache(maxsize, ttl)
+
+    def make_key(args, kwargs):
+        bound = sig.bind_partial(*args, **kwargs)
+        bound.apply_defaults()
+        return _make_call_key(bound)
+
+    if inspect.iscoroutinefunction(func):
+        inflight: dict[Hashable, asyncio.Future] = {}
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = make_key(args, kwargs)
+            if key is _UNHASHABLE:
+                cache._count_uncacheable()
+                return await func(*args, **kwargs)
+            while True:
+                result = cache.get(key, _MISSING)
+                if result is not _MISSING:
+                    return result
+                leader = inflight.get(key)
+                if leader is None:
+                    break
+                try:
+                    return await asyncio.shield(leader)
+                except asyncio.CancelledError:
+                    task = asyncio.current_task()
+                    if not leader.cancelled() or (hasattr(task, "cancelling") and task.cancelling()):
+                        raise
+                    # the leader was cancelled, not this call: the first follower to wake up takes over
+
+            future = asyncio.get_running_loop().create_future()
+            inflight[key] = future
+            try:
+                result = await func(*args, **kwargs)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except BaseException as e:
+                future.set_exception(e)
+                future.exception()  # mark as retrieved when nobody else is waiting
+                raise
+            else:
+                cache.set(key, result)
+                future.set_result(result)
+                return result
+            finally:
+                inflight.pop(key, None)
+    else:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = make_key(args, kwargs)
+            if key is _UNHASHABLE:
+                cache._count_uncacheable()
+                return func(*args, **kwargs)
+            result = cache.get(key, _MISSING)
+            if result is _MISSING:
+                result = func(*args, **kwargs)
+                cache.set(key, result)
+            return result
+
+    def invalidate(*args, **kwargs) -> bool:
+        key = make_key(args, kwargs)
+        return key is not _UNHASHABLE and cache.pop(key, _MISSING) is not _MISSING
+
+    wrapper = instrumented(wrapper, "memoize")
+    wrapper.cache = cache
+    wrapper.invalidate = invalidate
+    wrapper.cache_info = cache.cache_info
+    wrapper.cache_clear = cache.cache_clear
+    return wrapper
@@ -3,14 +3,36 @@
 
 MODULE = "chinodeco.pretreat.parameter"
 
+import atexit
+import asyncio
 import inspect
-from functools import wraps
+import os
+import pickle
+import sys
+import threading
+import weakref
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor
+)
+from functools import update_wrapper
 from typing import (
+    AsyncIterator,
     Callable,
+    Iterable,
+    Iterator,
     Any
 )
 
+from .._kinds import native, kind_of, COROUTINE, ASYNCGEN
 from ..debug.debugger import _debug_when
+from .caching import (
+    LRUCache,
+    CacheInfo,
+    _memoize_unary,
+    _memoize_future
+)
 
 def _patch_args(bound: inspect.BoundArguments, sig: inspect.Signature, updates: list[tuple[Callable[[Any], Any], str | int]], *, tag: str = "") -> Callable:
 
@@ -40,6 +62,37 @@ def _patch_args(bound: inspect.BoundArguments, sig: inspect.Signature, updates:
     except ValueError as e:
         raise ValueError(f"[{tag}] {e}")
 
+async def _astream(modifier: Callable[[Any], Any], iterable: Any, is_async: bool, limiter: Callable[[], asyncio.Semaphore] | None) -> AsyncIterator:
+    semaphore = limiter() if is_async and limiter is not None else None
+
+    async def apply(item):
+        if not is_async:
+            return modifier(item)
+        if semaphore is None:
+            return await modifier(item)
+        async with semaphore:
+            return await modifier(item)
+
+    if hasattr(iterable, "__aiter__"):
+        async for item in iterable:
+            yield await apply(item)
+    else:
+        for item in iterable:
+            yield await apply(item)
+
+def _each(modifier: Callable[[Any], Any], is_async: bool = False, limiter: Callable[[], asyncio.Semaphore] | None = None) -> Callable[[Any], Iterator | AsyncIterator]:
+    # turn an element modifier into a lazy modifier of a whole (async) iterable,
+    # coroutine modifiers take the concurrency limit for each element
+    def stream(iterable):
+        if is_async or hasattr(iterable, "__aiter__"):
+            if not (hasattr(iterable, "__aiter__") or isinstance(iterable, Iterable)):
+                raise TypeError(f"expected an iterable or async iterable, but got {type(iterable).__name__}")
+            return _astream(modifier, iterable, is_async, limiter)
+        if not isinstance(iterable, Iterable):
+            raise TypeError(f"expected an iterable or async iterable, but got {type(iterable).__name__}")
+        return map(modifier, iterable)
+    return stream
+
 @_debug_when
 def setargs(*set_args:tuple[Any, str | int]) -> Callable:
     """
@@ -57,34 +110,30 @@ def setargs(*set_args:tuple[Any, str | int]) -> Callable:
     Returns:
         A decorator that modifies the target function's arguments before execution.
     """
+    def make_modifier(v): return lambda x: v
+
+    updates = [(make_modifier(value), key) for value, key in set_args]
+
     def decorator(func: Callable):
         sig = inspect.signature(func)
 
-        @wraps(func)
-        def wrapper(*args, **kwargs):
+        def prepare(args, kwargs):
             bound = sig.bind_partial(*args, **kwargs)
             bound.apply_defaults()
-            updates = []
-            
-            def make_modifier(v): return lambda x: v
-
-            for value, key in set_args:
-                updates.append((make_modifier(value), key))
-            
-            _patch_args(bound, sig, updates, tag = f"[{MODULE}.setargs]")
+            _patch_args(bound, sig, updates, tag = f"{MODULE}.setargs")
+            return bound.args, bound.kwargs
 
-            return func(*bound.args, **bound.kwargs)
-
-        return wrapper
+        return native(func, prepare = prepare, layer = "setargs")
     return decorator
 
 @_debug_when
-def addprefix(*add_args:tuple[str | list, str | int]) -> Callable:
+def addprefix(*add_args:tuple[str | list, str | int], each: bool = False) -> Callable:
     """
     Add a prefix to specified positional or keyword arguments of a function.
 
     Args:
         *add_args: Tuples of (prefix, index) to prepend to positional arguments, index also can be a key.
+        each: If True, the arguments are treated as (async) iterables and every element is prefixed lazily.
 
     Returns:
         A decorated function with specified arguments automatically prefixed.
@@ -94,40 +143,30 @@ def addprefix(*add_args:tuple[str | list, str | int]) -> Callable:
         KeyError: If a specified keyword argument is missing.
         TypeError: If concatenation fails due to type mismatch.
     """
+    def make_modifier(p): return lambda x: p + x
+
+    updates = [(_each(make_modifier(pre)) if each else make_modifier(pre), key) for pre, key in add_args]
+
     def decorator(func: Callable):
         sig = inspect.signature(func)
 
-        @wraps(func)
-        def wrapper(*args, **kwargs):
+        def prepare(args, kwargs):
             bound = sig.bind_partial(*args, **kwargs)
             bound.apply_defaults()
-            updates = []
-            
-            def make_modifier(p): return lambda x: p + x
-
-            for pre, key in add_args:
-                updates.append((make_modifier(pre), key))
-            
             _patch_args(bound, sig, updates, tag = f"{MODULE}.addprefix")
+            return bound.args, bound.kwargs
 
-            return func(*bound.args, **bound.kwargs)
-
-        if inspect.iscoroutinefunction(func):
-            @wraps(func)
-            async def async_wrapper(*args, **kwargs):
-                return await wrapper(*args, **kwargs)
-            return async_wrapper
-
-        return wrapper
+        return native(func, prepare = prepare, layer = "addprefix")
     return decorator
 
 @_debug_when
-def addsuffix(*add_args:tuple[str | list, int | str]) -> Callable:
+def addsuffix(*add_args:tuple[str | list, int | str], each: bool = False) -> Callable:
     """
     Add a suffix to specified positional or keyword arguments of a function.
 
     Args:
         *add_args: Tuples of (suffix, index) to prepend to positional arguments, index also can be a key.
+        each: If True, the arguments are treated as (async) iterables and every element is suffixed lazily.
 
     Returns:
         A decorated function with specified arguments automatically suffixed.
@@ -137,93 +176,323 @@ def addsuffix(*add_args:tuple[str | list, int | str]) -> Callable:
         KeyError: If a specified keyword argument is missing.
         TypeError: If concatenation fails due to type mismatch.
     """
+    def make_modifier(s): return lambda x: x + s
+
+    updates = [(_each(make_modifier(suf)) if each else make_modifier(suf), key) for suf, key in add_args]
+
     def decorator(func: Callable):
         sig = inspect.signature(func)
 
-        @wraps(func)
-        def wrapper(*args, **kwargs):
+        def prepare(args, kwargs):
             bound = sig.bind_partial(*args, **kwargs)
             bound.apply_defaults()
-            updates = []
-            
-            def make_modifier(s): return lambda x: x + s
-
-            for suf, key in add_args:
-                updates.append((make_modifier(suf), key))
-            
             _patch_args(bound, sig, updates, tag = f"{MODULE}.addsuffix")
+            return bound.args, bound.kwargs
 
-            return func(*bound.args, **bound.kwargs)
-
-        if inspect.iscoroutinefunction(func):
-            @wraps(func)
-            async def async_wrapper(*args, **kwargs):
-                return await wrapper(*args, **kwargs)
-            return async_wrapper
-
-        return wrapper
+        return native(func, prepare = prepare, layer = "addsuffix")
     return decorator
 
+def _arg_name(bound: inspect.BoundArguments, sig: inspect.Signature, key: str | int, *, tag: str = "") -> str:
+    # resolve a key/index to the bound parameter name, with the same errors as _patch_args
+    if isinstance(key, int):
+        try:
+            name = list(sig.parameters)[key]
+        except IndexError:
+            raise IndexError(f"[{tag}] Positional index {key} out of range.")
+        if name not in bound.arguments:
+            raise TypeError(f"[{tag}] '{name}'")
+        return name
+    elif isinstance(key, str):
+        if key not in bound.arguments:
+            raise KeyError(f"[{tag}] Argument '{key}' not found.")
+        return key
+    raise TypeError(f"[{tag}] Invalid key type: {type(key)}. Must be int or str.")
+
+def _loop_semaphore(limit: int) -> Callable[[], asyncio.Semaphore]:
+    # an asyncio.Semaphore binds to the first loop waiting on it, so keep one per running loop
+    semaphores: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore] = weakref.WeakKeyDictionary()
+
+    def semaphore() -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        current = semaphores.get(loop)
+        if current is None:
+            current = semaphores[loop] = asyncio.Semaphore(limit)
+        return current
+    return semaphore
+
+async def _gather_args(bound: inspect.BoundArguments, sig: inspect.Signature, updates: list[tuple[Callable[[Any], Any], str | int]], semaphore: asyncio.Semaphore | None = None, *, tag: str = ""):
+    names = [_arg_name(bound, sig, key, tag = tag) for _, key in updates]
+
+    async def apply(modifier, name):
+        try:
+            if semaphore is None:
+                return await modifier(bound.arguments[name])
+            async with semaphore:
+                return await modifier(bound.arguments[name])
+        except TypeError as e:
+            raise TypeError(f"[{tag}] {e}")
+
+    values = await asyncio.gather(*(apply(modifier, name) for (modifier, _), name in zip(updates, names)))
+    for name, value in zip(names, values):
+        bound.arguments[name] = value
+
+def _submit_args(bound: inspect.BoundArguments, sig: inspect.Signature, updates: list[tuple[Callable[[Any], Future], str | int]], *, tag: str = ""):
+    # submit every update first so that the offloaded map_funcs run in parallel
+    names = [_arg_name(bound, sig, key, tag = tag) for _, key in updates]
+    futures = [submit(bound.arguments[name]) for (submit, _), name in zip(updates, names)]
+    for name, future in zip(names, futures):
+        try:
+            bound.arguments[name] = future.result()
+        except TypeError as e:
+            raise TypeError(f"[{tag}] {e}")
+
+def _call_pickled(func: Callable[[Any], Any], payload: bytes) -> Any:
+    return func(pickle.loads(payload))
+
+_PROCESS_POOL: ProcessPoolExecutor | None = None
+_PROCESS_POOL_LOCK = threading.Lock()
+# the size of the shared pool, set explicitly so that callers sizing their work do not read it back from the pool
+# (the default of `ProcessPoolExecutor`, at most 61 on Windows)
+_PROCESS_POOL_WORKERS = min(os.cpu_count() or 1, 61) if sys.platform == "win32" else os.cpu_count() or 1
+
+def _process_pool() -> ProcessPoolExecutor:
+    global _PROCESS_POOL
+    with _PROCESS_POOL_LOCK:
+        if _PROCESS_POOL is None:
+            _PROCESS_POOL = ProcessPoolExecutor(max_workers = _PROCESS_POOL_WORKERS)
+            atexit.register(_PROCESS_POOL.shutdown)
+        return _PROCESS_POOL
+
+class offload:
+    def __init__(self, func: Callable[[Any], Any], *, threshold: int = 4096, sizeof: Callable[[Any], int] = len, executor: Executor | None = None):
+        """
+        Mark a `map_func` of `mapargs` to run in a process pool.
+
+        Values whose `sizeof` is below `threshold` (or whose size cannot be measured, or which
+        cannot be pickled) are transformed inline, the others are pickled once and sent to
+        `executor`, by default a `ProcessPoolExecutor` shared by the whole package and shut down at exit.
+
+        In a synchronous function all consecutive offloaded arguments are submitted before any
+        result is collected, in a coroutine function they are awaited with `asyncio.gather`.
+
+        Example:
+            @mapargs((offload(parse_blob, threshold=1 << 16), "blob"))
+            def handle(blob): ...
+
+        Args:
+            func: A picklable (module-level) function that takes one argument.
+            threshold: Minimal size of a value to be sent to the pool.
+            sizeof: Function measuring a value, `len` by default.
+            executor: Executor to submit to instead of the shared process pool.
+
+        Raises:
+            TypeError: If `func` is not callable, is a coroutine function or cannot be pickled.
+        """
+        if not callable(func) or inspect.iscoroutinefunction(func):
+            raise TypeError(f"[{MODULE}.offload] func must be a callable that is not a coroutine function.")
+        try:
+            pickle.dumps(func)
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            raise TypeError(f"[{MODULE}.offload] func must be picklable (defined at module level): {e}")
+        update_wrapper(self, func)
+        self.func = func
+        self.threshold = threshold
+        self.sizeof = sizeof
+        self.executor = executor
+
+    def __call__(self, value):
+        return self.submit(value).result()
+
+    def submit(self, value: Any) -> Future:
+        """
+        Transform `value` inline or in the pool, returning a `concurrent.futures.Future`.
+        """
+        try:
+            payload = pickle.dumps(value, pickle.HIGHEST_PROTOCOL) if self.sizeof(value) >= self.threshold else None
+        except (pickle.PicklingError, TypeError, AttributeError):
+            payload = None
+        if payload is not None:
+            return (self.executor or _process_pool()).submit(_call_pickled, self.func, payload)
+        future = Future()
+        try:
+            future.set_result(self.func(value))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
 @_debug_when
-def mapargs(*map_args:tuple[Callable[[Any], Any], int | str]) -> Callable:
+def mapargs(*map_args:tuple[Callable[[Any], Any], int | str], concurrency: int | asyncio.Semaphore | None = None, cache: bool | int | None = None, each: bool = False) -> Callable:
     """
     Transform specific arguments by applying a function to them before execution.
 
     Each entry in `map_args` is a tuple of (map_func, key/index), where:
     - `map_func` is a callable that takes one argument and returns a transformed result.
+      It may also be a coroutine function, in which case the decorated function must be a coroutine function too.
     - `key/index` is either a parameter name (str) or position (int) to apply the function to.
 
+    Consecutive coroutine `map_func`s are awaited concurrently with `asyncio.gather`,
+    the others are applied in order.
+
+    With `cache`, each distinct `map_func` is memoized per argument value in its own LRU cache.
+    Common unhashable values (list, dict, set, bytearray) are frozen into keys, other unhashable
+    values bypass the cache. The decorated function exposes `cache_info()`, `cache_clear()`
+    and `map_caches` (one `LRUCache` per `map_func`, in order of first use).
+
+    CPU-bound `map_func`s can be wrapped in `offload` to run them in a process pool.
+
+    With `each`, the arguments are treated as iterables and the `map_func`s are applied element-wise:
+    the function receives a lazy iterator (`map`) instead of a materialized container, or an async
+    generator if the argument is an async iterable or the `map_func` is a coroutine function (or an
+    `offload`ed one on a coroutine function). Each element then takes the `concurrency` limit.
+
     Example:
         @mapargs((int, "count"))
         def f(count): ...
 
+        @mapargs((fetch_user, "user"), (fetch_group, "group"), concurrency=8)
+        async def g(user, group): ...
+
+        @mapargs((parse_row, "rows"), each=True)
+        def load(rows):
+            for row in rows: ...
+
     Args:
         *map_args: Tuples specifying (map_func, key/index) for argument transformation.
+        concurrency: Optional limit of coroutine `map_func`s running at once, shared across all calls
+            of the decorated function on the same event loop. An `asyncio.Semaphore` can be passed
+            to share the limit between functions, it is then bound to the loop it is first used on.
+        cache: Memoize the `map_func`s, for `offload`ed ones a hit skips the pool. True uses a maxsize of 128, an int sets the maxsize. Off by default.
+            With `each`, the elements are memoized.
+        each: Stream the `map_func`s over the elements of (async) iterable arguments.
 
     Returns:
         A decorator that maps arguments prior to function execution.
 
     Raises:
-        TypeError: If `map_func` is not callable or does not accept exactly one argument.
+        TypeError: If `map_func` is not callable or does not accept exactly one argument,
+            or if a coroutine `map_func` is used on a synchronous function.
+        ValueError: If `concurrency` or `cache` is not a positive integer.
     """
+    if isinstance(concurrency, int) and not isinstance(concurrency, bool):
+        if concurrency < 1:
+            raise ValueError(f"[{MODULE}.mapargs] concurrency must be a positive integer.")
+        limiter = _loop_semaphore(concurrency)
+    elif concurrency is None:
+        limiter = None
+    elif isinstance(concurrency, asyncio.Semaphore):
+        limiter = lambda: concurrency
+    else:
+        raise TypeError(f"[{MODULE}.mapargs] concurrency must be int or asyncio.Semaphore, but got {type(concurrency)}.")
+
+    if cache is None or cache is False:
+        cache_size = None
+    elif cache is True:
+        cache_size = 128
+    elif isinstance(cache, int) and cache > 0:
+        cache_size = cache
+    else:
+        raise ValueError(f"[{MODULE}.mapargs] cache must be a bool or a positive integer, but got {cache!r}.")
+
     def decorator(func: Callable):
         sig = inspect.signature(func)
-
-        def make_modifier(f): return lambda x: f(x)
-
-        updates = []
+        params = list(sig.parameters)
+        is_async_kind = kind_of(func) in (COROUTINE, ASYNCGEN)
+        caches: dict[Callable, LRUCache] = {}
+        memoized: dict[Callable, Callable] = {}
+
+        # group the updates into stages of one kind: "sync" stages are applied in order,
+        # "async" stages are gathered and "offload" stages are submitted to the process pool
+        # before collecting, a key mapped twice in a row starts a new stage
+        stages: list[tuple[str, list, set]] = []
         for map_func, key in map_args:
             if not callable(map_func):
                 raise TypeError(f"[{MODULE}.mapargs] map_func must be callable.")
-            sig_map = inspect.signature(map_func)
-            if len(sig_map.parameters) != 1:
+            try:
+                sig_map = inspect.signature(map_func)
+            except ValueError:
+                # builtins such as int or str may not expose a signature
+                sig_map = None
+            if sig_map is not None and len(sig_map.parameters) != 1:
                 raise TypeError(f"[{MODULE}.mapargs] map_func must accept exactly one argument.")
-            updates.append((make_modifier(map_func), key))
+            is_async = inspect.iscoroutinefunction(map_func)
+            if is_async and not is_async_kind:
+                raise TypeError(f"[{MODULE}.mapargs] coroutine map_func requires a coroutine or async generator function, but got {getattr(func, '__qualname__', repr(func))}.")
+            kind = "async" if is_async else "sync"
+            if isinstance(map_func, offload) and (is_async_kind or not each):
+                # offloaded entries are stored as their submit function
+                kind = "offload"
+                submit = map_func.submit
+                if cache_size is not None:
+                    if map_func not in memoized:
+                        caches[map_func] = LRUCache(cache_size)
+                        memoized[map_func] = _memoize_future(submit, caches[map_func])
+                    submit = memoized[map_func]
+                map_func = submit
+                if each:
+                    # awaited element by element instead of blocking the event loop on `.result()`
+                    map_func = lambda value, submit = submit: asyncio.wrap_future(submit(value))
+                    is_async = True
+            elif cache_size is not None:
+                if map_func not in memoized:
+                    caches[map_func] = LRUCache(cache_size)
+                    memoized[map_func] = _memoize_unary(map_func, caches[map_func])
+                map_func = memoized[map_func]
+            if each:
+                map_func = _each(map_func, is_async, limiter)
+                kind = "sync"
+            name = params[key] if isinstance(key, int) and -len(params) <= key < len(params) else key
+            if stages and stages[-1][0] == kind and not (kind != "sync" and name in stages[-1][2]):
+                stages[-1][1].append((map_func, key))
+                stages[-1][2].add(name)
+            else:
+                stages.append((kind, [(map_func, key)], {name}))
 
-        @wraps(func)
-        def wrapper(*args, **kwargs):
+        def prepare(args, kwargs):
             bound = sig.bind_partial(*args, **kwargs)
             bound.apply_defaults()
-            updates = []
 
-            for map_func, key in map_args:
+            for kind, stage, _ in stages:
+                if kind == "offload":
+                    _submit_args(bound, sig, stage, tag = f"{MODULE}.mapargs")
+                else:
+                    _patch_args(bound, sig, stage, tag = f"{MODULE}.mapargs")
+            return bound.args, bound.kwargs
 
-                if not callable(map_func):
-                    raise TypeError(f"[{MODULE}.mapargs] map_func must be callable.")
-                sig_map = inspect.signature(map_func)
-                if len(sig_map.parameters) != 1:
-                    raise TypeError(f"[{MODULE}.mapargs] map_func must accept exactly one argument.")
-                updates.append((make_modifier(map_func), key))
+        aprepare = None
+        if is_async_kind:
+            # offloaded stages are awaited like coroutine stages
+            async_stages = [
+                (kind, [(lambda value, submit = submit: asyncio.wrap_future(submit(value)), key) for submit, key in stage] if kind == "offload" else stage)
+                for kind, stage, _ in stages
+            ]
+
+            async def aprepare(args, kwargs):
+                bound = sig.bind_partial(*args, **kwargs)
+                bound.apply_defaults()
+
+                for kind, stage in async_stages:
+                    if kind == "sync":
+                        _patch_args(bound, sig, stage, tag = f"{MODULE}.mapargs")
+                    else:
+                        await _gather_args(bound, sig, stage, limiter() if limiter is not None else None, tag = f"{MODULE}.mapargs")
+                return bound.args, bound.kwargs
+
+        wrapper = native(func, prepare = prepare, aprepare = aprepare, layer = "mapargs")
+
+        if cache_size is not None:
+            map_caches = tuple(caches.values())
 
-            _patch_args(bound, sig, updates, tag = f"{MODULE}.mapargs")
+            def cache_info() -> CacheInfo:
+                infos = [c.cache_info() for c in map_caches]
+                return CacheInfo(*(sum(info[i] for info in infos) for i in range(4)), cache_size, sum(info.currsize for info in infos))
 
-            return func(*bound.args, **bound.kwargs)
+            def cache_clear() -> None:
+                for c in map_caches:
+                    c.cache_clear()
 
-        if inspect.iscoroutinefunction(func):
-            @wraps(func)
-            async def async_wrapper(*args, **kwargs):
-                return await wrapper(*args, **kwargs)
-            return async_wrapper
+            wrapper.map_caches = map_caches
+            wrapper.cache_info = cache_info
+            wrapper.cache_clear = cache_clear
 
         return wrapper
     return decorator
@@ -262,13 +531,13 @@ def filterargs(*, allow: list | None = None, block: list | None = None, allow_bl
     allow = allow or []
     block = block or []
     def decorator(func: Callable):
+        sig = inspect.signature(func)
 
-        @wraps(func)
-        def wrapper(*args, **kwargs):
+        def prepare(args, kwargs):
             active_allow = [arguments() if callable(arguments) else arguments for arguments in allow]
             active_block = [arguments() if callable(arguments) else arguments for arguments in block]
 
-            bound = inspect.signature(func).bind_partial(*args, **kwargs)
+            bound = sig.bind_partial(*args, **kwargs)
             bound.apply_defaults()
 
             new_args = []
@@ -283,13 +552,7 @@ def filterargs(*, allow: list | None = None, block: list | None = None, allow_bl
                     continue
                 new_kwargs[key] = value
 
-            return func(*new_args, **new_kwargs)
-
-        if inspect.iscoroutinefunction(func):
-            @wraps(func)
-            async def async_wrapper(*args, **kwargs):
-                return await wrapper(*args, **kwargs)
-            return async_wrapper
+            return new_args, new_kwargs
 
-        return wrapper
-    return decorator
\ No newline at end of file
+        return native(func, prepare = prepare, layer = "filterargs")
+    return decorator
@@ -3,23 +3,290 @@
 
 MODULE = "chinodeco.pretreat.attrset"
 
+import ast
+import operator
+import threading
+import weakref
+from functools import lru_cache
+from types import MethodType
 from typing import (
     Callable,
+    Hashable,
+    Mapping,
     Any
 )
 
 from ..debug.debugger import _debug_when
 
+_MISSING = object()
+_MAX_WRAPPED_DEPTH = 256
+
+# reverse index: tag key -> tag sets carrying it, (tag key, interning key of the value) -> tag sets carrying it.
+# Callables are not indexed one by one: each interned tag set (`frozentags`) keeps weak references
+# to the live callables it is assigned to in its `_members` dict (smaller than a WeakSet), so
+# a callable costs one weak reference however many tags it has. Entries are keyed by id and hold a weak reference to the tag set, whose callback
+# removes them (and the keys left empty) when the last callable carrying the tag set is collected.
+_TAG_INDEX: dict[str, dict[int, weakref.ref]] = {}
+_TAG_VALUE_INDEX: dict[tuple[str, Hashable], dict[int, weakref.ref]] = {}
+# also guards interning, a single reentrant lock so that the callbacks of the garbage collector never deadlock
+_INDEX_LOCK = threading.RLock()
+
 def _ensure_callable(func: Any, funcname: str):
     if not callable(func):
         raise TypeError(f"[{MODULE}.{funcname}] expected a callable, but got {type(func).__name__}")
 
+def _is_hashable(value: Any) -> bool:
+    try:
+        hash(value)
+        return True
+    except TypeError:
+        return False
+
+def _register(tags: "frozentags") -> dict[weakref.ref, None]:
+    # index a tag set the first time it is assigned to a callable, called with the lock held
+    ident = id(tags)
+    entries = [(_TAG_INDEX, key) for key in tags]
+    entries += [(_TAG_VALUE_INDEX, (key, _intern_key(value))) for key, value in tags.items() if _is_hashable(value)]
+
+    def drop(_):
+        with _INDEX_LOCK:
+            for index, key in entries:
+                refs = index.get(key)
+                if refs is not None and refs.get(ident) is ref:
+                    del refs[ident]
+                    if not refs:
+                        del index[key]
+
+    ref = weakref.ref(tags, drop)
+    for index, key in entries:
+        index.setdefault(key, {})[ident] = ref
+    members = tags._members = {}
+    # one callback per tag set, dropping the reference of a collected callable, it needs no lock
+    tags._discard = lambda member: members.pop(member, None)
+    return members
+
+def _reindex(func: Callable, old: "frozentags", new: "frozentags"):
+    # move `func` from the members of its previous tag set to the ones of the new, called with the lock held
+    try:
+        ref = weakref.ref(func)
+    except TypeError:
+        return  # callables without weak reference support are not indexed
+    face = None
+    members = getattr(old, "_members", None)
+    if members is not None:
+        face = members.pop(ref, None)
+    if new:
+        members = getattr(new, "_members", None)
+        if members is None:
+            members = _register(new)
+        members[weakref.ref(func, new._discard)] = face
+
+def _wraps(outer: Callable, inner: Callable) -> bool:
+    for _ in range(_MAX_WRAPPED_DEPTH):
+        outer = getattr(outer, "__wrapped__", None)
+        if outer is None:
+            return False
+        if outer is inner:
+            return True
+    return False
+
+def _expose(owner: Callable, func: Callable):
+    # make `func`, a wrapper of `owner`, the callable the index returns for `owner` unless a wrapper
+    # of `func` already is, called with the lock held
+    if func is owner:
+        return
+    members = getattr(getattr(owner, "__chino_tags", None), "_members", None)
+    try:
+        ref = weakref.ref(owner)
+    except TypeError:
+        return
+    if members is None or ref not in members:
+        return
+    face = members[ref]
+    face = face() if face is not None else None
+    if face is None or face is not func and not _wraps(face, func):
+        try:
+            members[ref] = weakref.ref(func)
+        except TypeError:
+            pass
+
+def _adopt(wrapper: Callable):
+    """
+    Let a wrapper of a tagged function stand for it in the reverse index, so that `tagged` and
+    `findtagged` return the outermost wrapper. Called by the wrappers chinodeco builds.
+    """
+    owner = _tag_owner(wrapper)
+    with _INDEX_LOCK:
+        _expose(owner, wrapper)
+
+def _members_of(refs: dict[int, weakref.ref] | None) -> set[Callable]:
+    funcs = set()
+    for ref in list(refs.values()) if refs else ():
+        tags = ref()
+        if tags is not None:
+            for member, face in list(tags._members.items()):
+                # the outermost known wrapper while it is alive, the function owning the tags otherwise
+                func = face() if face is not None else None
+                if func is None:
+                    func = member()
+                if func is not None:
+                    funcs.add(func)
+    return funcs
+
+class frozentags(dict):
+    """
+    An immutable tag dictionary, equal tag sets are interned and shared between callables.
+
+    `settags` / `deltags` never modify it in place, they store a new (interned) instance on the
+    callable instead (copy-on-write).
+    """
+    __slots__ = ("__weakref__", "_members", "_discard", "_version")
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError(f"[{MODULE}.frozentags] tags are immutable, use settags / deltags instead.")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __hash__(self):
+        return hash(frozenset(self.items()))
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({dict.__repr__(self)})"
+
+    def __reduce__(self):
+        return (_intern_tags, (dict(self),))
+
+_INTERNED_TAGS: weakref.WeakValueDictionary[frozenset, frozentags] = weakref.WeakValueDictionary()
+
+def _intern_key(value: Any) -> Hashable:
+    # the type is part of the key down into containers, so that 1, 1.0 and True, or (1,) and (True,), stay distinct
+    if isinstance(value, tuple):
+        return (type(value), tuple(_intern_key(v) for v in value))
+    if isinstance(value, frozenset):
+        return (type(value), frozenset(_intern_key(v) for v in value))
+    key = (type(value), value)
+    hash(key)
+    return key
+
+def _intern_tags(tags: dict[str, Any]) -> frozentags:
+    try:
+        key = frozenset((k, _intern_key(v)) for k, v in tags.items())
+    except TypeError:
+        return frozentags(tags)  # unhashable values, not shared
+    with _INDEX_LOCK:
+        interned = _INTERNED_TAGS.get(key)
+        if interned is None:
+            interned = _INTERNED_TAGS[key] = frozentags(tags)
+        return interned
+
+_EMPTY_TAGS = _intern_tags({})
+
+def _tag_owner(func: Callable) -> Callable:
+    """
+    Resolve the callable holding the authoritative tags of `func`: the innermost function
+    of its `__wrapped__` chain (bound methods resolve through `__func__`).
+    """
+    if isinstance(func, MethodType):
+        func = func.__func__
+    owner = getattr(func, "__wrapped__", None)
+    if owner is None:
+        return func
+    # a bounded walk instead of a set of visited links, a cyclic chain stops at the bound
+    for _ in range(_MAX_WRAPPED_DEPTH):
+        inner = getattr(owner, "__wrapped__", None)
+        if inner is None:
+            break
+        owner = inner
+    return owner
+
+def _tags_of(func: Callable) -> frozentags:
+    return getattr(_tag_owner(func), "__chino_tags", _EMPTY_TAGS)
+
+_TAG_VERSION = 0
+_TAG_LISTENERS: tuple[Callable[[Callable, Mapping, Mapping], Any], ...] = ()
+
+def _store_tags(func: Callable, old: "frozentags", new: "frozentags"):
+    # assign the new tag set, move `func` in the reverse index and bump the versions, called with the lock held
+    global _TAG_VERSION
+    func.__chino_tags = new
+    _reindex(func, old, new)
+    _TAG_VERSION += 1
+    # kept on the shared tag set rather than on every callable
+    new._version = _TAG_VERSION
+
+def _notify(func: Callable, old: Mapping, new: Mapping):
+    # listeners are called outside the lock
+    for listener in _TAG_LISTENERS:
+        listener(func, old, new)
+
+def tagversion(func: Callable | None = None) -> int:
+    """
+    Return the version of the tags, increased by every effective `settags` / `deltags` / `tag` / `tagpop`.
+
+    Without argument, returns the global version. With a callable, returns the global version
+    at which its current tag set was last assigned (resolved through the `__wrapped__` chain),
+    0 if it was never tagged. The version is kept on the shared tag set, so it also increases when
+    another callable is given the same tags. Both are monotonically increasing, so a structure
+    built from tags can store the version it was built at and compare it later instead of rescanning.
+
+    Args:
+        func: Callable to query, or None for the global version.
+
+    Returns:
+        int: The tag version.
+    """
+    if func is None:
+        return _TAG_VERSION
+    _ensure_callable(func, "tagversion")
+    return getattr(getattr(_tag_owner(func), "__chino_tags", None), "_version", 0)
+
+def ontagchange(listener: Callable[[Callable, Mapping, Mapping], Any]) -> Callable:
+    """
+    Register a listener called after each effective tag change, can be used as a decorator.
+
+    The listener is called synchronously as `listener(func, old_tags, new_tags)`, where `func`
+    is the callable owning the tags and both mappings are read-only. It is not called when
+    a change leaves the tags unchanged.
+
+    Args:
+        listener: The callback to register.
+
+    Returns:
+        Callable: The listener itself.
+
+    Example:
+        @ontagchange
+        def invalidate(func, old, new):
+            if old.get("role") != new.get("role"):
+                permission_table.pop(func, None)
+    """
+    global _TAG_LISTENERS
+    _ensure_callable(listener, "ontagchange")
+    with _INDEX_LOCK:
+        _TAG_LISTENERS = (*_TAG_LISTENERS, listener)
+    return listener
+
+def offtagchange(listener: Callable[[Callable, Mapping, Mapping], Any]) -> None:
+    """
+    Unregister a listener added with `ontagchange`, unknown listeners are ignored.
+    """
+    global _TAG_LISTENERS
+    with _INDEX_LOCK:
+        _TAG_LISTENERS = tuple(l for l in _TAG_LISTENERS if l is not listener)
 
 def settags(func: Callable, *tags: str | tuple[str, Any]):
     """
     Add one or more tags with optional values to the callable's __chino_tags dictionary.
 
     Each tag can be a string (value defaults to True) or a tuple (key, value).
+    The tags are stored as an interned `frozentags`, a new one is assigned on every change.
+    Updates are atomic, concurrent `settags` / `deltags` on the same callable are not lost.
+
+    Tags live on the innermost function of the `__wrapped__` chain, so tagging a wrapper made with
+    `functools.wraps` and tagging the function it wraps update the same tags, and every tag
+    query resolves through the chain the same way. `tagged` / `findtagged` return the outermost
+    wrapper tagged with `settags` or built by a chinodeco decorator over the tagged function.
 
     Args:
         func: Callable object to add tags to.
@@ -29,18 +296,29 @@ def settags(func: Callable, *tags: str | tuple[str, Any]):
         TypeError: If a tag is neither str nor tuple[str, Any], or tuple format is invalid.
     """
     _ensure_callable(func, "settags")
-    if not hasattr(func, "__chino_tags"):
-        func.__chino_tags = {}
+    updates = {}
     for tag in tags:
         if isinstance(tag, str):
-            func.__chino_tags[tag] = True
+            updates[tag] = True
         elif isinstance(tag, tuple):
             if len(tag) == 2 and isinstance(tag[0], str):
-                func.__chino_tags[tag[0]] = tag[1]
+                updates[tag[0]] = tag[1]
             else:
                 raise TypeError(f"[{MODULE}.tag] Invalid tuple tag: expected (str, Any), got {tag!r}")
         else:
             raise TypeError(f"[{MODULE}.tag] each tag must be a str or tuple[str, Any], but got {type(tag).__name__}: {tag!r}")
+    if isinstance(func, MethodType):
+        func = func.__func__
+    owner = _tag_owner(func)
+    # read, update and reindex atomically, so that concurrent updates of the same callable are not lost
+    with _INDEX_LOCK:
+        current = getattr(owner, "__chino_tags", _EMPTY_TAGS)
+        new = _intern_tags({**current, **updates})
+        if new is not current:
+            _store_tags(owner, current, new)
+        _expose(owner, func)
+    if new is not current:
+        _notify(owner, current, new)
 
 @_debug_when
 def tag(*tags: str | tuple[str, Any]):
@@ -72,7 +350,7 @@ def haskey(func: Callable, key: str) -> bool:
         bool: True if the tag exists, False otherwise.
     """
     _ensure_callable(func, "haskey")
-    return key in getattr(func, "__chino_tags", {})
+    return key in _tags_of(func)
 
 
 def haskeys(func: Callable, *keys: str) -> bool:
@@ -87,7 +365,7 @@ def haskeys(func: Callable, *keys: str) -> bool:
         bool: True if all specified tags exist and are truthy, False otherwise.
     """
     _ensure_callable(func, "haskeys")
-    tags = getattr(func, "__chino_tags", {})
+    tags = _tags_of(func)
     return all(key in tags for key in keys)
 
 def hastag(func: Callable, key:str) -> bool:
@@ -102,7 +380,7 @@ def hastag(func: Callable, key:str) -> bool:
         bool: True if the tag exists, False otherwise.
     """
     _ensure_callable(func, "hastag")
-    return getattr(func, "__chino_tags", {}).get(key, False)
+    return _tags_of(func).get(key, False)
 
 def hastags(func: Callable, *keys: str) -> bool:
     """
@@ -116,7 +394,7 @@ def hastags(func: Callable, *keys: str) -> bool:
         bool: True if all specified tags exist and are truthy, False otherwise.
     """
     _ensure_callable(func, "hastags")
-    tags = getattr(func, "__chino_tags", {})
+    tags = _tags_of(func)
     return all(tags.get(key, False) for key in keys)
 
 def gettag(func: Callable, key: str, default: Any = None) -> Any:
@@ -132,7 +410,7 @@ def gettag(func: Callable, key: str, default: Any = None) -> Any:
         Any: The tag value or the default if not found.
     """
     _ensure_callable(func, "gettag")
-    return getattr(func, "__chino_tags", {}).get(key, default)
+    return _tags_of(func).get(key, default)
 
 
 def gettags(func: Callable, *keys: str) -> dict[str, Any]:
@@ -147,13 +425,15 @@ def gettags(func: Callable, *keys: str) -> dict[str, Any]:
         dict: A dictionary of tag keys to their values for all found keys.
     """
     _ensure_callable(func, "gettags")
-    tags = getattr(func, "__chino_tags", {})
+    tags = _tags_of(func)
     return {key: tags[key] for key in keys if key in tags}
 
 def deltags(func: Callable, *keys: str) -> None:
     """
     Remove one or more tags from the function's __chino_tags dictionary.
 
+    A new interned `frozentags` is assigned, the previous one is left unchanged.
+
     Args:
         func: The callable object whose tags will be modified.
         *tags: Tag keys to remove.
@@ -164,10 +444,14 @@ def deltags(func: Callable, *keys: str) -> None:
     _ensure_callable(func, "deltags")
     if not all(isinstance(key, str) for key in keys):
         raise TypeError(f"[{MODULE}.deltags] all keys must be str.")
-    tags = getattr(func, "__chino_tags", None)
-    if isinstance(tags, dict):
-        for key in keys:
-            tags.pop(key, None)
+    func = _tag_owner(func)
+    with _INDEX_LOCK:
+        tags = getattr(func, "__chino_tags", None)
+        if not isinstance(tags, dict) or not any(key in tags for key in keys):
+            return
+        new = _intern_tags({k: v for k, v in tags.items() if k not in keys})
+        _store_tags(func, tags, new)
+    _notify(func, tags, new)
 
 def alltags(func: Callable) -> dict[str, Any]:
     """
@@ -177,11 +461,11 @@ def alltags(func: Callable) -> dict[str, Any]:
         func: Callable to query.
 
     Returns:
-        dict[str, Any]: A dictionary of all tag keys and their corresponding values.
+        dict[str, Any]: A read-only dictionary (`frozentags`) of all tag keys and their corresponding values.
                         Returns an empty dict if no tags are present.
     """
     _ensure_callable(func, "alltags")
-    return getattr(func, "__chino_tags", {})
+    return _tags_of(func)
 
 @_debug_when
 def tagpop(*keys: str):
@@ -198,4 +482,206 @@ def tagpop(*keys: str):
         _ensure_callable(func, "tagpop")
         deltags(func, *keys)
         return func
-    return decorator
\ No newline at end of file
+    return decorator
+
+def tagged(key: str, value: Any = _MISSING) -> set[Callable]:
+    """
+    Find all live callables carrying a tag, using the reverse index kept by `settags` / `deltags`.
+
+    The index holds weak references only, so garbage-collected callables disappear from it.
+    Callables that do not support weak references are not indexed. A function wrapped by a
+    chinodeco decorator (or tagged through a wrapper) is returned as its outermost such wrapper,
+    so that calling it goes through every decorator.
+
+    Args:
+        key: Tag key to look for.
+        value: If given, only callables whose tag value equals `value` are returned.
+            Hashable values are looked up directly and must also have the same type
+            (down into tuples and frozensets, like tag interning), so 1, 1.0 and True differ.
+            Unhashable ones are compared against the callables carrying `key`.
+
+    Returns:
+        set[Callable]: The matching callables.
+
+    Example:
+        tagged("role", "admin")  # every handler tagged ("role", "admin")
+    """
+    if not isinstance(key, str):
+        raise TypeError(f"[{MODULE}.tagged] key must be str, but got {type(key).__name__}")
+    with _INDEX_LOCK:
+        if value is _MISSING:
+            return _members_of(_TAG_INDEX.get(key))
+        elif _is_hashable(value):
+            return _members_of(_TAG_VALUE_INDEX.get((key, _intern_key(value))))
+        return {func for func in _members_of(_TAG_INDEX.get(key)) if _tags_of(func).get(key, _MISSING) == value}
+
+_COMPARE_OPS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.In: lambda a, b: a in b,
+    ast.NotIn: lambda a, b: a not in b,
+    ast.Is: operator.is_,
+    ast.IsNot: operator.is_not,
+}
+
+def _compile_operand(node: ast.AST, text: str) -> tuple[Callable[[Mapping], Any], str | None]:
+    if isinstance(node, ast.Name):
+        key = node.id
+        return (lambda tags: tags.get(key, _MISSING)), key
+    try:
+        value = ast.literal_eval(node)
+    except ValueError:
+        raise ValueError(f"[{MODULE}.tagquery] unsupported expression {ast.unparse(node)!r} in {text!r}")
+    if isinstance(value, (list, set)):
+        value = frozenset(value) if _is_hashable(tuple(value)) else tuple(value)
+    return (lambda tags: value), None
+
+def _compile_compare(node: ast.Compare, text: str) -> tuple[Callable[[Mapping], bool], set[str]]:
+    operands = [_compile_operand(n, text) for n in [node.left, *node.comparators]]
+    pairs = []
+    required = set()
+    for (left, left_key), op, (right, right_key) in zip(operands, node.ops, operands[1:]):
+        compare_op = _COMPARE_OPS.get(type(op))
+        if compare_op is None:
+            raise ValueError(f"[{MODULE}.tagquery] unsupported operator {type(op).__name__} in {text!r}")
+        missing_matches = isinstance(op, (ast.NotEq, ast.NotIn, ast.IsNot))
+        if not missing_matches:
+            required.update(k for k in (left_key, right_key) if k is not None)
+        pairs.append((left, compare_op, right, missing_matches))
+
+    def compare(tags):
+        for left, op, right, missing_matches in pairs:
+            a, b = left(tags), right(tags)
+            if a is _MISSING or b is _MISSING:
+                if not missing_matches:
+                    return False
+                continue
+            try:
+                if not op(a, b):
+                    return False
+            except TypeError:
+                return False
+        return True
+    return compare, required
+
+def _compile_node(node: ast.AST, text: str) -> tuple[Callable[[Mapping], bool], set[str]]:
+    # returns the predicate and the tag keys a matching callable must carry
+    if isinstance(node, ast.BoolOp):
+        compiled = [_compile_node(value, text) for value in node.values]
+        preds = [pred for pred, _ in compiled]
+        if isinstance(node.op, ast.And):
+            return (lambda tags: all(pred(tags) for pred in preds)), set().union(*(req for _, req in compiled))
+        return (lambda tags: any(pred(tags) for pred in preds)), set.intersection(*(req for _, req in compiled))
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        pred, _ = _compile_node(node.operand, text)
+        return (lambda tags: not pred(tags)), set()
+    if isinstance(node, ast.Compare):
+        return _compile_compare(node, text)
+    if isinstance(node, ast.Name):
+        key = node.id
+        return (lambda tags: bool(tags.get(key, False))), {key}
+    operand, _ = _compile_operand(node, text)
+    value = bool(operand({}))
+    return (lambda tags: value), set()
+
+class TagQuery:
+    def __init__(self, text: str):
+        """
+        A tag query compiled into a predicate over a tag dictionary.
+
+        Use `tagquery(text)` to get a cached instance instead of building one directly.
+        """
+        if not isinstance(text, str):
+            raise TypeError(f"[{MODULE}.tagquery] query must be str, but got {type(text).__name__}")
+        try:
+            tree = ast.parse(text.strip(), mode = "eval")
+        except SyntaxError as e:
+            raise ValueError(f"[{MODULE}.tagquery] invalid query {text!r}: {e.msg}")
+        self.text = text
+        self.__predicate, required = _compile_node(tree.body, text)
+        self.required: frozenset[str] = frozenset(required)
+
+    def __call__(self, tags: Mapping[str, Any]) -> bool:
+        return self.__predicate(tags)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.text!r})"
+
+    def matches(self, func: Callable) -> bool:
+        """
+        Evaluate the query against the tags of `func`.
+        """
+        _ensure_callable(func, "TagQuery.matches")
+        return self.__predicate(_tags_of(func))
+
+@lru_cache(maxsize = 256)
+def tagquery(text: str) -> TagQuery:
+    """
+    Parse and compile a tag query, compiled queries are cached.
+
+    The syntax is a subset of Python expressions over tag keys:
+        - a bare key is true when the tag exists and is truthy: `admin`
+        - comparisons with literals: `role == 'admin'`, `tier >= 2`, `1 <= tier < 3`, `role in ('admin', 'owner')`,
+          `owner is None`
+        - `and`, `or`, `not` and parentheses
+
+    A missing tag only satisfies `!=`, `not in` and `is not`, and comparisons between incompatible types are false.
+    Tag keys must be valid identifiers.
+
+    Args:
+        text: The query expression.
+
+    Returns:
+        TagQuery: A callable taking a tag dictionary and returning a bool.
+
+    Raises:
+        ValueError: If the query is not a valid expression or uses unsupported syntax.
+
+    Example:
+        admin_only = tagquery("role == 'admin' and not beta and tier >= 2")
+        admin_only(alltags(handler))
+    """
+    return TagQuery(text)
+
+def _as_query(query: str | TagQuery) -> TagQuery:
+    return query if isinstance(query, TagQuery) else tagquery(query)
+
+def matchtags(func: Callable, query: str | TagQuery) -> bool:
+    """
+    Check whether the tags of the callable satisfy a tag query.
+
+    Args:
+        func: Callable to check.
+        query: A query string (see `tagquery`) or a compiled `TagQuery`.
+
+    Returns:
+        bool: True if the query matches.
+    """
+    _ensure_callable(func, "matchtags")
+    return _as_query(query)(_tags_of(func))
+
+def findtagged(query: str | TagQuery) -> set[Callable]:
+    """
+    Find all live indexed callables matching a tag query.
+
+    The candidates are taken from the reverse index of the smallest tag key the query requires,
+    or from every indexed callable if it requires none (e.g. `not beta`).
+
+    Args:
+        query: A query string (see `tagquery`) or a compiled `TagQuery`.
+
+    Returns:
+        set[Callable]: The matching callables.
+    """
+    query = _as_query(query)
+    with _INDEX_LOCK:
+        if query.required:
+            # the key carried by the fewest tag sets
+            candidates = _members_of(_TAG_INDEX.get(min(query.required, key = lambda key: len(_TAG_INDEX.get(key, ())))))
+        else:
+            candidates = set().union(*(_members_of(refs) for refs in list(_TAG_INDEX.values())))
+    return {func for func in candidates if query(_tags_of(func))}
\ No newline at end of file
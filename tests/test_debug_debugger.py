@@ -3,6 +3,7 @@
 
 import pytest
 from chinodeco.debug.debugger import debug, trycatch, ArgumentCountError
+from chinodeco.debug.sinks import RingBufferSink, getdebugsink
 
 # ========== Tests for @debug ==========
 
@@ -14,6 +15,7 @@ def test_debug_basic_suppression(capfd):
     result = will_fail()
     assert result is None
 
+    getdebugsink().flush()
     out, _ = capfd.readouterr()
     assert "something broke" in out
     assert "[" not in out  # non-verbose 不含函数信息
@@ -24,6 +26,7 @@ def test_debug_verbose(capfd):
         raise RuntimeError("detailed")
     
     fail()
+    getdebugsink().flush()
     out, _ = capfd.readouterr()
     assert "detailed" in out
     assert "fail" in out
@@ -36,6 +39,55 @@ def test_debug_success():
     
     assert safe(4) == 8
 
+def test_debug_structured_records():
+    records = []
+
+    @debug(sink=records.append, traceback=True)
+    def explode():
+        raise KeyError("missing")
+
+    explode()
+    record, = records
+    assert record.qualname.endswith("explode")
+    assert record.module == __name__
+    assert record.exc_type == "KeyError"
+    assert record.message == "'missing'"
+    assert record.timestamp > 0
+    assert "raise KeyError" in record.traceback
+
+def test_ring_buffer_sink_drops_when_full():
+    import io
+    out = io.StringIO()
+    sink = RingBufferSink(2, file=out, thread=False)
+
+    @debug(sink=sink)
+    def fail(n):
+        raise ValueError(f"error {n}")
+
+    for i in range(5):
+        fail(i)
+    assert len(sink) == 2 and sink.dropped == 3
+    sink.flush()
+    assert out.getvalue() == "error 0\nerror 1\n"
+    assert len(sink) == 0
+
+def test_ring_buffer_sink_background_drain_to_logger(caplog):
+    import time
+    sink = RingBufferSink(logger="chinodeco.test", interval=0.01)
+
+    @debug(sink=sink, verbose=True)
+    def fail():
+        raise RuntimeError("logged")
+
+    with caplog.at_level("ERROR", logger="chinodeco.test"):
+        fail()
+        deadline = time.monotonic() + 2
+        while len(sink) or not caplog.records:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+    assert "logged" in caplog.records[0].getMessage()
+    assert "fail" in caplog.records[0].getMessage()
+
 
 # ========== Tests for @trycatch ==========
 
@@ -75,4 +127,201 @@ def test_trycatch_handler_argument_count():
         def dummy_func():
             raise ValueError("test")
 
-    assert "must accept exactly one argument" in str(e.value)
\ No newline at end of file
+    assert "must accept exactly one argument" in str(e.value)
+
+
+def test_aggregating_sink_rate_limits_per_fingerprint(monkeypatch):
+    from chinodeco.debug import sinks
+    now = {"t": 0.0}
+    monkeypatch.setattr(sinks.time, "monotonic", lambda: now["t"])
+    forwarded = []
+    aggregator = sinks.AggregatingSink(forwarded.append, window=1.0)
+
+    @debug(sink=aggregator)
+    def flaky(kind):
+        if kind == "key":
+            raise KeyError(kind)
+        raise ValueError(kind)
+
+    for _ in range(100):
+        flaky("value")
+    flaky("key")
+    assert [(r.exc_type, r.count) for r in forwarded] == [("ValueError", 1), ("KeyError", 1)]
+
+    now["t"] = 1.5
+    flaky("value")  # closes the first window
+    assert [(r.exc_type, r.count) for r in forwarded[2:]] == [("ValueError", 99), ("ValueError", 1)]
+    assert "(repeated 99 times)" in sinks.format_record(forwarded[2])
+
+    aggregator.flush()
+    top = aggregator.top(1)[0]
+    assert (top.exc_type, top.count, top.qualname.endswith("flaky")) == ("ValueError", 101, True)
+    assert top.location.endswith(f":{flaky.__wrapped__.__code__.co_firstlineno + 4}")
+
+
+def test_aggregating_sink_forwards_summary_when_window_ends(monkeypatch):
+    import threading
+    import time
+    from types import SimpleNamespace
+    from chinodeco.debug import sinks
+    now = {"t": 0.0}
+    timers = []
+
+    class Timer:
+        def __init__(self, delay, callback):
+            self.delay, self.callback, self.cancelled = delay, callback, False
+
+        def start(self):
+            timers.append(self)
+
+        def cancel(self):
+            self.cancelled = True
+
+    # replace the modules seen by sinks only, the clock is driven and the timer fired by the test,
+    # while the drain thread of the default sink keeps sleeping on the real clock
+    monkeypatch.setattr(sinks, "time", SimpleNamespace(monotonic=lambda: now["t"], sleep=time.sleep))
+    monkeypatch.setattr(sinks, "threading", SimpleNamespace(Timer=Timer, Lock=threading.Lock, Thread=threading.Thread))
+    forwarded = []
+    aggregator = sinks.AggregatingSink(forwarded.append, window=1.0)
+
+    @debug(sink=aggregator)
+    def flaky():
+        raise ValueError("again")
+
+    for _ in range(3):
+        flaky()
+    assert [r.count for r in forwarded] == [1]
+    assert [timer.delay for timer in timers] == [1.0]
+
+    # no further record arrives, the timer forwards the summary once the window is over
+    now["t"] = 1.0
+    timers[0].callback()
+    assert [r.count for r in forwarded] == [1, 2]
+    assert len(timers) == 1  # nothing left to forward, the timer is not rearmed
+    aggregator.flush()
+    assert len(forwarded) == 2
+    assert aggregator in sinks._AGGREGATING_SINKS
+
+
+# ========== Tests for native wrappers ==========
+
+def test_trycatch_coroutine_catches_while_awaiting():
+    import asyncio
+    import inspect
+
+    @trycatch(ValueError, lambda e: f"handled {e}")
+    async def fails():
+        await asyncio.sleep(0)
+        raise ValueError("late")
+
+    assert inspect.iscoroutinefunction(fails)
+    assert asyncio.run(fails()) == "handled late"
+
+def test_trycatch_generator_catches_during_iteration():
+    import inspect
+
+    @trycatch(ValueError, lambda e: "recovered")
+    def numbers():
+        yield 1
+        yield 2
+        raise ValueError("third")
+
+    assert inspect.isgeneratorfunction(numbers)
+    gen = numbers()
+    assert list(gen) == [1, 2]
+
+    gen = numbers()
+    next(gen)
+    with pytest.raises(StopIteration) as e:
+        next(gen), next(gen)
+    assert e.value.value == "recovered"
+
+def test_trycatch_generator_forwards_send_and_close():
+    closed = []
+
+    @trycatch(ValueError, lambda e: None)
+    def echo():
+        try:
+            received = yield "ready"
+            while True:
+                received = yield received * 2
+        finally:
+            closed.append(True)
+
+    gen = echo()
+    assert next(gen) == "ready"
+    assert gen.send(3) == 6
+    gen.close()
+    assert closed == [True]
+
+def test_debug_async_generator_suppresses_and_stops():
+    import asyncio
+    import inspect
+    records = []
+
+    @debug(sink=records.append)
+    async def ticks():
+        yield 1
+        await asyncio.sleep(0)
+        raise RuntimeError("broken stream")
+
+    async def main():
+        return [tick async for tick in ticks()]
+
+    assert inspect.isasyncgenfunction(ticks)
+    assert asyncio.run(main()) == [1]
+    assert [(r.exc_type, r.message) for r in records] == [("RuntimeError", "broken stream")]
+
+def test_debug_class_wraps_static_and_class_methods():
+    records = []
+
+    @debug(sink=records.append)
+    class Service:
+        @staticmethod
+        def parse(text):
+            return int(text)
+
+        @classmethod
+        def build(cls):
+            raise KeyError("missing")
+
+    assert Service.parse("x") is None
+    assert Service.build() is None
+    assert [r.exc_type for r in records] == ["ValueError", "KeyError"]
+
+def test_trycatch_mapping_picks_closest_handler():
+    class AppError(Exception):
+        pass
+
+    class NotFound(AppError, KeyError):
+        pass
+
+    @trycatch({
+        (KeyError, IndexError): lambda e: "lookup",
+        AppError: lambda e: "app",
+        Exception: lambda e: "other",
+    })
+    def fail(exc):
+        raise exc
+
+    assert fail(KeyError("k")) == "lookup"
+    assert fail(IndexError("i")) == "lookup"
+    assert fail(NotFound("n")) == "app"
+    assert fail(ValueError("v")) == "other"
+    with pytest.raises(KeyboardInterrupt):
+        fail(KeyboardInterrupt())
+
+def test_trycatch_mapping_validates_each_handler_once(monkeypatch):
+    from chinodeco.debug import debugger
+    checked = []
+    check = debugger._check_handler
+    monkeypatch.setattr(debugger, "_check_handler", lambda h: (checked.append(h), check(h)))
+
+    shared = lambda e: "shared"
+    trycatch({KeyError: shared, ValueError: shared, OSError: lambda e: None})
+    assert len(checked) == 2
+
+    with pytest.raises(ArgumentCountError):
+        trycatch({KeyError: shared, ValueError: lambda: None})
+    with pytest.raises(TypeError):
+        trycatch({KeyError: shared}, shared)
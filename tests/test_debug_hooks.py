@@ -0,0 +1,77 @@
+# !/usr/bin/env Python3
+# -*- coding:utf-8 -*-
+
+import asyncio
+import pytest
+from chinodeco import decochain, mapargs, memoize
+from chinodeco.debug import debug, trycatch
+from chinodeco.debug.hooks import addhook, removehook, gethooks
+from chinodeco.decodsl.control import foreach
+
+@pytest.fixture
+def events():
+    recorded = []
+    hooks = {
+        "enter": lambda layer, name: recorded.append(("enter", layer, name)),
+        "exit": lambda layer, name: recorded.append(("exit", layer, name)),
+        "exception": lambda layer, name, e: recorded.append(("exception", layer, type(e).__name__)),
+    }
+    for event, hook in hooks.items():
+        addhook(event, hook)
+    yield recorded
+    for event, hook in hooks.items():
+        removehook(event, hook)
+
+def test_hooks_report_every_layer(events):
+    @decochain(debug, mapargs((int, 0)))
+    def parse(x):
+        return x
+
+    assert parse("1") == 1
+    assert [(event, layer) for event, layer, _ in events] == [
+        ("enter", "decochain"), ("enter", "debug"), ("enter", "mapargs"),
+        ("exit", "mapargs"), ("exit", "debug"), ("exit", "decochain"),
+    ]
+    assert all(name == "test_hooks_report_every_layer.<locals>.parse" for _, _, name in events)
+
+def test_hooks_exceptions_async_and_handled(events):
+    @trycatch(KeyError, lambda e: "handled")
+    async def lookup():
+        raise KeyError("k")
+
+    @memoize
+    def square(x):
+        return x * x
+
+    assert asyncio.run(lookup()) == "handled"
+    assert events[:3] == [("enter", "trycatch", lookup.__qualname__), ("exception", "trycatch", "KeyError"), ("exit", "trycatch", lookup.__qualname__)]
+    square(3)
+    assert events[-1][:2] == ("exit", "memoize")
+
+    @foreach([1, 2])
+    def body():
+        raise ValueError("stop")
+
+    with pytest.raises(ValueError):
+        body()
+    assert events[-2:] == [("exception", "foreach", "ValueError"), ("exit", "foreach", body.__qualname__)]
+
+def test_wrappers_built_without_hooks_have_no_check():
+    calls = []
+    @debug
+    def before():
+        return 1
+
+    hook = addhook("enter", lambda layer, name: calls.append(name))
+    try:
+        @debug
+        def after():
+            return 2
+        before(), after()
+        assert calls == [after.__qualname__]
+        assert gethooks("enter") == (hook,)
+    finally:
+        assert removehook("enter", hook)
+    assert not removehook("enter", hook)
+    with pytest.raises(ValueError):
+        addhook("call", print)
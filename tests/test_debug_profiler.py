@@ -0,0 +1,79 @@
+# !/usr/bin/env Python3
+# -*- coding:utf-8 -*-
+
+import asyncio
+import json
+import pytest
+from chinodeco.debug.profiler import profile, Profiler, LogHistogram, getprofiler
+
+def test_log_histogram_quantiles_within_precision():
+    histogram = LogHistogram(precision=8)
+    for i in range(1, 1001):
+        histogram.record(i / 1000)
+    assert histogram.count == 1000
+    for q, expected in ((0.5, 0.5), (0.95, 0.95), (0.99, 0.99)):
+        assert abs(histogram.quantile(q) - expected) / expected < 2 ** (1 / 8) - 1
+    assert histogram.quantile(0) == pytest.approx(0.001, rel=0.1)
+    assert histogram.quantile(1) == 1.0
+    assert sum(count for _, count in histogram.buckets()) == 1000
+    assert LogHistogram().quantile(0.5) == 0.0
+
+def test_profile_sampling_and_report():
+    profiler = Profiler()
+
+    @profile(sample=4, profiler=profiler)
+    def work(n):
+        return sum(range(n))
+
+    for _ in range(10):
+        work(1000)
+    stats = profiler.report()[f"{__name__}.test_profile_sampling_and_report.<locals>.work"]
+    assert (stats.calls, stats.samples) == (10, 2)
+    assert 0 < stats.wall_p50 <= stats.wall_p99 and stats.wall_total > 0
+
+def test_profile_class_and_async_members():
+    profiler = Profiler()
+
+    @profile(profiler=profiler)
+    class Service:
+        def method(self):
+            return 1
+
+        @staticmethod
+        def static():
+            return 2
+
+        async def fetch(self):
+            await asyncio.sleep(0.01)
+            return 3
+
+        def stream(self):
+            yield from range(3)
+
+    service = Service()
+    assert (service.method(), Service.static(), asyncio.run(service.fetch()), list(service.stream())) == (1, 2, 3, [0, 1, 2])
+    report = profiler.report()
+    assert len(report) == 4
+    fetch = next(stats for name, stats in report.items() if name.endswith("Service.fetch"))
+    assert fetch.wall_p50 >= 0.009
+
+def test_profile_records_failed_calls_and_exports():
+    profiler = Profiler()
+
+    @profile(profiler=profiler)
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        fail()
+    name, = profiler.report()
+    assert json.loads(profiler.to_json())[name]["samples"] == 1
+
+    text = profiler.to_prometheus()
+    assert "# TYPE chinodeco_wall_seconds summary" in text
+    assert f'chinodeco_calls_total{{function="{name}"}} 1' in text
+    assert f'chinodeco_cpu_seconds{{function="{name}",quantile="0.99"}}' in text
+
+    profiler.reset()
+    assert profiler.report() == {}
+    assert isinstance(getprofiler(), Profiler)
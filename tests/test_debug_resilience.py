@@ -0,0 +1,208 @@
+# !/usr/bin/env Python3
+# -*- coding:utf-8 -*-
+
+import asyncio
+import threading
+from types import SimpleNamespace
+import pytest
+from chinodeco.debug import resilience
+from chinodeco.debug.resilience import retry, circuitbreaker
+from chinodeco.debug.errors import CircuitOpenError
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = {"t": 0.0}
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now["t"] += seconds
+
+    async def async_sleep(seconds):
+        sleep(seconds)
+
+    # replace the modules seen by resilience only, other threads keep the real clock
+    monkeypatch.setattr(resilience, "time", SimpleNamespace(monotonic=lambda: now["t"], sleep=sleep))
+    monkeypatch.setattr(resilience, "asyncio", SimpleNamespace(sleep=async_sleep))
+    now["sleeps"] = sleeps
+    return now
+
+# ========== Tests for @retry ==========
+
+def test_retry_backoff_until_success(clock):
+    calls = []
+
+    @retry(ConnectionError, attempts=4, delay=0.1, factor=2, jitter=False)
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ConnectionError("down")
+        return "ok"
+
+    assert flaky() == "ok"
+    assert clock["sleeps"] == [0.1, 0.2]
+
+def test_retry_exhausted_and_unmatched(clock):
+    @retry(ConnectionError, attempts=3, delay=1, max_delay=1.5, jitter=False)
+    def down():
+        raise ConnectionError("down")
+
+    with pytest.raises(ConnectionError):
+        down()
+    assert clock["sleeps"] == [1, 1.5]
+
+    @retry(ConnectionError)
+    def broken():
+        raise ValueError("bug")
+
+    with pytest.raises(ValueError):
+        broken()
+
+def test_retry_deadline_and_jitter(clock):
+    @retry(attempts=10, delay=1, deadline=2.5)
+    def down():
+        raise OSError("down")
+
+    with pytest.raises(OSError):
+        down()
+    assert all(0 <= s <= 2 for s in clock["sleeps"]) and sum(clock["sleeps"]) <= 2.5
+
+def test_retry_async(clock):
+    calls = []
+
+    @retry(attempts=2, delay=0.5, jitter=False)
+    async def flaky():
+        calls.append(1)
+        if len(calls) == 1:
+            raise TimeoutError
+        return len(calls)
+
+    assert asyncio.run(flaky()) == 2
+    assert clock["sleeps"] == [0.5]
+
+def test_retry_rejects_generators():
+    with pytest.raises(TypeError):
+        @retry()
+        def gen():
+            yield 1
+    with pytest.raises(ValueError):
+        retry(attempts=0)
+    with pytest.raises(ValueError):
+        retry(attempts=True)
+
+# ========== Tests for @circuitbreaker ==========
+
+def test_circuitbreaker_opens_half_opens_and_closes(clock):
+    outcome = {"fail": True}
+
+    @circuitbreaker(ConnectionError, failure_rate=0.5, window=4, min_calls=4, reset_timeout=10)
+    def call():
+        if outcome["fail"]:
+            raise ConnectionError("down")
+        return "ok"
+
+    assert call.breaker.state == "closed"
+    for _ in range(4):
+        with pytest.raises(ConnectionError):
+            call()
+    assert call.breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        call()
+
+    clock["t"] = 10
+    assert call.breaker.state == "half_open"
+    with pytest.raises(ConnectionError):
+        call()  # failed trial
+    assert call.breaker.state == "open"
+
+    clock["t"] = 20
+    outcome["fail"] = False
+    assert call() == "ok"
+    assert call.breaker.state == "closed"
+
+def test_circuitbreaker_failure_rate_window(clock):
+    breaker = circuitbreaker(KeyError, failure_rate=0.75, window=4, min_calls=2)
+
+    @breaker
+    def lookup(fail):
+        if fail:
+            raise KeyError(fail)
+        return fail
+
+    # the window holds the last 4 outcomes: 2 failures out of 4 stays below 0.75
+    for fail in (1, 0, 0, 1):
+        try:
+            lookup(fail)
+        except KeyError:
+            pass
+    assert breaker.state == "closed"
+    for fail in (1, 1):
+        with pytest.raises(KeyError):
+            lookup(fail)
+    assert breaker.state == "open"
+    breaker.reset()
+    assert lookup(0) == 0
+
+def test_circuitbreaker_async_and_threads(clock):
+    breaker = circuitbreaker(window=100, min_calls=100)
+    counter = {"n": 0}
+
+    @breaker
+    def work():
+        counter["n"] += 1
+
+    threads = [threading.Thread(target=lambda: [work() for _ in range(200)]) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert counter["n"] == 800 and breaker.state == "closed"
+
+    @circuitbreaker(min_calls=1, window=1)
+    async def fail():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(fail())
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(fail())
+
+def test_circuitbreaker_interrupted_calls_are_not_successes(clock):
+    @circuitbreaker(ConnectionError, failure_rate=0.5, window=2, min_calls=2, reset_timeout=10)
+    async def call(mode):
+        if mode == "fail":
+            raise ConnectionError("down")
+        if mode == "hang":
+            await asyncio.Event().wait()
+        if mode == "interrupt":
+            raise KeyboardInterrupt
+        return "ok"
+
+    async def cancelled_trial():
+        task = asyncio.ensure_future(call("hang"))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            asyncio.run(call("fail"))
+    assert call.breaker.state == "open"
+
+    clock["t"] = 10
+    asyncio.run(cancelled_trial())
+    assert call.breaker.state == "open"  # the cancelled trial did not close the breaker
+
+    clock["t"] = 20
+    assert asyncio.run(call("ok")) == "ok"
+    assert call.breaker.state == "closed"
+
+    # interrupted calls do not dilute the failures of the window
+    with pytest.raises(ConnectionError):
+        asyncio.run(call("fail"))
+    with pytest.raises(KeyboardInterrupt):
+        asyncio.run(call("interrupt"))
+    with pytest.raises(ConnectionError):
+        asyncio.run(call("fail"))
+    assert call.breaker.state == "open"
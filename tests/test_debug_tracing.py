@@ -0,0 +1,128 @@
+# !/usr/bin/env Python3
+# -*- coding:utf-8 -*-
+
+import asyncio
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from chinodeco import decochain, setargs, mapargs
+from chinodeco.debug import debug
+from chinodeco.debug.tracing import (
+    enabletracing, disabletracing, currentspan, bindcontext, span,
+    JSONLExporter, ChromeTraceExporter
+)
+from chinodeco.decodsl.control import when
+from chinodeco.decodsl.registry import CommandDispatcher
+
+@pytest.fixture
+def spans():
+    collected = []
+    enabletracing(collected.append)
+    yield collected
+    disabletracing()
+
+def test_tracing_off_builds_plain_wrappers():
+    def func():
+        return 1
+    assert decochain(None)(func) is func
+
+    @setargs((2, 0))
+    def inner(x):
+        return currentspan()
+
+    assert inner(1) is None
+
+def test_spans_nest_across_layers(spans):
+    @decochain(debug, mapargs((int, "x")))
+    def parse(x):
+        return currentspan().layer
+
+    assert parse("3") == "mapargs"
+    assert [(s.layer, s.name.endswith("parse")) for s in spans] == [("mapargs", True), ("debug", True), ("decochain", True)]
+    mapped, debugged, chained = spans
+    assert (chained.parent_id, debugged.parent_id, mapped.parent_id) == (None, chained.span_id, debugged.span_id)
+    assert all(s.end >= s.start and s.error is None for s in spans)
+
+def test_spans_async_tasks_and_executor(spans):
+    @when(True)(debug)
+    async def child(i):
+        await asyncio.sleep(0)
+        return currentspan().span_id
+
+    @debug
+    async def parent():
+        return await asyncio.gather(child(1), child(2))
+
+    asyncio.run(parent())
+    root = next(s for s in spans if s.name.endswith("parent"))
+    children = [s for s in spans if s.name.endswith("child") and s.layer == "when"]
+    assert len(children) == 2 and all(s.parent_id == root.span_id for s in children)
+
+    with span("batch") as outer:
+        with ThreadPoolExecutor(1) as pool:
+            inner = pool.submit(bindcontext(currentspan)).result()
+    assert inner is outer
+
+def test_suspended_generators_leave_the_caller_span(spans):
+    @debug
+    def numbers():
+        yield currentspan().name
+        yield currentspan().name
+
+    @debug
+    async def anumbers():
+        yield currentspan().name
+
+    @debug
+    def other():
+        return currentspan()
+
+    gen = numbers()
+    assert next(gen).endswith("numbers")
+    sibling = other()
+    assert sibling.parent_id is None
+    assert currentspan() is None
+    assert next(gen).endswith("numbers")
+    assert list(gen) == []
+
+    async def main():
+        agen = anumbers()
+        assert (await agen.__anext__()).endswith("anumbers")
+        assert other().parent_id is None
+        await agen.aclose()
+        return currentspan()
+
+    assert asyncio.run(main()) is None
+    assert currentspan() is None
+    assert all(s.end is not None for s in spans)
+
+def test_dispatcher_span_and_errors(spans):
+    dispatcher = CommandDispatcher()
+
+    @dispatcher.register("user add")
+    def add(name):
+        raise ValueError(name)
+
+    with pytest.raises(ValueError):
+        dispatcher.run("user add bob")
+    assert (spans[-1].name, spans[-1].layer, spans[-1].error) == ("user add", "dispatcher", "ValueError")
+
+def test_exporters():
+    stream = io.StringIO()
+    exporter = JSONLExporter(stream)
+    chrome = ChromeTraceExporter(io.StringIO())
+    enabletracing(lambda s: (exporter(s), chrome(s)))
+    try:
+        @debug
+        def work():
+            return 1
+        work()
+    finally:
+        disabletracing()
+
+    record = json.loads(stream.getvalue())
+    assert record["layer"] == "debug" and record["parent_id"] is None
+    chrome.close()
+    event, = json.loads(chrome.file.getvalue())["traceEvents"]
+    assert (event["ph"], event["cat"], event["dur"] >= 0) == ("X", "debug", True)
@@ -0,0 +1,197 @@
+# !/usr/bin/env Python3
+# -*- coding:utf-8 -*-
+
+import asyncio
+import threading
+import pytest
+
+from chinodeco.decodsl import microbatch, BatchInfo
+
+def test_microbatch_async_coalesces_calls():
+    batches = []
+
+    @microbatch(max_delay=0)
+    async def square(keys):
+        batches.append(list(keys))
+        return [key * key for key in keys]
+
+    async def main():
+        return await asyncio.gather(*(square(i) for i in range(5)))
+
+    assert asyncio.run(main()) == [0, 1, 4, 9, 16]
+    assert batches == [[0, 1, 2, 3, 4]]
+    assert asyncio.iscoroutinefunction(square)
+
+def test_microbatch_async_max_size_and_metrics():
+    batches = []
+
+    @microbatch(max_size=2, max_delay=10)
+    async def echo(keys):
+        batches.append(list(keys))
+        return keys
+
+    # both batches are flushed by the caller filling them, long before max_delay
+    async def main():
+        return await asyncio.wait_for(asyncio.gather(*(echo(i) for i in range(4))), 1)
+
+    assert asyncio.run(main()) == [0, 1, 2, 3]
+    assert batches == [[0, 1], [2, 3]]
+    info = echo.batch_info()
+    assert isinstance(info, BatchInfo)
+    assert (info.calls, info.batches, info.keys, info.full, info.maxsize) == (4, 2, 4, 2, 2)
+    assert info.sizes == {2: 2}
+    echo.batch_info_clear()
+    assert echo.batch_info().calls == 0
+
+def test_microbatch_dedupe_identical_keys():
+    batches = []
+
+    @microbatch(max_delay=0)
+    async def load(keys):
+        batches.append(list(keys))
+        return list(keys)
+
+    async def main():
+        return await asyncio.gather(load(1), load(2), load(1), load([3]), load([3]))
+
+    assert asyncio.run(main()) == [1, 2, 1, [3], [3]]
+    assert batches == [[1, 2, [3]]]
+    assert load.batch_info().deduplicated == 2
+
+def test_microbatch_mapping_results_and_per_key_errors():
+    @microbatch(max_delay=0, dedupe=False)
+    async def users(ids):
+        return {i: ValueError(i) if i < 0 else f"user{i}" for i in ids if i != 404}
+
+    async def main():
+        return await asyncio.gather(users(1), users(-1), users(404), users(1), return_exceptions=True)
+
+    ok, bad, missing, again = asyncio.run(main())
+    assert ok == again == "user1"
+    assert isinstance(bad, ValueError)
+    assert isinstance(missing, KeyError)
+    assert users.batch_info().keys == 4
+
+def test_microbatch_batch_error_and_length_mismatch():
+    @microbatch(max_delay=0)
+    async def broken(keys):
+        raise RuntimeError("down")
+
+    @microbatch(max_delay=0)
+    async def short(keys):
+        return keys[:-1]
+
+    async def main():
+        first = await asyncio.gather(broken(1), broken(2), return_exceptions=True)
+        second = await asyncio.gather(short(1), short(2), return_exceptions=True)
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert all(isinstance(e, RuntimeError) for e in first)
+    assert all(isinstance(e, ValueError) for e in second)
+
+def test_microbatch_async_cancelled_caller_keeps_batch():
+    @microbatch(max_delay=0.01)
+    async def slow(keys):
+        await asyncio.sleep(0.01)
+        return keys
+
+    async def main():
+        cancelled = asyncio.ensure_future(slow(1))
+        kept = asyncio.ensure_future(slow(1))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        return await kept
+
+    assert asyncio.run(main()) == 1
+
+def test_microbatch_pending_batch_does_not_keep_its_loop_alive():
+    import gc
+    import weakref
+
+    @microbatch(max_delay=60)
+    async def echo(keys):
+        return keys
+
+    loop = asyncio.new_event_loop()
+    task = loop.create_task(echo(1))
+    loop.run_until_complete(asyncio.sleep(0))  # the call is queued, its batch never flushes
+    assert not task.done()
+    ref = weakref.ref(loop)
+    loop.close()
+    del loop, task
+    gc.collect()
+    assert ref() is None
+
+def test_microbatch_async_callmany():
+    batches = []
+
+    @microbatch(max_size=3, max_delay=10)
+    async def echo(keys):
+        batches.append(list(keys))
+        return keys
+
+    assert asyncio.run(echo.callmany(range(4))) == [0, 1, 2, 3]
+    assert batches == [[0, 1, 2], [3]]
+
+def test_microbatch_sync_threads_share_batches():
+    batches = []
+    barrier = threading.Barrier(4)
+    results = {}
+
+    @microbatch(max_size=4, max_delay=5)
+    def double(keys):
+        batches.append(list(keys))
+        return [key * 2 for key in keys]
+
+    def worker(i):
+        barrier.wait()
+        results[i] = double(i)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(2)
+
+    assert results == {0: 0, 1: 2, 2: 4, 3: 6}
+    assert len(batches) == 1 and sorted(batches[0]) == [0, 1, 2, 3]
+    assert double.batch_info().full == 1
+
+def test_microbatch_sync_single_caller_and_callmany():
+    batches = []
+
+    @microbatch(max_size=2, max_delay=0)
+    def echo(keys):
+        batches.append(list(keys))
+        return keys
+
+    assert echo("a") == "a"
+    assert echo.callmany(["b", "b", "c", "d"]) == ["b", "b", "c", "d"]
+    assert batches == [["a"], ["b", "c"], ["d"]]
+    info = echo.batch_info()
+    assert (info.calls, info.batches, info.deduplicated, info.sizes) == (5, 3, 1, {1: 2, 2: 1})
+
+def test_microbatch_sync_error_reaches_every_caller():
+    @microbatch(max_delay=0)
+    def broken(keys):
+        raise ConnectionError("down")
+
+    with pytest.raises(ConnectionError):
+        broken(1)
+    with pytest.raises(ConnectionError):
+        broken.callmany([1, 2])
+
+def test_microbatch_invalid_arguments():
+    with pytest.raises(ValueError):
+        microbatch(max_size=0)
+    with pytest.raises(ValueError):
+        microbatch(max_delay=-1)
+    with pytest.raises(TypeError):
+        microbatch(3)
+
+    def gen(keys):
+        yield keys
+
+    with pytest.raises(TypeError):
+        microbatch(gen)
@@ -3,7 +3,28 @@
 
 import pytest
 
-from chinodeco.decodsl.control import when, whileloop, foreach
+from chinodeco.decodsl.control import when, whileloop, asyncwhileloop, foreach
+
+# process mode bodies must be importable by the workers, so they live at module level
+
+@foreach(range(10), item=True, mode="process", chunksize=3)
+def _cube(x, offset=0):
+    import os
+    return x ** 3 + offset, os.getpid()
+
+@foreach([1, 2, 0, 4], item=True, mode="process", chunksize=1, ordered=False)
+def _invert(x):
+    return 1 / x
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+if numpy is not None:
+    @foreach(numpy.arange(12).reshape(6, 2), item=True, mode="process", chunksize=2)
+    def _row_sum(row):
+        return int(row.sum()), row.flags.owndata
 
 def test_when_true_applies_decorator():
     def uppercase(func):
@@ -46,6 +67,157 @@ def test_when_false_elsedeco_applied():
     
     assert greet() == "SUCCESS"
 
+def _tagging(label):
+    def deco(func):
+        def wrapper(*args, **kwargs):
+            return (label, func(*args, **kwargs))
+        return wrapper
+    return deco
+
+def test_when_dynamic_switches_prebuilt_branches():
+    flags = {"on": False}
+    built = []
+
+    def traced(func):
+        built.append(func)
+        return _tagging("on")(func)
+
+    @when(lambda: flags["on"], dynamic=True)(traced).elsedeco(_tagging("off"))
+    def double(x):
+        return x * 2
+
+    assert double(2) == ("off", 4)
+    flags["on"] = True
+    assert double(3) == ("on", 6)
+    flags["on"] = False
+    assert double(1) == ("off", 2)
+    assert len(built) == 1
+    assert double.__name__ == "double"
+
+def test_when_dynamic_without_elsedeco_calls_func():
+    flags = {"on": False}
+
+    @when(lambda: flags["on"], dynamic=True)(_tagging("on"))
+    def one():
+        return 1
+
+    assert one() == 1
+    flags["on"] = True
+    assert one() == ("on", 1)
+
+def test_when_dynamic_ttl_caches_predicate(monkeypatch):
+    import chinodeco.decodsl.control as control
+    now = [100.0]
+    monkeypatch.setattr(control.time, "monotonic", lambda: now[0])
+    calls = []
+    flags = {"on": True}
+
+    def predicate():
+        calls.append(1)
+        return flags["on"]
+
+    @when(predicate, ttl=5.0)(_tagging("on"))
+    def one():
+        return 1
+
+    assert one() == ("on", 1)
+    flags["on"] = False
+    assert one() == ("on", 1)
+    assert len(calls) == 1
+    now[0] += 5.0
+    assert one() == 1
+    assert len(calls) == 2
+    flags["on"] = True
+    one.refresh()
+    assert one() == ("on", 1)
+    assert len(calls) == 3
+
+def test_when_dynamic_version_invalidates():
+    version = [0]
+    calls = []
+    flags = {"on": False}
+
+    def predicate():
+        calls.append(1)
+        return flags["on"]
+
+    @when(predicate, version=lambda: version[0])(_tagging("on"))
+    def one():
+        return 1
+
+    assert [one(), one()] == [1, 1]
+    flags["on"] = True
+    assert one() == 1
+    version[0] += 1
+    assert one() == ("on", 1)
+    assert len(calls) == 2
+
+def test_when_dynamic_keeps_function_kind():
+    import asyncio
+    import inspect
+    flags = {"on": True}
+
+    def plus_one(func):
+        if inspect.iscoroutinefunction(func):
+            async def wrapper(*args):
+                return await func(*args) + 1
+        else:
+            def wrapper(*args):
+                return (value + 1 for value in func(*args))
+        return wrapper
+
+    @when(lambda: flags["on"], dynamic=True)(plus_one)
+    async def coro(x):
+        return x
+
+    @when(lambda: flags["on"], dynamic=True)(plus_one)
+    def gen(n):
+        yield from range(n)
+
+    assert inspect.iscoroutinefunction(coro)
+    assert inspect.isgeneratorfunction(gen)
+    assert asyncio.run(coro(1)) == 2
+    assert list(gen(3)) == [1, 2, 3]
+    flags["on"] = False
+    assert asyncio.run(coro(1)) == 1
+    assert list(gen(3)) == [0, 1, 2]
+
+def test_when_dynamic_async_generator_forwards_asend_and_athrow():
+    import asyncio
+    import inspect
+    received = []
+
+    @when(lambda: True, dynamic=True)(lambda f: f)
+    async def echo():
+        value = "start"
+        while True:
+            try:
+                value = yield value
+            except KeyError as e:
+                value = f"caught {e.args[0]}"
+            finally:
+                received.append(value)
+
+    async def main():
+        agen = echo()
+        first = await agen.__anext__()
+        sent = await agen.asend("ping")
+        thrown = await agen.athrow(KeyError("boom"))
+        await agen.aclose()
+        return first, sent, thrown
+
+    assert inspect.isasyncgenfunction(echo)
+    assert asyncio.run(main()) == ("start", "ping", "caught boom")
+    assert received[-1] == "caught boom"
+
+def test_when_dynamic_invalid_arguments():
+    with pytest.raises(TypeError):
+        when(True, dynamic=True)
+    with pytest.raises(ValueError):
+        when(lambda: True, ttl=0)
+    with pytest.raises(TypeError):
+        when(lambda: True, version=3)
+
 def test_whileloop_static_true_runs_n_times():
     count = {"value": 0}
     @whileloop(True, max_loops=3)
@@ -105,4 +277,354 @@ def test_foreach_invalid_iter_type():
         @foreach(iter=123)
         def fail(): pass
 
-        fail()
\ No newline at end of file
+        fail()
+
+def test_foreach_passes_items():
+    @foreach([1, 2, 3], item=True)
+    def square(x, offset=0):
+        return x * x + offset
+
+    @foreach("ab", item="char")
+    def repeat(times, char=None):
+        return char * times
+
+    assert square(offset=1) == [2, 5, 10]
+    assert repeat(2) == ["aa", "bb"]
+
+def test_foreach_thread_mode_ordered_and_concurrent():
+    import threading
+    import time
+    barrier = threading.Barrier(4, timeout=5)
+
+    @foreach(range(8), item=True, mode="thread", concurrency=4)
+    def work(i):
+        if i < 4:
+            barrier.wait()  # would time out if the first four did not run concurrently
+        time.sleep(0.001 * (8 - i))
+        return i * 10
+
+    assert work() == [i * 10 for i in range(8)]
+
+def test_foreach_thread_mode_first_error_cancels_rest():
+    import time
+    started = []
+
+    @foreach(range(100), item=True, mode="thread", concurrency=1)
+    def work(i):
+        started.append(i)
+        if i == 2:
+            raise ValueError(i)
+        time.sleep(0.01)
+        return i
+
+    with pytest.raises(ValueError):
+        work()
+    assert len(started) < 50
+
+def test_foreach_thread_mode_executor_and_shared_pool():
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+    names = set()
+
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="given") as executor:
+        @foreach(range(4), item=True, mode="thread", executor=executor)
+        def on_given(i):
+            names.add(threading.current_thread().name)
+            return i
+
+        assert on_given() == [0, 1, 2, 3]
+        assert on_given() == [0, 1, 2, 3]  # the given executor is not shut down
+    assert names and all(name.startswith("given") for name in names)
+
+    idents = []
+
+    @foreach(range(4), mode="thread", concurrency=1)
+    def on_default():
+        idents.append(threading.get_ident())
+
+    on_default()
+    on_default()
+    assert len(set(idents)) == 1  # one pool for every call
+
+    with pytest.raises(ValueError):
+        foreach([1], mode="thread", concurrency=2, executor=ThreadPoolExecutor())
+
+def test_foreach_async_mode():
+    import asyncio
+    running = {"now": 0, "peak": 0}
+
+    @foreach([3, 1, 2], item=True, mode="async", concurrency=2)
+    async def fetch(delay):
+        running["now"] += 1
+        running["peak"] = max(running["peak"], running["now"])
+        await asyncio.sleep(delay / 100)
+        running["now"] -= 1
+        return delay
+
+    assert asyncio.run(fetch()) == [3, 1, 2]
+    assert running["peak"] == 2
+
+    cancelled = []
+
+    @foreach(range(3), item=True, mode="async")
+    async def fail(i):
+        try:
+            await asyncio.sleep(0 if i == 0 else 1)
+        except asyncio.CancelledError:
+            cancelled.append(i)
+            raise
+        raise KeyError(i)
+
+    with pytest.raises(KeyError):
+        asyncio.run(fail())
+    assert cancelled == [1, 2]
+
+def test_foreach_mode_validation():
+    with pytest.raises(ValueError):
+        foreach([1], mode="process-ish")
+    with pytest.raises(ValueError):
+        foreach([1], mode="thread", concurrency=0)
+    with pytest.raises(TypeError):
+        @foreach([1], mode="async")
+        def sync(): pass
+    with pytest.raises(TypeError):
+        @foreach([1], mode="thread")
+        async def coro(): pass
+
+def test_foreach_process_mode_ordered():
+    import os
+    results = _cube(offset=1)
+    assert [value for value, _ in results] == [x ** 3 + 1 for x in range(10)]
+    assert all(pid != os.getpid() for _, pid in results)
+
+def test_foreach_process_mode_propagates_errors():
+    with pytest.raises(ZeroDivisionError):
+        _invert()
+
+@pytest.mark.skipif(numpy is None, reason="numpy is not installed")
+def test_foreach_process_mode_shared_numpy_rows():
+    results = _row_sum()
+    assert [total for total, _ in results] == [1, 5, 9, 13, 17, 21]
+    assert not any(owndata for _, owndata in results)  # workers iterate over views
+
+def test_foreach_process_mode_validation():
+    with pytest.raises(ValueError):
+        foreach([1], mode="process", concurrency=2)
+    with pytest.raises(ValueError):
+        foreach([1], mode="process", chunksize=0)
+    with pytest.raises(TypeError):
+        @foreach([1], mode="process")
+        async def coro(): pass
+
+def _negate(x):
+    return -x
+
+def test_foreach_process_mode_sizes_chunks_without_reading_the_executor():
+    import os
+    from concurrent.futures import Executor, Future
+
+    class Inline(Executor):
+        _max_workers = 1000  # private, must not be used to size the chunks
+
+        def __init__(self):
+            self.submitted = 0
+
+        def submit(self, fn, *args, **kwargs):
+            self.submitted += 1
+            future = Future()
+            future.set_result(fn(*args, **kwargs))
+            return future
+
+    workers = os.cpu_count() or 1
+    executor = Inline()
+    negate = foreach(range(8 * workers), item=True, mode="process", executor=executor)(_negate)
+    assert negate() == [-x for x in range(8 * workers)]
+    assert executor.submitted == 4 * workers  # four chunks per CPU for a given executor
+
+def test_foreach_stream_yields_lazily():
+    import inspect
+    produced = []
+
+    @foreach(range(1000000), item=True, stream=True)
+    def square(x):
+        produced.append(x)
+        return x * x
+
+    gen = square()
+    assert inspect.isgenerator(gen) and produced == []
+    assert [next(gen) for _ in range(3)] == [0, 1, 4]
+    assert produced == [0, 1, 2]
+
+def test_foreach_and_whileloop_reduce():
+    import operator
+
+    @foreach(range(1, 5), item=True, reduce=operator.add)
+    def identity(x):
+        return x
+
+    @foreach([], item=True, reduce=operator.add, initial=10)
+    def nothing(x):
+        return x
+
+    assert identity() == 10
+    assert nothing() == 10
+
+    state = {"n": 0}
+
+    def step():
+        state["n"] += 1
+        return state["n"]
+
+    counted = whileloop(lambda: state["n"] < 4, reduce=max, initial=0)(step)
+    assert counted() == 4
+
+    with pytest.raises(TypeError):
+        foreach([], reduce=operator.add)(step)()
+    with pytest.raises(ValueError):
+        foreach([1], stream=True, reduce=operator.add)
+    with pytest.raises(ValueError):
+        foreach([1], mode="thread", stream=True)
+
+def test_async_stream_for_foreach_and_whileloop():
+    import asyncio
+    import inspect
+
+    @foreach([1, 2, 3], item=True, stream=True)
+    async def double(x):
+        await asyncio.sleep(0)
+        return x * 2
+
+    remaining = {"n": 2}
+
+    @whileloop(lambda: remaining["n"] > 0, stream=True)
+    async def countdown():
+        remaining["n"] -= 1
+        return remaining["n"]
+
+    async def main():
+        return [x async for x in double()], [x async for x in countdown()]
+
+    assert inspect.isasyncgenfunction(double) and inspect.isasyncgenfunction(countdown)
+    assert asyncio.run(main()) == ([2, 4, 6], [1, 0])
+
+def test_loop_wrapper_is_built_once():
+    built = []
+
+    def counting(func):
+        built.append(func)
+        return func
+
+    @foreach(range(5), loop_wrapper=counting)
+    def body():
+        return 1
+
+    remaining = {"n": 3}
+
+    def step():
+        remaining["n"] -= 1
+
+    looped = whileloop(lambda: remaining["n"] > 0, loop_wrapper=counting)(step)
+    assert len(built) == 2
+    assert body() == [1] * 5
+    looped()
+    assert len(built) == 2 and remaining["n"] == 0
+
+def test_asyncwhileloop_polls_with_backoff(monkeypatch):
+    import asyncio
+    from chinodeco.decodsl import control
+    sleeps = []
+
+    async def fake_sleep(seconds):
+        sleeps.append(seconds)
+
+    monkeypatch.setattr(control.asyncio, "sleep", fake_sleep)
+    state = {"polls": 0}
+
+    async def not_ready():
+        return state["polls"] < 6
+
+    @asyncwhileloop(not_ready, interval=0.1, backoff=2, max_interval=0.5)
+    def poll():
+        state["polls"] += 1
+        return state["polls"]
+
+    assert asyncio.run(poll()) == [1, 2, 3, 4, 5, 6]
+    assert sleeps == [0.1, 0.2, 0.4, 0.5, 0.5]
+
+def test_asyncwhileloop_deadline_and_else():
+    import asyncio
+    calls = []
+
+    @asyncwhileloop(True, interval=0.02, deadline=0.05, max_loops=100)
+    async def forever():
+        calls.append(1)
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(forever())
+    assert 1 <= len(calls) <= 4
+
+    fallback = []
+
+    async def record():
+        fallback.append(True)
+
+    never = asyncwhileloop(False).elsedo(record)(lambda: None)
+    assert asyncio.run(never()) == [] and fallback == [True]
+
+    with pytest.raises(ValueError):
+        asyncwhileloop(True, backoff=0.5)
+
+def test_asyncwhileloop_finished_loop_ignores_deadline():
+    import asyncio
+    state = {"done": False}
+
+    @asyncwhileloop(lambda: not state["done"], interval=0.5, deadline=0.3)
+    async def finish():
+        state["done"] = True
+        return "finished"
+
+    assert asyncio.run(finish()) == ["finished"]
+
+def test_foreach_chunk_slices_and_concatenates():
+    seen = []
+
+    @foreach([1, 2, 3, 4, 5], chunk=2)
+    def double(values):
+        seen.append(values)
+        return [v * 2 for v in values]
+
+    @foreach(iter(range(5)), chunk=3)
+    def total(values):
+        return sum(values)
+
+    assert double() == [2, 4, 6, 8, 10]
+    assert seen == [[1, 2], [3, 4], [5]]
+    assert total() == [3, 7]
+
+def test_foreach_chunk_zero_copy_views():
+    data = bytearray(b"abcdef")
+    views = []
+
+    @foreach(memoryview(data), chunk=4, item="block")
+    def upper(block):
+        views.append(block)
+        return bytes(block).upper()
+
+    assert upper() == [b"ABCD", b"EF"]
+    assert all(isinstance(v, memoryview) and v.obj is data for v in views)
+
+@pytest.mark.skipif(numpy is None, reason="numpy is not installed")
+def test_foreach_chunk_numpy_views_thread_mode():
+    array = numpy.arange(10, dtype=float)
+
+    @foreach(array, chunk=4, mode="thread", concurrency=2)
+    def scale(view):
+        assert view.base is array
+        return view * 2
+
+    result = scale()
+    assert isinstance(result, numpy.ndarray)
+    assert result.tolist() == [x * 2 for x in range(10)]
+
+    with pytest.raises(ValueError):
+        foreach(array, chunk=4, mode="process")
@@ -127,4 +127,53 @@ def test_command_terminated_by_quoted_token_even_if_subcommand_exists():
 
     result = dispatcher.run('cmd1 cmd2 "cmd3"')
 
-    assert result == "received: cmd3"
\ No newline at end of file
+    assert result == "received: cmd3"
+
+def test_tagquery_option_authorization():
+    from chinodeco.pretreat.tagging import tag, tagquery
+    from chinodeco.debug.errors import AuthorizationError
+    dispatcher = CommandDispatcher()
+
+    @dispatcher.register("drop", tag(("role", "admin"), ("tier", 1)))
+    def drop():
+        return "dropped"
+
+    assert dispatcher.run("drop", tagquery("role == 'admin' and tier >= 1")) == "dropped"
+    with pytest.raises(AuthorizationError):
+        dispatcher.run("drop", tagquery("tier >= 2"))
+
+def test_asyncrun_awaits_authorized_coroutine_handlers():
+    import asyncio
+    from chinodeco.pretreat.tagging import tag, tagquery
+    from chinodeco.debug.errors import AuthorizationError
+    dispatcher = CommandDispatcher()
+
+    @dispatcher.register("purge", tag(("role", "admin")))
+    async def purge():
+        await asyncio.sleep(0)
+        return "purged"
+
+    assert asyncio.run(dispatcher.asyncrun("purge", tagquery("role == 'admin'"))) == "purged"
+    assert asyncio.run(dispatcher.asyncrun("purge", ("role", "admin"))) == "purged"
+    assert asyncio.run(dispatcher.asyncrun("purge", "missing", "role")) == "purged"
+    with pytest.raises(AuthorizationError):
+        asyncio.run(dispatcher.asyncrun("purge", tagquery("role == 'user'")))
+
+def test_options_read_tags_through_wrappers():
+    from functools import wraps
+    from chinodeco.pretreat.tagging import tag, settags
+
+    def logged(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            return f(*args, **kwargs)
+        return wrapper
+
+    dispatcher = CommandDispatcher()
+
+    @dispatcher.register("stats", logged, tag("user"))
+    def stats():
+        return "ok"
+
+    settags(stats, "admin")  # tagged after registration, on the inner function
+    assert dispatcher.run("stats", "admin") == "ok"
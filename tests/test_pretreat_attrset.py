@@ -7,7 +7,11 @@ from chinodeco.pretreat.tagging import (
     haskey, haskeys,
     hastag, hastags,
     gettag, gettags,
-    deltags, alltags
+    deltags, alltags,
+    tagged, tagquery,
+    matchtags, findtagged,
+    tagversion, ontagchange,
+    offtagchange
 )
 
 # 测试用函数
@@ -75,4 +79,278 @@ def test_missing_tags_behavior():
     assert gettags(f, "a", "b") == {}
     assert hastag(f, "any") is False
     assert hastags(f, "a", "b") is False
-    assert alltags(f) == {}
\ No newline at end of file
+    assert alltags(f) == {}
+
+def test_tagged_reverse_index():
+    @tag(("role", "admin"), "beta")
+    def admin(): pass
+
+    @tag(("role", "user"))
+    def user(): pass
+
+    assert tagged("role") >= {admin, user}
+    assert admin in tagged("role", "admin") and user not in tagged("role", "admin")
+    assert admin in tagged("beta")
+
+    settags(admin, ("role", "user"))
+    assert admin not in tagged("role", "admin")
+    assert admin in tagged("role", "user")
+
+    deltags(admin, "beta")
+    assert admin not in tagged("beta")
+
+def test_tagged_values_are_type_exact():
+    @tag(("level", 1), ("path", (1, 2)))
+    def one(): pass
+
+    @tag(("level", True), ("path", (True, 2)))
+    def true(): pass
+
+    assert one in tagged("level", 1) and true not in tagged("level", 1)
+    assert true in tagged("level", True) and one not in tagged("level", True)
+    assert tagged("level", 1.0) & {one, true} == set()
+    assert one in tagged("path", (1, 2)) and true not in tagged("path", (1, 2))
+
+def test_tagged_unhashable_values_and_gc():
+    import gc
+
+    def f(): pass
+    settags(f, ("groups", ["a", "b"]))
+    assert f in tagged("groups", ["a", "b"])
+    assert f not in tagged("groups", ["a"])
+
+    def temp(): pass
+    settags(temp, "ephemeral_tag")
+    assert len(tagged("ephemeral_tag")) == 1
+    del temp
+    gc.collect()
+    assert tagged("ephemeral_tag") == set()
+
+
+def test_reverse_index_is_cleaned_on_gc():
+    import gc
+    from chinodeco.pretreat import tagging
+
+    def make(i):
+        def handler(): pass
+        settags(handler, "gc_probe", ("gc_probe_id", i))
+        return handler
+
+    shared = [make(0) for _ in range(3)]
+    handlers = [make(i) for i in range(1, 1001)]
+    assert len(tagged("gc_probe")) == 1003
+    value_keys = len(tagging._TAG_VALUE_INDEX)
+
+    del handlers
+    gc.collect()
+    assert len(tagging._TAG_VALUE_INDEX) == value_keys - 1000
+    assert len(tagging._TAG_INDEX["gc_probe"]) == 1
+    assert tagged("gc_probe") == set(shared)
+
+    shared.pop()
+    gc.collect()
+    assert len(alltags(shared[0])._members) == 2
+    del shared
+    gc.collect()
+    assert "gc_probe" not in tagging._TAG_INDEX and "gc_probe_id" not in tagging._TAG_INDEX
+
+
+def test_concurrent_updates_are_not_lost():
+    import sys
+    import threading
+
+    def target(): pass
+    keys = [f"concurrent_{i}" for i in range(8)]
+    barrier = threading.Barrier(len(keys))
+
+    def worker(key):
+        barrier.wait()
+        for i in range(200):
+            settags(target, (key, i))
+            if i % 2:
+                deltags(target, key)
+        settags(target, (key, "done"))
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=worker, args=(key,)) for key in keys]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert alltags(target) == {key: "done" for key in keys}
+    assert all(tagged(key, "done") == {target} and tagged(key) == {target} for key in keys)
+
+
+def test_tagquery_evaluation():
+    query = tagquery("role == 'admin' and not beta and tier >= 2")
+    assert query({"role": "admin", "tier": 3})
+    assert not query({"role": "admin", "tier": 3, "beta": True})
+    assert not query({"role": "admin"})  # missing tier
+    assert not query({"role": "admin", "tier": "high"})  # incomparable types
+
+    assert tagquery("role in ('admin', 'owner') or 1 <= level < 3")({"level": 2})
+    assert tagquery("role != 'admin'")({})
+    assert tagquery("role == 'admin'") is tagquery("role == 'admin'")  # cached
+
+def test_tagquery_invalid_syntax():
+    with pytest.raises(ValueError):
+        tagquery("role ==")
+    with pytest.raises(ValueError):
+        tagquery("role == admin()")
+
+def test_tagquery_identity_and_unsupported_operators():
+    assert tagquery("owner is None")({"owner": None})
+    assert not tagquery("owner is None")({})
+    assert tagquery("owner is not None")({})
+    assert not tagquery("owner is not None")({"owner": None})
+    for text in ("tier + 1 > 2", "~tier", "role @ 'admin' == 1"):
+        with pytest.raises(ValueError):
+            tagquery(text)
+
+def test_matchtags_and_findtagged():
+    @tag(("role", "admin"), ("tier", 2))
+    def boss(): pass
+
+    @tag(("role", "admin"), "beta", ("tier", 3))
+    def tester(): pass
+
+    assert matchtags(boss, "role == 'admin' and not beta")
+    assert not matchtags(tester, "role == 'admin' and not beta")
+    assert findtagged("role == 'admin' and tier >= 2") >= {boss, tester}
+    found = findtagged("role == 'admin' and not beta")
+    assert boss in found and tester not in found
+
+
+def test_tags_are_interned_and_copy_on_write():
+    def f(): pass
+    def g(): pass
+    settags(f, "a", ("b", 2))
+    settags(g, ("b", 2), "a")
+    assert alltags(f) is alltags(g)
+
+    shared = alltags(f)
+    settags(g, "c")
+    assert shared == {"a": True, "b": 2}  # f keeps the old set
+    assert alltags(g) == {"a": True, "b": 2, "c": True}
+    with pytest.raises(TypeError):
+        alltags(f)["x"] = 1
+
+    def h(): pass
+    def k(): pass
+    settags(h, ("x", 1))
+    settags(k, ("x", True))
+    assert alltags(h) is not alltags(k)  # 1 and True are distinct values
+
+    def m(): pass
+    def n(): pass
+    settags(m, "x", ("v", (1, frozenset({1.0}))))
+    settags(n, "x", ("v", (True, frozenset({True}))))
+    assert alltags(m) is not alltags(n)  # equal but differently typed values inside containers
+    assert type(gettag(n, "v")[0]) is bool and type(next(iter(gettag(n, "v")[1]))) is bool
+    assert type(gettag(m, "v")[0]) is int and type(next(iter(gettag(m, "v")[1]))) is float
+
+def test_tags_resolve_through_wrapper_chain():
+    from functools import wraps
+
+    def passthrough(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            return f(*args, **kwargs)
+        return wrapper
+
+    @passthrough
+    @passthrough
+    @tag(("role", "admin"))
+    def handler(): pass
+
+    inner = handler.__wrapped__.__wrapped__
+    settags(inner, "beta")
+    assert hastag(handler, "beta")  # visible from the outermost wrapper
+
+    settags(handler, ("tier", 2))
+    assert gettag(inner, "tier") == 2
+    deltags(handler.__wrapped__, "role")
+    assert not haskey(inner, "role") and not haskey(handler, "role")
+    assert alltags(handler) is alltags(inner)
+    assert handler in tagged("tier", 2) and inner not in tagged("tier", 2)
+
+def test_tagged_returns_the_outermost_wrapper():
+    import gc
+    from chinodeco.debug import debug
+    from chinodeco.pretreat.caching import memoize
+
+    @memoize
+    @debug
+    @tag(("role", "handler"))
+    def h(): return "ok"
+
+    assert tagged("role") >= {h} and h.__wrapped__.__wrapped__ not in tagged("role")
+    assert h in tagged("role", "handler") and h in findtagged("role == 'handler'")
+
+    settags(h, "beta")  # moved to a new tag set, still found as the wrapper
+    assert h in tagged("beta") and h in tagged("role")
+
+    def bare(): pass
+    temporary = debug(tag("transient_wrapper")(bare))
+    assert tagged("transient_wrapper") == {temporary}
+    del temporary
+    gc.collect()
+    assert tagged("transient_wrapper") == {bare}  # back to the function once the wrapper is collected
+
+def test_tags_follow_a_rebound_inner_link():
+    from functools import wraps
+
+    @tag("first")
+    def first(): pass
+
+    @tag("second")
+    def second(): pass
+
+    middle = wraps(first)(lambda: None)
+    outer = wraps(middle)(lambda: None)
+    assert hastag(outer, "first")
+    middle.__wrapped__ = second
+    assert hastag(outer, "second") and not haskey(outer, "first")
+
+def test_tags_on_bound_methods():
+    class Service:
+        @tag("public")
+        def ping(self): pass
+
+    service = Service()
+    assert hastag(service.ping, "public")
+    settags(service.ping, "cached")
+    assert hastag(Service.ping, "cached")
+
+def test_tagversion_and_change_listeners():
+    events = []
+
+    @ontagchange
+    def listener(func, old, new):
+        events.append((func, dict(old), dict(new)))
+
+    try:
+        def f(): pass
+        assert tagversion(f) == 0
+        start = tagversion()
+
+        settags(f, "a")
+        first = tagversion(f)
+        assert first > start and tagversion() == first
+        settags(f, "a")  # no effective change
+        assert tagversion(f) == first and len(events) == 1
+
+        deltags(f, "a")
+        assert tagversion(f) > first
+        deltags(f, "missing")
+        assert events == [(f, {}, {"a": True}), (f, {"a": True}, {})]
+    finally:
+        offtagchange(listener)
+
+    settags(f, "b")
+    assert len(events) == 2
@@ -0,0 +1,140 @@
+# !/usr/bin/env Python3
+# -*- coding:utf-8 -*-
+
+import pytest
+from chinodeco.pretreat.caching import LRUCache, _make_key, _UNHASHABLE
+
+def test_lru_cache_eviction_order():
+    cache = LRUCache(2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" becomes most recently used
+    cache.set("c", 3)
+    assert "b" not in cache
+    assert "a" in cache and "c" in cache
+
+    info = cache.cache_info()
+    assert (info.hits, info.misses, info.evictions, info.currsize) == (1, 0, 1, 2)
+
+def test_lru_cache_miss_and_clear():
+    cache = LRUCache(None)
+    assert cache.get("missing", "default") == "default"
+    cache.set("x", 1)
+    cache.cache_clear()
+    assert len(cache) == 0
+    assert cache.cache_info().misses == 0
+
+def test_lru_cache_invalid_maxsize():
+    with pytest.raises(ValueError):
+        LRUCache(0)
+
+def test_make_key_distinguishes_types_and_freezes_containers():
+    assert _make_key(1) != _make_key(True)
+    assert _make_key([1, 2]) != _make_key((1, 2))
+    assert _make_key({"a": [1]}) == _make_key({"a": [1]})
+    assert _make_key([object.__new__(type("Unhashable", (), {"__hash__": None}))]) is _UNHASHABLE
+
+def test_lru_cache_ttl_expiry(monkeypatch):
+    import chinodeco.pretreat.caching as caching
+    now = {"t": 100.0}
+    monkeypatch.setattr(caching.time, "monotonic", lambda: now["t"])
+
+    cache = LRUCache(ttl=5)
+    cache.set("k", 1)
+    assert cache.get("k") == 1
+    now["t"] += 5
+    assert cache.get("k", "expired") == "expired"
+    assert cache.cache_info().evictions == 1
+
+# ========== Tests for @memoize ==========
+
+def test_memoize_normalizes_arguments():
+    from chinodeco.pretreat import memoize
+    calls = []
+
+    @memoize
+    def scale(x, factor=2):
+        calls.append(x)
+        return x * factor
+
+    assert scale(3) == scale(x=3) == scale(3, 2) == scale(factor=2, x=3) == 6
+    assert calls == [3]
+    assert scale.cache_info().hits == 3
+
+def test_memoize_invalidate_and_unhashable():
+    from chinodeco.pretreat import memoize
+    calls = []
+
+    @memoize(maxsize=8)
+    def total(items, *extra):
+        calls.append(items)
+        return sum(items) + sum(extra)
+
+    assert total([1, 2]) == 3
+    assert total([1, 2]) == 3
+    assert total.invalidate([1, 2]) is True
+    assert total.invalidate([1, 2]) is False
+    assert total([1, 2]) == 3
+    assert len(calls) == 2
+
+def test_memoize_async_single_flight():
+    import asyncio
+    from chinodeco.pretreat import memoize
+    calls = []
+
+    @memoize
+    async def fetch(user_id):
+        calls.append(user_id)
+        await asyncio.sleep(0.01)
+        return {"id": user_id}
+
+    async def main():
+        return await asyncio.gather(fetch(1), fetch(user_id=1), fetch(2))
+
+    first, second, third = asyncio.run(main())
+    assert first is second and third == {"id": 2}
+    assert calls == [1, 2]
+
+def test_memoize_async_cancelled_leader_hands_over():
+    import asyncio
+    from chinodeco.pretreat import memoize
+    calls = []
+
+    @memoize
+    async def fetch(user_id):
+        calls.append(user_id)
+        await asyncio.sleep(0.01)
+        return {"id": user_id}
+
+    async def main():
+        leader = asyncio.ensure_future(fetch(1))
+        followers = [asyncio.ensure_future(fetch(1)) for _ in range(2)]
+        await asyncio.sleep(0)
+        leader.cancel()
+        results = await asyncio.gather(*followers)
+        return leader, followers, results
+
+    leader, followers, (first, second) = asyncio.run(main())
+    assert leader.cancelled()
+    assert not any(follower.cancelled() for follower in followers)
+    assert first is second == {"id": 1}
+    assert calls == [1, 1]
+
+def test_memoize_async_errors_are_shared_but_not_cached():
+    import asyncio
+    from chinodeco.pretreat import memoize
+    calls = []
+
+    @memoize
+    async def flaky(x):
+        calls.append(x)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("down")
+
+    async def main():
+        return await asyncio.gather(flaky(1), flaky(1), return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(main()))
+    with pytest.raises(RuntimeError):
+        asyncio.run(flaky(1))
+    assert calls == [1, 1]
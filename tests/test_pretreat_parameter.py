@@ -1,9 +1,23 @@
 # !/usr/bin/env Python3
 # -*- coding:utf-8 -*-
 
+import threading
 import pytest
 from chinodeco.pretreat.parameter import setargs, mapargs, filterargs
-from chinodeco.pretreat.parameter import addprefix, addsuffix
+from chinodeco.pretreat.parameter import addprefix, addsuffix, offload
+
+
+def _checksum(data):
+    import os
+    return (sum(data) % 251, os.getpid())
+
+
+def _await_release(data):
+    # completes only once the event loop sets the flag, so it deadlocks if the loop is blocked
+    assert _RELEASE.wait(2)
+    return len(data)
+
+_RELEASE = threading.Event()
 
 
 def test_setargs_positional():
@@ -77,4 +91,270 @@ def test_addsuffix_keyword():
     @addsuffix(("_END", "word"))
     def process(word): return word
 
-    assert process(word="hello") == "hello_END"
\ No newline at end of file
+    assert process(word="hello") == "hello_END"
+
+def test_mapargs_async_map_funcs_run_concurrently():
+    import asyncio
+    running = {"now": 0, "peak": 0}
+
+    async def slow_upper(v):
+        running["now"] += 1
+        running["peak"] = max(running["peak"], running["now"])
+        await asyncio.sleep(0.01)
+        running["now"] -= 1
+        return v.upper()
+
+    @mapargs((slow_upper, "a"), (slow_upper, 1), (len, "c"))
+    async def join(a, b, c): return a, b, c
+
+    assert asyncio.run(join("x", "y", c="zzz")) == ("X", "Y", 3)
+    assert running["peak"] == 2
+
+
+def test_mapargs_async_concurrency_limit():
+    import asyncio
+    running = {"now": 0, "peak": 0}
+
+    async def slow(v):
+        running["now"] += 1
+        running["peak"] = max(running["peak"], running["now"])
+        await asyncio.sleep(0.01)
+        running["now"] -= 1
+        return v + 1
+
+    @mapargs((slow, "a"), (slow, "b"), (slow, "c"), concurrency=1)
+    async def total(a, b, c): return a + b + c
+
+    async def main():
+        return await asyncio.gather(total(1, 2, 3), total(4, 5, 6))
+
+    assert asyncio.run(main()) == [9, 18]
+    assert running["peak"] == 1
+    # the limit is bound to the running loop, not to the first one it was used on
+    assert asyncio.run(main()) == [9, 18]
+    assert running["peak"] == 1
+
+
+def test_mapargs_async_map_func_requires_coroutine_function():
+    async def fetch(v): return v
+
+    with pytest.raises(TypeError):
+        @mapargs((fetch, "x"))
+        def f(x): return x
+
+
+def test_mapargs_cache_hits_and_eviction():
+    calls = []
+
+    def normalize(v):
+        calls.append(v)
+        return str(v).strip().lower()
+
+    @mapargs((normalize, "a"), (normalize, "b"), cache=2)
+    def pair(a, b): return a, b
+
+    assert pair(" A", "B ") == ("a", "b")
+    assert pair(" A", "B ") == ("a", "b")
+    assert calls == [" A", "B "]
+    pair("c", " A")
+    info = pair.cache_info()
+    assert (info.hits, info.misses, info.evictions) == (2, 4, 2)
+    assert len(pair.map_caches) == 1
+
+    pair.cache_clear()
+    assert pair.cache_info().currsize == 0
+
+
+def test_mapargs_cache_unhashable_values():
+    calls = []
+
+    def total(v):
+        calls.append(v)
+        return sum(v) if isinstance(v, list) else len(v)
+
+    @mapargs((total, 0), cache=True)
+    def f(x): return x
+
+    assert f([1, 2]) == 3
+    assert f([1, 2]) == 3
+    assert len(calls) == 1
+
+    class Bag:
+        __hash__ = None
+        def __len__(self): return 7
+
+    assert f(Bag()) == 7
+    assert f.cache_info().uncacheable == 1
+
+
+def test_mapargs_each_is_lazy():
+    seen = []
+
+    def parse(v):
+        seen.append(v)
+        return int(v)
+
+    @mapargs((parse, "rows"), each=True)
+    def first_two(rows):
+        it = iter(rows)
+        return next(it), next(it)
+
+    def source():
+        yield from ("1", "2", "3")
+        raise AssertionError("source must not be exhausted")
+
+    assert first_two(source()) == (1, 2)
+    assert seen == ["1", "2"]
+
+
+def test_mapargs_each_async_iterable_and_async_map_func():
+    import asyncio
+
+    async def double(v):
+        await asyncio.sleep(0)
+        return v * 2
+
+    async def numbers():
+        for i in range(3):
+            yield i
+
+    @mapargs((double, "xs"), each=True)
+    async def collect(xs):
+        return [x async for x in xs]
+
+    @mapargs((str, "xs"), each=True)
+    async def collect_sync(xs):
+        return [x async for x in xs]
+
+    assert asyncio.run(collect(numbers())) == [0, 2, 4]
+    assert asyncio.run(collect([1, 2])) == [2, 4]
+    assert asyncio.run(collect_sync(numbers())) == ["0", "1", "2"]
+
+
+def test_addprefix_addsuffix_each():
+    @addsuffix(("!", "words"), each=True)
+    @addprefix(("#", "words"), each=True)
+    def tags(words): return list(words)
+
+    assert tags(["a", "b"]) == ["#a!", "#b!"]
+    with pytest.raises(TypeError):
+        tags(1)
+
+
+@pytest.fixture(scope="module")
+def process_pool():
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        yield pool
+
+
+def test_offload_threshold_and_process_execution(process_pool):
+    import os
+    task = offload(_checksum, threshold=4, executor=process_pool)
+
+    @mapargs((task, "small"), (task, "large"))
+    def f(small, large): return small, large
+
+    small, large = f(b"\x01", b"\x01" * 8)
+    assert small == (1, os.getpid())
+    assert large[0] == 8 and large[1] != os.getpid()
+
+
+def test_offload_async_and_cache(process_pool):
+    import asyncio
+    task = offload(_checksum, threshold=0, executor=process_pool)
+
+    @mapargs((task, "a"), (task, "b"), cache=True)
+    async def f(a, b): return a[0], b[0]
+
+    assert asyncio.run(f(b"\x02", b"\x03")) == (2, 3)
+    assert asyncio.run(f(b"\x02", b"\x03")) == (2, 3)
+    assert f.cache_info().hits == 2
+
+
+def test_mapargs_each_concurrency_and_offload_do_not_block_the_loop():
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+    running = {"now": 0, "peak": 0}
+
+    async def slow(v):
+        running["now"] += 1
+        running["peak"] = max(running["peak"], running["now"])
+        await asyncio.sleep(0.01)
+        running["now"] -= 1
+        return v
+
+    @mapargs((slow, "xs"), each=True, concurrency=1)
+    async def collect(xs):
+        return [x async for x in xs]
+
+    async def limited():
+        return await asyncio.gather(collect([1, 2]), collect([3, 4]))
+
+    assert asyncio.run(limited()) == [[1, 2], [3, 4]]
+    assert running["peak"] == 1
+
+    _RELEASE.clear()
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        @mapargs((offload(_await_release, threshold=0, executor=pool), "blobs"), each=True)
+        async def sizes(blobs):
+            return [size async for size in blobs]
+
+        async def release():
+            await asyncio.sleep(0.01)
+            _RELEASE.set()
+
+        async def main():
+            return (await asyncio.gather(sizes([b"ab", b"c"]), release()))[0]
+
+        assert asyncio.run(main()) == [2, 1]
+
+
+def test_offload_rejects_unpicklable_func():
+    with pytest.raises(TypeError):
+        offload(lambda data: data)
+
+def test_pretreat_preserves_function_kind():
+    import asyncio
+    import inspect
+
+    @setargs((10, "step"))
+    def count(n, step=1):
+        yield from range(0, n * step, step)
+
+    @addprefix(("id-", 0))
+    async def ids(name, n):
+        for i in range(n):
+            yield f"{name}:{i}"
+
+    @filterargs(block=[None])
+    async def total(*values):
+        return sum(values)
+
+    assert inspect.isgeneratorfunction(count)
+    assert list(count(3)) == [0, 10, 20]
+    assert inspect.isasyncgenfunction(ids)
+
+    async def main():
+        return [i async for i in ids("x", 2)]
+
+    assert asyncio.run(main()) == ["id-x:0", "id-x:1"]
+    assert inspect.iscoroutinefunction(total)
+    assert asyncio.run(total(1, None, 2)) == 3
+
+def test_mapargs_async_map_func_on_async_generator():
+    import asyncio
+
+    async def double(x):
+        await asyncio.sleep(0)
+        return x * 2
+
+    @mapargs((double, "n"))
+    async def repeat(n):
+        for _ in range(2):
+            yield n
+
+    async def main():
+        return [n async for n in repeat(4)]
+
+    assert asyncio.run(main()) == [8, 8]